@@ -1,20 +1,38 @@
 import streamlit as st
 import pandas as pd
-import streamlit.components.v1 as components
+import collections
+import functools
+import importlib.util
 import os
-import json
+import sqlite3
+import uuid
+from contextlib import nullcontext
 
-# Check for openpyxl availability (not needed anymore, but kept for compatibility)
-try:
-    import openpyxl  # type: ignore
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
+from oro_logic.blueprint import (
+    BLUEPRINT_VERSION, BUYING_CHANNELS, CHANNEL_COLUMNS, LOGIC_TYPES, SUPPLIER_COLUMNS, SUPPLIER_OPTIONS, SUPPLIER_TYPES,
+    TENDER_OPTIONS, blacklist_frame, blacklist_records, blueprint_hash, channel_records, editor_frame,
+)
+from oro_logic.editor_store import EditorStore
+from oro_logic.export import export_artifact
+from oro_logic.flow import (
+    DETAIL_LIMIT, FLOW_SUPPLIER_COLUMNS, build_flow_graph, flow_hash, flow_issues, group_label, supplier_groups,
+)
+from oro_logic.hierarchy import build_cat_hierarchy, build_geo_hierarchy
+from oro_logic.mermaid import INSTALL_HINT as MERMAID_INSTALL_HINT, diagram_html, local_bundle_available, render_svg
+from oro_logic.profiling import DEFAULT_LOG_PATH, ENABLED as PROFILING, TRACE_ALLOCATIONS, RunProfile, log_run
+from oro_logic.rulesets import DEFAULT_RULESET_DIR, save_blueprint
+from oro_logic.store import get_store
+from oro_logic.taxonomy import DATA_FILES, get_file_taxonomy
+
+# openpyxl is only imported when an Excel file is built or a workbook read (it costs more to import than the app's own code)
+OPENPYXL_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
 
 # ==========================================
 # 1. CONFIGURATION
 # ==========================================
 st.set_page_config(page_title="ORO Logic Capturer", page_icon="🚦", layout="wide")
+# False again at the end of the script: a run that starts inside a fragment leaves it False
+st.session_state.page_run_active = True
 
 st.markdown("""
 <style>
@@ -31,278 +49,318 @@ st.markdown("""
 
 def load_geo_from_df(df):
     """Convert Geo DataFrame to GEO_HIERARCHY dictionary"""
-    hierarchy = {}
-    if df is not None and not df.empty:
-        for _, row in df.iterrows():
-            # Используем strip() для удаления пробелов и проверяем на пустые строки
-            region = str(row.get('Region', '')).strip() if pd.notna(row.get('Region', '')) else ''
-            drbu = str(row.get('DRBU', '')).strip() if pd.notna(row.get('DRBU', '')) else ''
-            end_market = str(row.get('End Market', '')).strip() if pd.notna(row.get('End Market', '')) else ''
-            
-            # Загружаем все строки, даже если некоторые поля пустые (но не все)
-            if region or drbu or end_market:
-                if not region:
-                    region = 'Unknown'
-                if not drbu:
-                    drbu = 'Unknown'
-                if not end_market:
-                    end_market = 'Unknown'
-                
-                if region not in hierarchy:
-                    hierarchy[region] = {}
-                if drbu not in hierarchy[region]:
-                    hierarchy[region][drbu] = []
-                if end_market not in hierarchy[region][drbu]:
-                    hierarchy[region][drbu].append(end_market)
-    return hierarchy
+    return build_geo_hierarchy(df)
 
 def load_cat_from_df(df):
     """Convert Categories DataFrame to CAT_HIERARCHY dictionary"""
-    hierarchy = {}
-    if df is not None and not df.empty:
-        for _, row in df.iterrows():
-            l1 = row.get('L1', '')
-            l2 = row.get('L2', '')
-            l3 = row.get('L3', '')
-            l4 = row.get('L4', '')
-            
-            if l1 and l2 and l3 and l4:
-                if l1 not in hierarchy:
-                    hierarchy[l1] = {}
-                if l2 not in hierarchy[l1]:
-                    hierarchy[l1][l2] = {}
-                if l3 not in hierarchy[l1][l2]:
-                    hierarchy[l1][l2][l3] = []
-                if l4 not in hierarchy[l1][l2][l3]:
-                    hierarchy[l1][l2][l3].append(l4)
-    return hierarchy
+    return build_cat_hierarchy(df)
+
+SUPPLIER_TYPE_FILTERS = ["All", "Local", "Global"]
+TACTICAL_ACTIONS = ["Fairmarkit (Autonomous)", "3-Bids (Local Buyer)", "Spot Buy Desk", "No-Touch PO"]
+STRATEGIC_OWNERS = ["Global Category Lead", "Sourcing Manager", "Regional Hub", "RFP Team"]
+SEARCH_RESULTS = 8  # paths listed under a taxonomy search box
+
+BLUEPRINT_PARTS = ["scope", "category", "supplier_pool", "buying_channels", "stream2"]
+
+def supplier_store():
+    """The session's Supplier Pool: a paged store the editor applies its edits to (option columns held compact)"""
+    if "supplier_store" not in st.session_state:
+        st.session_state.supplier_store = EditorStore(editor_frame([], SUPPLIER_COLUMNS), SUPPLIER_COLUMNS,
+                                                      ["Supplier Name", "Vendor Code"],
+                                                      compact_columns=list(SUPPLIER_OPTIONS))
+    return st.session_state.supplier_store
+
+def measure_supplier_memory():
+    st.session_state.supplier_memory_report = supplier_store().memory_report()
+
+def current_blueprint():
+    """The blueprint as the form stands, from the parts its sections last published"""
+    parts = st.session_state.get("blueprint_parts", {})
+    return {name: parts.get(name, {}) for name in BLUEPRINT_PARTS}
+
+def blueprint_keys(blueprint):
+    """(blueprint_key, flow_key): exports are memoized under the first, the diagram under the second.
+
+    The Supplier Pool enters both as the store's digest, and the diagram's key leaves out what the
+    diagram doesn't draw (supplier Comments, Sourcing Logic notes), so editing those doesn't redraw it.
+    """
+    if blueprint["supplier_pool"].get("enabled"):
+        store = supplier_store()
+        return (blueprint_hash(blueprint, suppliers_digest=store.digest()),
+                flow_hash(blueprint, suppliers_digest=store.digest(FLOW_SUPPLIER_COLUMNS)))
+    return blueprint_hash(blueprint), flow_hash(blueprint)
+
+def publish_part(name, part):
+    """Record a section's part of the blueprint.
+
+    In a full-page run every section publishes before the diagram and the output are drawn.
+    A section rerunning on its own (a fragment) only reruns the page when its change shows
+    in the diagram or in the output on screen; otherwise nothing else is redrawn.
+    """
+    state = st.session_state
+    parts = state.setdefault("blueprint_parts", {})
+    if parts.get(name) == part:
+        return
+    parts[name] = part
+    if state.page_run_active:
+        return
+    blueprint_key, flow_key = blueprint_keys(current_blueprint())
+    if flow_key != state.get("drawn_flow_key") or state.get("drawn_output_key") not in (None, blueprint_key):
+        st.rerun()
+
+PERF_HISTORY = 50  # profiled runs kept for the debug panel
+
+def begin_perf_run(kind):
+    """Start profiling this rerun (ORO_PROFILE); a run cut short before finishing is logged as interrupted"""
+    state = st.session_state
+    if state.get("perf_run") is not None:
+        finish_perf_run(interrupted=True)
+    state.setdefault("perf_session", uuid.uuid4().hex[:12])
+    state.perf_run = RunProfile(kind, session=state.perf_session)
+
+def finish_perf_run(interrupted=False):
+    state = st.session_state
+    run, state.perf_run = state.get("perf_run"), None
+    if run is not None:
+        record = run.finish(interrupted)
+        state.setdefault("perf_history", collections.deque(maxlen=PERF_HISTORY)).append(record)
+        log_run(record)
+
+def perf_section(name):
+    """Time ``name`` into this rerun's profile (a no-op unless ORO_PROFILE is set)"""
+    run = st.session_state.get("perf_run") if PROFILING else None
+    return run.section(name) if run is not None else nullcontext()
+
+def profiled(name):
+    """Decorator for the page's sections: a fragment rerunning on its own is profiled as a run of its own"""
+    def decorate(section):
+        @functools.wraps(section)
+        def run(*args, **kwargs):
+            if not PROFILING or st.session_state.page_run_active:
+                with perf_section(name):
+                    return section(*args, **kwargs)
+            begin_perf_run("fragment")
+            try:
+                with perf_section(name):
+                    result = section(*args, **kwargs)
+            except BaseException:  # st.rerun() included: the page run that follows is profiled on its own
+                finish_perf_run(interrupted=True)
+                raise
+            finish_perf_run()
+            return result
+        return run
+    return decorate
+
+def profiled_download(name, build):
+    """A deferred download's build, profiled and logged as a run of its own (ORO_PROFILE)"""
+    if not PROFILING:
+        return build
+    session, history = st.session_state.get("perf_session", ""), st.session_state.get("perf_history")
+    def run():
+        profile = RunProfile("download", session=session)
+        with profile.section(name):
+            data = build()
+        record = profile.finish()
+        if history is not None:
+            history.append(record)
+        log_run(record)
+        return data
+    return run
+
+def set_selection(key, values):
+    """Select All / Clear All callback: runs before the multiselect is drawn, so no extra rerun"""
+    st.session_state[key] = list(values)
+
+def add_category_path(path):
+    """Category search callback: select the whole L1 > L4 path in one rerun and clear the search"""
+    state = st.session_state
+    for level, value in enumerate(path, start=1):
+        key = f"cat_l{level}_multiselect"
+        selected = list(state.get(key) or [])
+        if value not in selected:
+            selected.append(value)
+        state[key] = selected
+    state.cat_search_query = ""
+
+def add_market_path(path):
+    """End Market search callback: switch to the market's region / cluster and select it"""
+    region, cluster, market = path
+    state = st.session_state
+    if state.get("geo_region") == region and state.get("geo_cluster") == cluster:
+        markets = list(state.get("geo_market_multiselect") or [])
+    else:
+        markets = []
+        state.business_user_markets = []  # their options belonged to the previous cluster
+        state.pop("geo_company_code", None)
+    state.geo_region = region
+    state.geo_cluster = cluster
+    state.geo_market_multiselect = markets + [market] if market not in markets else markets
+    state.geo_search_query = ""
+
+def path_search(index, label, key, on_pick, placeholder):
+    """Search box over a taxonomy's paths; each hit is a button that selects its whole path"""
+    query = st.text_input(f"🔎 Search {label}", key=key, placeholder=placeholder)
+    if not query.strip():
+        return
+    hits = index.search(query, limit=SEARCH_RESULTS)
+    if not hits:
+        st.caption(f"No {label} match '{query}'")
+    for i, (_, path) in enumerate(hits):
+        st.button(" › ".join(path), key=f"{key}_hit_{i}", width="stretch", on_click=on_pick, args=(path,))
+
+def set_show_output(show):
+    st.session_state.show_output = show
+
+def apply_supplier_edits(editor_key):
+    """Editor callback: apply the page's edit delta to the store (only the rows it names)"""
+    supplier_store().apply(st.session_state.get(editor_key))
+
+def change_supplier_page():
+    supplier_store().set_page(st.session_state.suppliers_page - 1)
+
+def load_blueprint_into_session(blueprint_id):
+    """Button callback: fill the form from a stored blueprint.
+
+    Runs before the rerun, so the widgets pick the values up from session state.
+    Scope values the current taxonomy no longer offers are dropped.
+    """
+    blueprint = get_store().get(blueprint_id)
+    if blueprint is None:
+        st.toast(f"Blueprint #{blueprint_id} no longer exists")
+        return
+    state = st.session_state
+    scope, category = blueprint.get("scope", {}), blueprint.get("category", {})
+    pool, channels, stream2 = blueprint.get("supplier_pool", {}), blueprint.get("buying_channels", {}), blueprint.get("stream2", {})
+
+    # Geography cascade: each level only keeps values offered under the level above
+    geo_index = taxonomy.geo_index
+    region, cluster = scope.get("region"), scope.get("cluster")
+    if region in geo_index.options():
+        state.geo_region = region
+        if cluster in geo_index.options([region]):
+            state.geo_cluster = cluster
+            markets = geo_index.options([region, cluster])
+            state.geo_market_multiselect = [m for m in scope.get("end_markets", []) if m in markets]
+            state.business_user_markets = [m for m in scope.get("business_user_markets", []) if m in markets]
+            company_code = scope.get("company_code")
+            if state.geo_market_multiselect and company_code in geo_index.options([region, cluster, state.geo_market_multiselect]):
+                state.geo_company_code = company_code
+            elif company_code and company_code != "N/A":
+                state.geo_company_code_manual = company_code
+
+    # Category cascade (L1 -> L4)
+    path = []
+    for level in range(1, 5):
+        options = taxonomy.cat_index.options(path) if not path or path[-1] else []
+        chosen = [value for value in category.get(f"l{level}", []) if value in options]
+        state[f"cat_l{level}_multiselect"] = chosen
+        path.append(chosen)
+
+    supplier_type = pool.get("supplier_type_filter", "All")
+    state.supplier_type_filter = supplier_type if supplier_type in SUPPLIER_TYPE_FILTERS else "All"
+    state.enable_supplier_pool = bool(pool.get("enabled", True))
+    supplier_store().load(editor_frame(pool.get("suppliers"), SUPPLIER_COLUMNS))
+    state.enable_buying_channels = bool(channels.get("enabled", True))
+    state.buying_channels_df = editor_frame(channels.get("channels"), CHANNEL_COLUMNS)
+    state.allow_mkp_toggle = bool(channels.get("allow_marketplace", False))
+    state.mkp_limit_input = int(float(channels.get("marketplace_limit") or 500))
+    state.mkp_blacklist_df = blacklist_frame(channels.get("marketplace_blacklist"))
+    for editor_key in ("buying_channels_editor", "mkp_blacklist_editor"):
+        state.pop(editor_key, None)  # pending edits belong to the previous tables
+
+    tactical, strategic = stream2.get("tactical", {}), stream2.get("strategic", {})
+    state.enable_stream2 = bool(stream2.get("enabled", True))
+    state.threshold_input = int(float(stream2.get("tactical_threshold") or 10000))
+    state.enable_tactical = bool(tactical.get("enabled", True))
+    if tactical.get("action") in TACTICAL_ACTIONS:
+        state.tact_action_select = tactical["action"]
+    state.tact_manager_input = tactical.get("manager", "")
+    state.tact_comments_text_area = tactical.get("comments", "")
+    state.enable_strategic = bool(strategic.get("enabled", True))
+    if strategic.get("owner") in STRATEGIC_OWNERS:
+        state.strat_action_select = strategic["owner"]
+    state.strat_manager_input = strategic.get("manager", "")
+    state.strat_comments_text_area = strategic.get("comments", "")
+    state.instr_text_area = stream2.get("instructions", "")
+    st.toast(f"Loaded blueprint #{blueprint_id}")
+
+def import_suppliers_into_session():
+    """Button callback: validate the uploaded supplier file and add (or swap in) its valid rows"""
+    from oro_logic.supplier_import import read_supplier_file, validate_suppliers
+
+    state = st.session_state
+    upload = state.get("supplier_upload")
+    if upload is None:
+        return
+    replace = state.get("supplier_import_mode") == "Replace pool"
+    store = supplier_store()
+    current = None if replace else pd.DataFrame(store.records(), columns=SUPPLIER_COLUMNS)
+    try:
+        raw = read_supplier_file(upload)
+        clean, report = validate_suppliers(raw, existing=current)
+    except Exception as e:
+        state.supplier_import_report = None
+        st.toast(f"Could not import {upload.name}: {e}")
+        return
+    if current is not None:
+        clean = pd.concat([current, clean], ignore_index=True)
+    store.load(clean if not clean.empty else editor_frame([], SUPPLIER_COLUMNS))
+    state.supplier_import_report = (upload.name, len(raw), report)
+
+@st.fragment
+def blueprint_store_browser():
+    """Sidebar search over the Blueprint Store; filtering it reruns only this fragment"""
+    blueprint_store = get_store()
+    store_market = st.selectbox("Stored End Market", [""] + blueprint_store.values("end_market"),
+                                format_func=lambda value: value or "Any", key="store_filter_market")
+    store_l4 = st.selectbox("Stored L4 Category", [""] + blueprint_store.values("l4"),
+                            format_func=lambda value: value or "Any", key="store_filter_l4")
+    store_text = st.text_input("Search label / category path", key="store_filter_text")
+    stored_rows = {row["id"]: row for row in blueprint_store.find({"end_market": store_market, "l4": store_l4}, text=store_text, limit=50)}
+    if stored_rows:
+        stored_id = st.selectbox(
+            "Blueprint", list(stored_rows), key="store_blueprint_id",
+            format_func=lambda i: f"#{i} v{stored_rows[i]['version']} · {stored_rows[i]['label'] or stored_rows[i]['end_markets'] or 'All markets'}"
+        )
+        stored_versions = {row["id"]: row for row in blueprint_store.versions(stored_id)}
+        if len(stored_versions) > 1:
+            stored_id = st.selectbox("Version", list(stored_versions), key="store_version_id",
+                                     format_func=lambda i: f"v{stored_versions[i]['version']} · saved {stored_versions[i]['saved_at']}")
+        st.caption(f"{stored_versions[stored_id]['full_path']} | {stored_versions[stored_id]['region']} / {stored_versions[stored_id]['cluster']}")
+        # The callback fills the form; the whole page then reruns to show it
+        if st.button("📂 Load into form", key="store_load", width="stretch",
+                     on_click=load_blueprint_into_session, args=(stored_id,)):
+            st.rerun()
+    else:
+        st.caption("No stored blueprints match" if blueprint_store.count() else "No blueprints saved yet - use 💾 Save to Blueprint Store below the output")
+
+if PROFILING:
+    begin_perf_run("page")
 
 # ==========================================
 # 3. DATA: LOAD FROM FILE OR USE DEFAULTS
 # ==========================================
 
-# Initialize session state for data
-if 'geo_df' not in st.session_state:
-    st.session_state.geo_df = None
-if 'cat_df' not in st.session_state:
-    st.session_state.cat_df = None
-if 'geo_hierarchy' not in st.session_state:
-    st.session_state.geo_hierarchy = None
-if 'cat_hierarchy' not in st.session_state:
-    st.session_state.cat_hierarchy = None
-
-# Default hierarchies (fallback)
-DEFAULT_GEO_HIERARCHY = {
-  "AME": {
-    "WESTERN EUROPE": [
-      "Belgium", 
-      "Denmark", 
-      "France", 
-      "Greece", 
-      "Ireland", 
-      "Malta", 
-      "Norway", 
-      "Spain", 
-      "Sweden", 
-      "UNITED KINGDOM", 
-      "Netherlands", 
-      "Finland", 
-      "Luxembourg", 
-      "Portugal", 
-      "Cyprus"
-    ]
-  },
-  "APMEA": {
-    "APMEA SOUTH": [
-      "Australia", 
-      "Indonesia", 
-      "Malaysia", 
-      "Papua New Guinea", 
-      "Samoa", 
-      "Singapore", 
-      "Solomon Islands", 
-      "Vietnam", 
-      "Fiji", 
-      "New Zealand", 
-      "Cambodia", 
-      "Philippines", 
-      "China"
-    ]
-  },
-  "USA": {
-    "USA": ["USA"]
-  }
-}
-
-DEFAULT_CAT_HIERARCHY = {
-    "Marketing": {
-        "Marketing Prof Svc": {
-            "Advertising Services": ["Media services"],
-            "Creative agency fees": ["Creative agency fees"],
-            "Market research": ["Market research-customised", "Market research-syndicated"],
-            "Marketing & Trade Event": ["1-2-1 Activation, Brand Ambassadors & Hostesses", "Marketing Event Management", "Sponsorship"],
-            "PR Services": ["Partnership", "Printing Cylinders", "PR Agency"],
-            "Trade Marketing Services": ["D2C-Social Selling", "Loyalty & Incentive Programmes", "Other Trade Marketing Services"]
-        },
-        "Marketing POSM": {
-            "POSM Services": ["Cigarette Vending Machines Purchase & Lease/Services", "Marketing Print", "Merchandising Services", "Permanent POSM", "POSM Leasing Services", "Promotional merchandise", "Semi-Permanent POSM"]
-        }
-    },
-    "Operations": {
-        "Production": {
-            "Production Services": ["Manufacturing support services", "Production"],
-            "Spare Parts": ["Spare Parts"],
-            "After Sales": ["After Sales"]
-        },
-        "OSS": {
-            "Material Handling/Storage Machinery": ["General Machinery", "Material Handling Equipment FLTS", "Warehouse Material (pallets or other consumables)", "Workshop supplies & consumables"],
-            "Packaging Materials and Supply": ["Leaf Packaging materials & supplies", "Tobacco Case C48", "Warehouse Packaging Materials"],
-            "Quality Control": ["Factory Quality Control and Service", "Quality Control"]
-        },
-        "Agricultural Inputs": {
-            "Agrochemicals (Herbicides, Insecticides, etc.)": ["Agrochemicals (Herbicides, Insecticides, etc.)"],
-            "Fertilizers (NPK, Soluble, etc.)": ["Fertilizers (NPK, Soluble, etc.)"],
-            "Other Agricultural Inputs (Supplies, Services)": ["Other Agricultural Inputs (Supplies, Services)"]
-        }
-    },
-    "Corporate": {
-        "Facilities": {
-            "Facilities Services": ["Archiving", "Catering Services and Supplies", "Food & Beverages", "Industrial Cleaning Services", "Integrated Facilities Management", "Landscaping, Roads and Grounds, Snow removal", "Office Cleaning Equipment and Supplies", "Other Facilities", "Plants & Flowers", "Staff Transportation", "Statutory Compliance & Inspections", "Vending Purchase/Lease/Maintenance"],
-            "Building": ["Building-Consultancy & Project management", "Building Construction", "Building equipment and installation", "Building Maintenance and Repair"],
-            "Corporate Real Estate": ["Property Lease", "Property Purchase or Sale"],
-            "Pest control": ["Pest control products & services"],
-            "Security Services": ["Security Services and Supplies", "Security Technology & Services"],
-            "Uniform": ["Uniform Services and Management"],
-            "Utilities": ["Electricity", "Fuels", "Gas", "Utilities other", "Water"],
-            "Waste": ["Waste Management Services"]
-        },
-        "Prof Svc": {
-            "Consultancy": ["Consultancy"],
-            "Finance Services": ["Banking and investment", "Group Company Auditors"],
-            "Legal Services": ["Legal Services", "Legal Services Other", "Litigation", "Patents or Trade Mark"],
-            "Other Audits (local), Recovery Audits, Accounting": ["Other Audits (local), Recovery Audits, Accounting"],
-            "Translation, Information, Testing, Inspection etc": ["Translation, Information, Testing, Inspection etc"]
-        },
-        "HR Svc": {
-            "HR Professional services": ["HR Consultancy", "Outplacement", "Recruitment", "Training & education"],
-            "Reward": ["Benefits & Employee Assistance", "External Payroll Services", "Health & Life Insurance", "Healthcare Services", "HR Compensation and Benefits Surveys", "Pension investments"],
-            "Relocation": ["Expats-Schools, House", "Relocation Services"],
-            "Talent": ["Temporary Labour and outsourcing", "Temporary Labour IT"]
-        },
-        "Office Services and supplies": {
-            "Office Services and supplies": ["Books-Journals & subcriptions", "Office Equipment", "Office Furniture", "Office supplies", "Printing and Reproduction Services"]
-        },
-        "Travel Management": {
-            "Travel Management": ["Air travel", "Other Travel Expense (Visa, Rail, Sea)", "Taxi-Bus-Car hire"],
-            "Hotel-Restaurant & Meeting": ["Hotel", "Restaurant-Bar Expenses", "Seminars-Conference-Meetings"]
-        },
-        "Vehicle Hire & Purchase": {
-            "Vehicle Hire & Purchase": ["Vehicle Lease (long term)", "Vehicle Purchase", "Vehicle rental (short term)"],
-            "Other Vehicle Costs": ["Fuel", "Telematics", "Vehicle maintenance/Fleet management", "Vehicle Other Insurance/Tax/Parking"]
-        },
-        "Insurance": {
-            "Insurance": ["Building & Content Insurance", "Insurance Others"]
-        },
-        "Politics & Civic Affairs": {
-            "Politics & Civic Affairs": ["Charities", "Membership fees or Tobacco chambers or unions", "Politics & Civic Affairs"]
-        },
-        "Other Agency costs": {
-            "Other Agency costs": ["Other Agency costs"]
-        },
-        "Other Travel Expense": {
-            "Other Travel Expense": ["Other Travel Expense"]
-        }
-    },
-    "IDT": {
-        "IT Infrastructure": {
-            "IT Infrastructure": ["Hosting, Public Cloud, Datacentres Infrastructure"],
-            "Hardware": ["Computing/Desktop/Laptops/Handheld", "IT Equipment and accessories", "IT Hardware Maintenance", "Servers and Server Equipment"],
-            "Networks Hardware": ["Audio and Video Hardware", "IT Networks Infrastructure"],
-            "Networks Services": ["WAN & LAN Services"]
-        },
-        "IT Services": {
-            "IT Services": ["IT Services-End User Computing", "IT Services-End User Printing"],
-            "IT Consultancy": ["IT Consultancy"],
-            "Managed Professional Services": ["Managed Professional Services"]
-        },
-        "Software & Application": {
-            "Software & Application": ["Soft & App Develop Corporate Functions", "Soft & App Develop Econnected Devices", "Soft & App Develop Enterprise Platforms", "Soft & App Develop Marketing D2C", "Soft & App Develop Marketing Trade", "Soft & App Develop Operations", "Soft & App Develop Testing Q&A", "Software License", "Software Support"]
-        },
-        "Digital Services": {
-            "Digital Services": ["CRM Services (Non-DBS)", "Info/Careline/Live Chat/Call Centre", "Other Digital Services", "Search Engine Optimisation (SEO)", "Social Media Management"]
-        },
-        "Cyber Security": {
-            "Cyber Security": ["Cyber Security"]
-        },
-        "Voice, Communication & Mobile Services": {
-            "Voice, Communication & Mobile Services": ["Voice & Mobile Communication Services"]
-        }
-    },
-    "R&D": {
-        "Laboratory Supply": {
-            "Laboratory Supply": ["Laboratory Consumables", "Laboratory Equipment & Supplies"]
-        },
-        "Scientific Services": {
-            "Scientific Services": ["Analytical", "Clinical Studies", "R&D Consultancy", "Research Services"]
-        },
-        "EH&S Equipment and Services": {
-            "EH&S Equipment and Services": ["Agricultural PPEs (Farmers Protection)", "Safety Equipment & PPEs (Shoes, Gloves, etc.)"]
-        },
-        "ESG": {
-            "ESG": ["ESG Afforestation", "ESG Carbon offsets", "ESG IREC GoO/ESG Renewable energy certificates", "ESG Solar panels"]
-        },
-        "Equipment": {
-            "Equipment": ["Production Machinery"]
-        }
-    }
-}
+# One read-only taxonomy per process, shared by all sessions (keyed by content hash).
+# Sessions only keep the version string, never their own DataFrame copies.
+# Taxonomy files next to app.py are parsed once and then served from a columnar cache;
+# the hardcoded defaults are used for any table the files don't provide.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+taxonomy, taxonomy_errors = get_file_taxonomy([os.path.join(APP_DIR, name) for name in DATA_FILES])
+st.session_state.taxonomy_version = taxonomy.version
+for taxonomy_error in taxonomy_errors:
+    st.warning(f"⚠️ Could not load taxonomy file, using defaults - {taxonomy_error}")
 
 # ==========================================
 # 4. SIDEBAR: SCOPE SELECTION
 # ==========================================
 with st.sidebar:
-    # Initialize default data if not loaded
-    if st.session_state.geo_hierarchy is None:
-        st.session_state.geo_hierarchy = DEFAULT_GEO_HIERARCHY
-    if st.session_state.cat_hierarchy is None:
-        st.session_state.cat_hierarchy = DEFAULT_CAT_HIERARCHY
-    
-    # File uploader removed - using default data only
-    
-    # Get current DataFrame for geography
-    geo_df_current = st.session_state.geo_df
-    
-    # If no DataFrame, create from default hierarchy
-    if geo_df_current is None or geo_df_current.empty:
-        # Convert DEFAULT_GEO_HIERARCHY to DataFrame for consistency
-        default_geo_data = []
-        for region, clusters in DEFAULT_GEO_HIERARCHY.items():
-            for cluster, markets in clusters.items():
-                for market in markets:
-                    default_geo_data.append({
-                        'Region': region,
-                        'DRBU': cluster,
-                        'End Market': market,
-                        'Company Code': ''  # Empty value by default
-                    })
-        geo_df_current = pd.DataFrame(default_geo_data)
-        st.session_state.geo_df = geo_df_current
-    
-    # Determine cluster column name (can be DRBU or Cluster)
-    # Support both variants for compatibility
-    cluster_col = None
-    if 'DRBU' in geo_df_current.columns:
-        cluster_col = 'DRBU'
-    elif 'Cluster' in geo_df_current.columns:
-        cluster_col = 'Cluster'
-    else:
-        # If neither column exists, try to find similar
-        possible_cols = [col for col in geo_df_current.columns if 'cluster' in col.lower() or 'drbu' in col.lower()]
-        if possible_cols:
-            cluster_col = possible_cols[0]
-        else:
-            st.error("❌ Missing 'DRBU' or 'Cluster' column in data")
-            cluster_col = 'DRBU'  # Fallback to avoid errors
+    # Shared geography table and its parent→children index
+    geo_df_current = taxonomy.geo_df
+    cluster_col = taxonomy.cluster_col
+    geo_index = taxonomy.geo_index
+    if cluster_col not in geo_df_current.columns:
+        st.error("❌ Missing 'DRBU' or 'Cluster' column in data")
     
     st.divider()
     st.header("1. Scope Definition")
@@ -310,277 +368,247 @@ with st.sidebar:
     # --- Geography Dropdowns (Cascading) ---
     st.subheader("🌍 Geography")
     
-    if geo_df_current is not None and not geo_df_current.empty:
-        # 1. Select Region
-        regions = sorted(geo_df_current['Region'].unique())
-        if not regions:
-            st.warning("No region data available")
-            region = "N/A"
-            cluster = "N/A"
-            selected_markets = []
-            business_user_markets = []
-            company_code = "N/A"
-        else:
-            region = st.selectbox("Region", regions, key="geo_region")
-            
-            # 2. Filter Cluster data based on selected Region
-            filtered_clusters_df = geo_df_current[geo_df_current['Region'] == region]
-            filtered_clusters = sorted(filtered_clusters_df[cluster_col].unique())
-            
-            if not filtered_clusters:
-                st.warning(f"No clusters available for region {region}")
+    with perf_section("geography cascade"):
+        if geo_df_current is not None and not geo_df_current.empty:
+            path_search(taxonomy.market_search, "End Markets", "geo_search_query", add_market_path,
+                        "Type a market, cluster or region")
+            # 1. Select Region
+            regions = list(geo_index.options())
+            if not regions:
+                st.warning("No region data available")
+                region = "N/A"
                 cluster = "N/A"
                 selected_markets = []
                 business_user_markets = []
                 company_code = "N/A"
             else:
-                cluster = st.selectbox("Cluster / DRBU", filtered_clusters, key="geo_cluster")
-                
-                # 3. Filter Market data based on selected Cluster
-                filtered_markets_df = filtered_clusters_df[filtered_clusters_df[cluster_col] == cluster]
-                # Remove dropna() to avoid losing data, filter only empty strings
-                filtered_markets_df = filtered_markets_df[filtered_markets_df['End Market'].notna()]
-                filtered_markets_df = filtered_markets_df[filtered_markets_df['End Market'].astype(str).str.strip() != '']
-                filtered_markets = sorted(filtered_markets_df['End Market'].unique().tolist())
-                
-                if not filtered_markets:
-                    st.warning(f"No markets available for cluster {cluster}")
+                region = st.selectbox("Region", regions, key="geo_region")
+            
+                # 2. Filter Cluster data based on selected Region
+                filtered_clusters = list(geo_index.options([region]))
+            
+                if not filtered_clusters:
+                    st.warning(f"No clusters available for region {region}")
+                    cluster = "N/A"
                     selected_markets = []
                     business_user_markets = []
                     company_code = "N/A"
                 else:
-                    # Multiple selection for End Markets with "Select All" button
-                    col_market1, col_market2 = st.columns([3, 1])
-                    with col_market1:
-                        selected_markets = st.multiselect(
-                            "End Market (select one or multiple)", 
-                            filtered_markets, 
-                            key="geo_market_multiselect",
-                            help="Select one or multiple End Markets"
-                        )
-                    with col_market2:
-                        if st.button("Select All", key="select_all_markets", use_container_width=True):
-                            selected_markets = filtered_markets
-                            st.session_state.geo_market_multiselect = filtered_markets
-                            st.rerun()
-                        if st.button("Clear All", key="clear_all_markets", use_container_width=True):
-                            selected_markets = []
-                            st.session_state.geo_market_multiselect = []
-                            st.rerun()
+                    cluster = st.selectbox("Cluster / DRBU", filtered_clusters, key="geo_cluster")
+                
+                    # 3. Filter Market data based on selected Cluster
+                    # Blank / NaN markets are never offered (handled by the index)
+                    filtered_markets = list(geo_index.options([region, cluster]))
+                
+                    if not filtered_markets:
+                        st.warning(f"No markets available for cluster {cluster}")
+                        selected_markets = []
+                        business_user_markets = []
+                        company_code = "N/A"
+                    else:
+                        # Multiple selection for End Markets with "Select All" button
+                        col_market1, col_market2 = st.columns([3, 1])
+                        with col_market1:
+                            selected_markets = st.multiselect(
+                                "End Market (select one or multiple)", 
+                                filtered_markets, 
+                                key="geo_market_multiselect",
+                                help="Select one or multiple End Markets"
+                            )
+                        with col_market2:
+                            st.button("Select All", key="select_all_markets", width="stretch",
+                                      on_click=set_selection, args=("geo_market_multiselect", filtered_markets))
+                            st.button("Clear All", key="clear_all_markets", width="stretch",
+                                      on_click=set_selection, args=("geo_market_multiselect", []))
                     
-                    # Display selected markets
-                    if selected_markets:
-                        st.caption(f"Selected markets: {len(selected_markets)}")
-                        # Show compact list of selected
-                        if len(selected_markets) <= 5:
-                            st.caption(f"Selected: {', '.join(selected_markets)}")
-                        else:
-                            st.caption(f"Selected: {', '.join(selected_markets[:5])} and {len(selected_markets) - 5} more")
+                        # Display selected markets
+                        if selected_markets:
+                            st.caption(f"Selected markets: {len(selected_markets)}")
+                            # Show compact list of selected
+                            if len(selected_markets) <= 5:
+                                st.caption(f"Selected: {', '.join(selected_markets)}")
+                            else:
+                                st.caption(f"Selected: {', '.join(selected_markets[:5])} and {len(selected_markets) - 5} more")
                     
-                    # 4. Business User End Market (multiple selection)
-                    st.markdown("---")
-                    st.subheader("👤 Business User End Market")
-                    col_bu1, col_bu2 = st.columns([3, 1])
-                    with col_bu1:
-                        business_user_markets = st.multiselect(
-                            "Business User End Market (select one or multiple)",
-                            filtered_markets,
-                            key="business_user_markets",
-                            help="Select End Markets for business users"
-                        )
-                    with col_bu2:
-                        if st.button("Select All", key="select_all_bu_markets", use_container_width=True):
-                            business_user_markets = filtered_markets
-                            st.session_state.business_user_markets = filtered_markets
-                            st.rerun()
-                        if st.button("Clear All", key="clear_all_bu_markets", use_container_width=True):
-                            business_user_markets = []
-                            st.session_state.business_user_markets = []
-                            st.rerun()
+                        # 4. Business User End Market (multiple selection)
+                        st.markdown("---")
+                        st.subheader("👤 Business User End Market")
+                        col_bu1, col_bu2 = st.columns([3, 1])
+                        with col_bu1:
+                            business_user_markets = st.multiselect(
+                                "Business User End Market (select one or multiple)",
+                                filtered_markets,
+                                key="business_user_markets",
+                                help="Select End Markets for business users"
+                            )
+                        with col_bu2:
+                            st.button("Select All", key="select_all_bu_markets", width="stretch",
+                                      on_click=set_selection, args=("business_user_markets", filtered_markets))
+                            st.button("Clear All", key="clear_all_bu_markets", width="stretch",
+                                      on_click=set_selection, args=("business_user_markets", []))
                     
-                    if business_user_markets:
-                        st.caption(f"Selected business user markets: {len(business_user_markets)}")
-                        if len(business_user_markets) <= 5:
-                            st.caption(f"Selected: {', '.join(business_user_markets)}")
-                        else:
-                            st.caption(f"Selected: {', '.join(business_user_markets[:5])} and {len(business_user_markets) - 5} more")
+                        if business_user_markets:
+                            st.caption(f"Selected business user markets: {len(business_user_markets)}")
+                            if len(business_user_markets) <= 5:
+                                st.caption(f"Selected: {', '.join(business_user_markets)}")
+                            else:
+                                st.caption(f"Selected: {', '.join(business_user_markets[:5])} and {len(business_user_markets) - 5} more")
                     
-                    # 5. Company Code (if available)
-                    if 'Company Code' in geo_df_current.columns:
-                        # Filter Company Codes for all selected End Markets
-                        if selected_markets:
-                            filtered_company_codes_df = filtered_markets_df[filtered_markets_df['End Market'].isin(selected_markets)]
-                            filtered_company_codes_df = filtered_company_codes_df[filtered_company_codes_df['Company Code'].notna()]
-                            filtered_company_codes_df = filtered_company_codes_df[filtered_company_codes_df['Company Code'].astype(str).str.strip() != '']
-                            company_codes = sorted(filtered_company_codes_df['Company Code'].unique().tolist())
+                        # 5. Company Code (if available)
+                        if 'Company Code' in geo_df_current.columns:
+                            # Filter Company Codes for all selected End Markets
+                            if selected_markets:
+                                company_codes = list(geo_index.options([region, cluster, selected_markets]))
                             
-                            if company_codes:
-                                company_code = st.selectbox("Company Code", company_codes, key="geo_company_code")
+                                if company_codes:
+                                    company_code = st.selectbox("Company Code", company_codes, key="geo_company_code")
+                                else:
+                                    company_code = st.text_input("Company Code (enter manually)", key="geo_company_code_manual", placeholder="e.g., UK001")
                             else:
-                                company_code = st.text_input("Company Code (enter manually)", key="geo_company_code_manual", placeholder="e.g., UK001")
+                                company_code = st.text_input("Company Code (enter manually)", key="geo_company_code_manual", placeholder="Please select End Market first")
                         else:
-                            company_code = st.text_input("Company Code (enter manually)", key="geo_company_code_manual", placeholder="Please select End Market first")
-                    else:
-                        company_code = st.text_input("Company Code", key="geo_company_code_manual", placeholder="e.g., UK001")
-    else:
-        st.warning("No geography data available")
-        region = "N/A"
-        cluster = "N/A"
-        selected_markets = []
-        business_user_markets = []
-        company_code = "N/A"
+                            company_code = st.text_input("Company Code", key="geo_company_code_manual", placeholder="e.g., UK001")
+        else:
+            st.warning("No geography data available")
+            region = "N/A"
+            cluster = "N/A"
+            selected_markets = []
+            business_user_markets = []
+            company_code = "N/A"
     
     st.divider()
     
     # --- Category Dropdowns (Cascading) ---
     st.subheader("🗂 Category")
     
-    # Get current DataFrame for categories
-    cat_df_current = st.session_state.cat_df
-    
-    # If no DataFrame, create from default hierarchy
-    if cat_df_current is None or cat_df_current.empty:
-        # Convert DEFAULT_CAT_HIERARCHY to DataFrame for consistency
-        default_cat_data = []
-        for l1, l2_dict in DEFAULT_CAT_HIERARCHY.items():
-            for l2, l3_dict in l2_dict.items():
-                for l3, l4_list in l3_dict.items():
-                    for l4 in l4_list:
-                        default_cat_data.append({
-                            'L1': l1,
-                            'L2': l2,
-                            'L3': l3,
-                            'L4': l4
-                        })
-        cat_df_current = pd.DataFrame(default_cat_data)
-        st.session_state.cat_df = cat_df_current
+    # Shared category table and its parent→children index
+    cat_df_current = taxonomy.cat_df
+    cat_index = taxonomy.cat_index
     
-    if cat_df_current is not None and not cat_df_current.empty:
-        # 1. Select L1 Category (multiple selection)
-        l1_options = sorted(cat_df_current['L1'].unique())
-        if not l1_options:
-            st.warning("No L1 category data available")
-            selected_l1 = []
-            selected_l2 = []
-            selected_l3 = []
-            selected_l4 = []
-            full_cat_path = "N/A > N/A > N/A > N/A"
-        else:
-            col_l1_1, col_l1_2 = st.columns([3, 1])
-            with col_l1_1:
-                selected_l1 = st.multiselect("L1 Category (select one or multiple)", l1_options, key="cat_l1_multiselect")
-            with col_l1_2:
-                if st.button("Select All", key="select_all_l1", use_container_width=True):
-                    selected_l1 = l1_options
-                    st.session_state.cat_l1_multiselect = l1_options
-                    st.rerun()
-                if st.button("Clear All", key="clear_all_l1", use_container_width=True):
-                    selected_l1 = []
-                    st.session_state.cat_l1_multiselect = []
-                    st.rerun()
+    with perf_section("category cascade"):
+        if cat_df_current is not None and not cat_df_current.empty:
+            path_search(taxonomy.cat_search, "categories", "cat_search_query", add_category_path,
+                        "Type part of any L1-L4 name, e.g. print")
+            # 1. Select L1 Category (multiple selection)
+            l1_options = list(cat_index.options())
+            if not l1_options:
+                st.warning("No L1 category data available")
+                selected_l1 = []
+                selected_l2 = []
+                selected_l3 = []
+                selected_l4 = []
+                full_cat_path = "N/A > N/A > N/A > N/A"
+            else:
+                col_l1_1, col_l1_2 = st.columns([3, 1])
+                with col_l1_1:
+                    selected_l1 = st.multiselect("L1 Category (select one or multiple)", l1_options, key="cat_l1_multiselect")
+                with col_l1_2:
+                    st.button("Select All", key="select_all_l1", width="stretch",
+                              on_click=set_selection, args=("cat_l1_multiselect", l1_options))
+                    st.button("Clear All", key="clear_all_l1", width="stretch",
+                              on_click=set_selection, args=("cat_l1_multiselect", []))
             
-            # 2. Filter L2 data based on selected L1(s)
-            if selected_l1:
-                filtered_l2_df = cat_df_current[cat_df_current['L1'].isin(selected_l1)]
-                filtered_l2 = sorted(filtered_l2_df['L2'].unique())
+                # 2. Filter L2 data based on selected L1(s)
+                if selected_l1:
+                    filtered_l2 = list(cat_index.options([selected_l1]))
                 
-                if not filtered_l2:
-                    st.warning(f"No L2 categories available for selected L1")
-                    selected_l2 = []
-                    selected_l3 = []
-                    selected_l4 = []
-                    full_cat_path = " > ".join(selected_l1) + " > N/A > N/A > N/A"
-                else:
-                    col_l2_1, col_l2_2 = st.columns([3, 1])
-                    with col_l2_1:
-                        selected_l2 = st.multiselect("L2 Category (select one or multiple)", filtered_l2, key="cat_l2_multiselect")
-                    with col_l2_2:
-                        if st.button("Select All", key="select_all_l2", use_container_width=True):
-                            selected_l2 = filtered_l2
-                            st.session_state.cat_l2_multiselect = filtered_l2
-                            st.rerun()
-                        if st.button("Clear All", key="clear_all_l2", use_container_width=True):
-                            selected_l2 = []
-                            st.session_state.cat_l2_multiselect = []
-                            st.rerun()
+                    if not filtered_l2:
+                        st.warning(f"No L2 categories available for selected L1")
+                        selected_l2 = []
+                        selected_l3 = []
+                        selected_l4 = []
+                        full_cat_path = " > ".join(selected_l1) + " > N/A > N/A > N/A"
+                    else:
+                        col_l2_1, col_l2_2 = st.columns([3, 1])
+                        with col_l2_1:
+                            selected_l2 = st.multiselect("L2 Category (select one or multiple)", filtered_l2, key="cat_l2_multiselect")
+                        with col_l2_2:
+                            st.button("Select All", key="select_all_l2", width="stretch",
+                                      on_click=set_selection, args=("cat_l2_multiselect", filtered_l2))
+                            st.button("Clear All", key="clear_all_l2", width="stretch",
+                                      on_click=set_selection, args=("cat_l2_multiselect", []))
                     
-                    # 3. Filter L3 data based on selected L2(s)
-                    if selected_l2:
-                        filtered_l3_df = filtered_l2_df[filtered_l2_df['L2'].isin(selected_l2)]
-                        filtered_l3 = sorted(filtered_l3_df['L3'].unique())
+                        # 3. Filter L3 data based on selected L2(s)
+                        if selected_l2:
+                            filtered_l3 = list(cat_index.options([selected_l1, selected_l2]))
                         
-                        if not filtered_l3:
-                            st.warning(f"No L3 categories available for selected L2")
-                            selected_l3 = []
-                            selected_l4 = []
-                            full_cat_path = " > ".join(selected_l1) + " > " + " > ".join(selected_l2) + " > N/A > N/A"
-                        else:
-                            col_l3_1, col_l3_2 = st.columns([3, 1])
-                            with col_l3_1:
-                                selected_l3 = st.multiselect("L3 Category (select one or multiple)", filtered_l3, key="cat_l3_multiselect")
-                            with col_l3_2:
-                                if st.button("Select All", key="select_all_l3", use_container_width=True):
-                                    selected_l3 = filtered_l3
-                                    st.session_state.cat_l3_multiselect = filtered_l3
-                                    st.rerun()
-                                if st.button("Clear All", key="clear_all_l3", use_container_width=True):
-                                    selected_l3 = []
-                                    st.session_state.cat_l3_multiselect = []
-                                    st.rerun()
+                            if not filtered_l3:
+                                st.warning(f"No L3 categories available for selected L2")
+                                selected_l3 = []
+                                selected_l4 = []
+                                full_cat_path = " > ".join(selected_l1) + " > " + " > ".join(selected_l2) + " > N/A > N/A"
+                            else:
+                                col_l3_1, col_l3_2 = st.columns([3, 1])
+                                with col_l3_1:
+                                    selected_l3 = st.multiselect("L3 Category (select one or multiple)", filtered_l3, key="cat_l3_multiselect")
+                                with col_l3_2:
+                                    st.button("Select All", key="select_all_l3", width="stretch",
+                                              on_click=set_selection, args=("cat_l3_multiselect", filtered_l3))
+                                    st.button("Clear All", key="clear_all_l3", width="stretch",
+                                              on_click=set_selection, args=("cat_l3_multiselect", []))
                             
-                            # 4. Filter L4 data based on selected L3(s)
-                            if selected_l3:
-                                filtered_l4_df = filtered_l3_df[filtered_l3_df['L3'].isin(selected_l3)]
-                                filtered_l4 = sorted(filtered_l4_df['L4'].unique())
+                                # 4. Filter L4 data based on selected L3(s)
+                                if selected_l3:
+                                    filtered_l4 = list(cat_index.options([selected_l1, selected_l2, selected_l3]))
                                 
-                                if not filtered_l4:
-                                    st.warning(f"No L4 categories available for selected L3")
-                                    selected_l4 = []
-                                    full_cat_path = " > ".join(selected_l1) + " > " + " > ".join(selected_l2) + " > " + " > ".join(selected_l3) + " > N/A"
-                                else:
-                                    col_l4_1, col_l4_2 = st.columns([3, 1])
-                                    with col_l4_1:
-                                        selected_l4 = st.multiselect("L4 Category (select one or multiple)", filtered_l4, key="cat_l4_multiselect")
-                                    with col_l4_2:
-                                        if st.button("Select All", key="select_all_l4", use_container_width=True):
-                                            selected_l4 = filtered_l4
-                                            st.session_state.cat_l4_multiselect = filtered_l4
-                                            st.rerun()
-                                        if st.button("Clear All", key="clear_all_l4", use_container_width=True):
-                                            selected_l4 = []
-                                            st.session_state.cat_l4_multiselect = []
-                                            st.rerun()
+                                    if not filtered_l4:
+                                        st.warning(f"No L4 categories available for selected L3")
+                                        selected_l4 = []
+                                        full_cat_path = " > ".join(selected_l1) + " > " + " > ".join(selected_l2) + " > " + " > ".join(selected_l3) + " > N/A"
+                                    else:
+                                        col_l4_1, col_l4_2 = st.columns([3, 1])
+                                        with col_l4_1:
+                                            selected_l4 = st.multiselect("L4 Category (select one or multiple)", filtered_l4, key="cat_l4_multiselect")
+                                        with col_l4_2:
+                                            st.button("Select All", key="select_all_l4", width="stretch",
+                                                      on_click=set_selection, args=("cat_l4_multiselect", filtered_l4))
+                                            st.button("Clear All", key="clear_all_l4", width="stretch",
+                                                      on_click=set_selection, args=("cat_l4_multiselect", []))
                                     
-                                    # Build full category path
+                                        # Build full category path
+                                        l1_str = ", ".join(selected_l1) if selected_l1 else "N/A"
+                                        l2_str = ", ".join(selected_l2) if selected_l2 else "N/A"
+                                        l3_str = ", ".join(selected_l3) if selected_l3 else "N/A"
+                                        l4_str = ", ".join(selected_l4) if selected_l4 else "N/A"
+                                        full_cat_path = f"{l1_str} > {l2_str} > {l3_str} > {l4_str}"
+                                else:
+                                    selected_l4 = []
                                     l1_str = ", ".join(selected_l1) if selected_l1 else "N/A"
                                     l2_str = ", ".join(selected_l2) if selected_l2 else "N/A"
                                     l3_str = ", ".join(selected_l3) if selected_l3 else "N/A"
-                                    l4_str = ", ".join(selected_l4) if selected_l4 else "N/A"
-                                    full_cat_path = f"{l1_str} > {l2_str} > {l3_str} > {l4_str}"
-                            else:
-                                selected_l4 = []
-                                l1_str = ", ".join(selected_l1) if selected_l1 else "N/A"
-                                l2_str = ", ".join(selected_l2) if selected_l2 else "N/A"
-                                l3_str = ", ".join(selected_l3) if selected_l3 else "N/A"
-                                full_cat_path = f"{l1_str} > {l2_str} > {l3_str} > N/A"
-                    else:
-                        selected_l3 = []
-                        selected_l4 = []
-                        l1_str = ", ".join(selected_l1) if selected_l1 else "N/A"
-                        l2_str = ", ".join(selected_l2) if selected_l2 else "N/A"
-                        full_cat_path = f"{l1_str} > {l2_str} > N/A > N/A"
-            else:
-                selected_l2 = []
-                selected_l3 = []
-                selected_l4 = []
-                full_cat_path = "N/A > N/A > N/A > N/A"
-    else:
-        st.warning("No category data available")
-        l1 = "N/A"
-        l2 = "N/A"
-        l3 = "N/A"
-        l4 = "N/A"
-        full_cat_path = "N/A > N/A > N/A > N/A"
+                                    full_cat_path = f"{l1_str} > {l2_str} > {l3_str} > N/A"
+                        else:
+                            selected_l3 = []
+                            selected_l4 = []
+                            l1_str = ", ".join(selected_l1) if selected_l1 else "N/A"
+                            l2_str = ", ".join(selected_l2) if selected_l2 else "N/A"
+                            full_cat_path = f"{l1_str} > {l2_str} > N/A > N/A"
+                else:
+                    selected_l2 = []
+                    selected_l3 = []
+                    selected_l4 = []
+                    full_cat_path = "N/A > N/A > N/A > N/A"
+        else:
+            st.warning("No category data available")
+            l1 = "N/A"
+            l2 = "N/A"
+            l3 = "N/A"
+            l4 = "N/A"
+            full_cat_path = "N/A > N/A > N/A > N/A"
+    
+    st.divider()
+    with st.expander("🧠 Shared Taxonomy Cache"):
+        taxonomy_report = taxonomy.memory_report()
+        st.caption(f"Version: `{taxonomy_report['version'][:12]}` | {taxonomy_report['geo_rows']} geography rows | {taxonomy_report['cat_rows']} category rows")
+        st.caption(f"Sources: geography from {taxonomy_report['sources']['geo']}, categories from {taxonomy_report['sources']['cat']}")
+        st.caption(f"Memory saved per session: {taxonomy_report['per_session_saved'] / 1024:.1f} KiB (held once per server process)")
+        st.caption(f"Categorical levels: {taxonomy_report['shared_bytes'] / 1024:.1f} KiB held vs. "
+                   f"{taxonomy_report['text_bytes'] / 1024:.1f} KiB as plain text")
+
+    # --- Blueprint Store: find saved logic by scope and load it into the form ---
+    st.divider()
+    st.subheader("📚 Blueprint Store")
+    blueprint_store_browser()
 
 # ==========================================
 # 4. MAIN SCREEN
@@ -596,8 +624,6 @@ if 'selected_markets' in locals() and selected_markets:
         context_parts.append(f"{', '.join(selected_markets)} ({region})")
     else:
         context_parts.append(f"{len(selected_markets)} markets ({region})")
-elif 'market' in locals() and market and market != "N/A":
-    context_parts.append(f"{market} ({region})")
 else:
     context_parts.append(f"({region})")
 
@@ -619,164 +645,167 @@ st.markdown(f"**Context:** {' | '.join(context_parts)} | **Category:** {cat_disp
 st.divider()
 
 # ==========================================
-# SUPPLIER TYPE SELECTION
+# BLUEPRINT PARTS: the diagram, JSON and Excel output all derive from them
 # ==========================================
-st.subheader("🏢 Supplier Type Selection")
-supplier_type_filter = st.radio(
-    "Filter by Supplier Type",
-    options=["All", "Local", "Global"],
-    horizontal=True,
-    key="supplier_type_filter",
-    help="Select whether to show Local, Global, or All suppliers in the pool"
-)
+# Scope and category come from the sidebar; each section below publishes its own part.
+# Handle multiple category selections
+selected_l1_list = selected_l1 if 'selected_l1' in locals() and isinstance(selected_l1, list) else ([] if 'selected_l1' not in locals() else [selected_l1])
+selected_l2_list = selected_l2 if 'selected_l2' in locals() and isinstance(selected_l2, list) else ([] if 'selected_l2' not in locals() else [selected_l2])
+selected_l3_list = selected_l3 if 'selected_l3' in locals() and isinstance(selected_l3, list) else ([] if 'selected_l3' not in locals() else [selected_l3])
+selected_l4_list = selected_l4 if 'selected_l4' in locals() and isinstance(selected_l4, list) else ([] if 'selected_l4' not in locals() else [selected_l4])
 
-st.divider()
+publish_part("scope", {
+    "region": region if 'region' in locals() else "N/A",
+    "cluster": cluster if 'cluster' in locals() else "N/A",
+    "end_markets": selected_markets if 'selected_markets' in locals() else [],
+    "business_user_markets": business_user_markets if 'business_user_markets' in locals() else [],
+    "company_code": company_code if 'company_code' in locals() else "N/A"
+})
+publish_part("category", {
+    "full_path": full_cat_path if 'full_cat_path' in locals() else "N/A",
+    "l1": selected_l1_list,
+    "l2": selected_l2_list,
+    "l3": selected_l3_list,
+    "l4": selected_l4_list
+})
+
+# The sections below are fragments: a widget change inside one reruns only that section
+# (see publish_part for when the diagram and output follow)
 
 # ==========================================
-# SUPPLIER POOL TABLE (Above Streams)
+# SUPPLIER TYPE SELECTION + SUPPLIER POOL TABLE (Above Streams)
 # ==========================================
-st.subheader("👥 Supplier Pool")
-
-# Toggle to enable/disable supplier pool
-enable_supplier_pool = st.toggle(
-    "Enable Supplier Pool", 
-    value=True, 
-    key="enable_supplier_pool",
-    help="When enabled, you can define a pool of suppliers. When disabled, you can switch to sourcing logic directly."
-)
+@st.fragment
+@profiled("supplier pool editor")
+def supplier_pool_section():
+    st.subheader("🏢 Supplier Type Selection")
+    supplier_type_filter = st.radio(
+        "Filter by Supplier Type",
+        options=SUPPLIER_TYPE_FILTERS,
+        horizontal=True,
+        key="supplier_type_filter",
+        help="Select whether to show Local, Global, or All suppliers in the pool"
+    )
 
-if enable_supplier_pool:
-    st.info("Define suppliers with their logic type, supplier type, and buying channels. Each buying channel should be a separate row.")
-    
-    # Initialize suppliers_df in session state if not exists - start with completely empty row
-    if 'suppliers_df' not in st.session_state or st.session_state.suppliers_df.empty:
-        st.session_state.suppliers_df = pd.DataFrame([
-            {
-                "Supplier Name": "", 
-                "Vendor Code": "", 
-                "Supplier Type": "",
-                "Logic Type": "",
-                "Buying Channel": "",
-                "Tender Required": "",
-                "Comments": ""
-            }
-        ])
-    
-    # Ensure all columns exist and are of correct type
-    required_columns = ["Supplier Name", "Vendor Code", "Supplier Type", "Logic Type", "Buying Channel", "Tender Required", "Comments"]
-    for col in required_columns:
-        if col not in st.session_state.suppliers_df.columns:
-            st.session_state.suppliers_df[col] = ""
-    
-    # Convert to string type to ensure editability
-    for col in ["Supplier Name", "Vendor Code", "Comments"]:
-        if col in st.session_state.suppliers_df.columns:
-            st.session_state.suppliers_df[col] = st.session_state.suppliers_df[col].astype(str)
-    
-    # Data Editor for Multiple Suppliers with enhanced fields
-    column_config = {
-        "Supplier Name": st.column_config.TextColumn(
-            "Supplier Name", 
-            required=False,
-            default=""
-        ),
-        "Vendor Code": st.column_config.TextColumn(
-            "Vendor Code (Optional)",
-            default=""
-        ),
-        "Supplier Type": st.column_config.SelectboxColumn(
-            "Supplier Type",
-            options=["", "Local", "Global"],
-            required=False,
-            default=""
-        ),
-        "Logic Type": st.column_config.SelectboxColumn(
-            "Logic Type",
-            options=["", "Buying Channel", "Sourcing"],
-            required=False,
-            default="",
-            help="Buying Channel: Direct purchase. Sourcing: Requires sourcing process."
-        ),
-        "Buying Channel": st.column_config.SelectboxColumn(
-            "Buying Channel",
-            options=["", "Hosted Catalog", "Punch-out", "Web Form", "Free Text", "P-Card"],
-            required=False,
-            default=""
-        ),
-        "Tender Required": st.column_config.SelectboxColumn(
-            "Tender Required",
-            options=["", "No", "Yes - Every Time", "Yes - Above Threshold"],
-            required=False,
-            default="",
-            help="Whether this supplier requires a tender process"
-        ),
-        "Comments": st.column_config.TextColumn(
-            "Comments / Logic Explanation",
-            default=""
-        ),
-    }
-    
-    # Use the full dataframe for editing (don't filter before editing)
-    suppliers_df = st.data_editor(
-        st.session_state.suppliers_df,
-        column_config=column_config,
-        num_rows="dynamic", # Allow adding rows
-        use_container_width=True,
-        hide_index=True,
-        key="suppliers_editor",
-        disabled=False  # Ensure all cells are editable
+    st.divider()
+
+    st.subheader("👥 Supplier Pool")
+
+    # Toggle to enable/disable supplier pool
+    enable_supplier_pool = st.toggle(
+        "Enable Supplier Pool", 
+        value=True, 
+        key="enable_supplier_pool",
+        help="When enabled, you can define a pool of suppliers. When disabled, you can switch to sourcing logic directly."
     )
-    
-    # Update session state with edited data
-    st.session_state.suppliers_df = suppliers_df.copy()
-    
-    # Filter by supplier type for display/visualization only (after saving)
-    suppliers_df_filtered = suppliers_df.copy()
-    if supplier_type_filter != "All":
-        suppliers_df_filtered = suppliers_df_filtered[suppliers_df_filtered["Supplier Type"] == supplier_type_filter]
-else:
-    # Supplier pool disabled - create empty suppliers_df
-    suppliers_df = pd.DataFrame(columns=["Supplier Name", "Vendor Code", "Supplier Type", "Logic Type", "Buying Channel", "Tender Required", "Comments"])
-
-# Update supplier nodes for visualization (use filtered data if filter is applied)
-supp_nodes_list = []
-supp_node_ids = []
-buying_channel_nodes = []
-sourcing_nodes = []
-local_suppliers = []
-global_suppliers = []
-
-# Use filtered suppliers for visualization based on supplier_type_filter
-suppliers_for_viz = suppliers_df_filtered if 'suppliers_df_filtered' in locals() else suppliers_df
-
-if suppliers_for_viz is not None and not suppliers_for_viz.empty:
-    for idx, row in suppliers_for_viz.iterrows():
-        supplier_name = str(row.get("Supplier Name", "")).strip()
-        if supplier_name:
-            node_id = f"Supp{idx}"
-            supp_node_ids.append(node_id)
-            # Sanitize text for Mermaid
-            channel_clean = str(row.get("Buying Channel", "")).replace(":", "-").replace("<", "").replace(">", "").replace('"', "'")
-            name_clean = supplier_name.replace(":", "-").replace("<", "").replace(">", "").replace('"', "'")
-            supp_type = str(row.get("Supplier Type", "")).strip() or "Local"
-            logic_type = str(row.get("Logic Type", "")).strip() or "Buying Channel"
-            tender = str(row.get("Tender Required", "")).strip() or "No"
-            supp_nodes_list.append(f'    {node_id}["{supp_type} {name_clean}\\n{channel_clean}\\n{logic_type}\\nTender: {tender}"]')
-            
-            # Categorize by supplier type and logic type
-            if supp_type == "Local":
-                local_suppliers.append(node_id)
-            elif supp_type == "Global":
-                global_suppliers.append(node_id)
-            
-            if logic_type == "Buying Channel":
-                buying_channel_nodes.append(node_id)
-            elif logic_type == "Sourcing":
-                sourcing_nodes.append(node_id)
+    # Edits were applied to the store by the editor's callback, so the part is current before the editor is drawn
+    store = supplier_store()
+    publish_part("supplier_pool", {
+        "enabled": enable_supplier_pool,
+        "suppliers": store.records() if enable_supplier_pool else [],
+        "supplier_type_filter": supplier_type_filter,
+    })
+
+    if enable_supplier_pool:
+        st.info("Define suppliers with their logic type, supplier type, and buying channels. Each buying channel should be a separate row.")
+
+        with st.expander("📤 Import suppliers from CSV / Excel"):
+            st.caption(
+                "Columns: " + ", ".join(SUPPLIER_COLUMNS) + ". Rows with invalid options, no Supplier Name, "
+                "or a Vendor Code / Buying Channel already listed are skipped and reported below."
+            )
+            st.file_uploader("Supplier file", type=["csv", "xlsx"], key="supplier_upload")
+            st.radio("Mode", ["Append to pool", "Replace pool"], horizontal=True, key="supplier_import_mode")
+            st.button("Import suppliers", key="supplier_import", on_click=import_suppliers_into_session,
+                      disabled=st.session_state.get("supplier_upload") is None)
+            import_result = st.session_state.get("supplier_import_report")
+            if import_result:
+                file_name, n_rows, import_report = import_result
+                n_errors = int((import_report["severity"] == "error").sum())
+                message = (f"{file_name}: {n_rows:,} row(s) read, {n_errors:,} error(s), "
+                           f"{len(import_report) - n_errors:,} warning(s)")
+                (st.warning if n_errors else st.success)(message)
+                if not import_report.empty:
+                    st.dataframe(import_report, hide_index=True, width="stretch")
 
-if not supp_nodes_list:
-    supp_nodes_list = ['    NoSupp["No Defined Suppliers"]']
-    supp_node_ids = ["NoSupp"]
+        # Data Editor for Multiple Suppliers with enhanced fields
+        column_config = {
+            "Supplier Name": st.column_config.TextColumn(
+                "Supplier Name", 
+                required=False,
+                default=""
+            ),
+            "Vendor Code": st.column_config.TextColumn(
+                "Vendor Code (Optional)",
+                default=""
+            ),
+            "Supplier Type": st.column_config.SelectboxColumn(
+                "Supplier Type",
+                options=SUPPLIER_TYPES,
+                required=False,
+                default=""
+            ),
+            "Logic Type": st.column_config.SelectboxColumn(
+                "Logic Type",
+                options=LOGIC_TYPES,
+                required=False,
+                default="",
+                help="Buying Channel: Direct purchase. Sourcing: Requires sourcing process."
+            ),
+            "Buying Channel": st.column_config.SelectboxColumn(
+                "Buying Channel",
+                options=BUYING_CHANNELS,
+                required=False,
+                default=""
+            ),
+            "Tender Required": st.column_config.SelectboxColumn(
+                "Tender Required",
+                options=TENDER_OPTIONS,
+                required=False,
+                default="",
+                help="Whether this supplier requires a tender process"
+            ),
+            "Comments": st.column_config.TextColumn(
+                "Comments / Logic Explanation",
+                default=""
+            ),
+        }
+
+        # The editor shows one page of the store; its edits are applied to the store as deltas
+        # (no full-table copies per rerun). A new page or table gets a fresh editor key.
+        if store.page_count > 1:
+            st.session_state.suppliers_page = store.page + 1
+            st.number_input(
+                f"Page (of {store.page_count:,}; {len(store):,} rows, {store.page_size} per page)",
+                min_value=1, max_value=store.page_count, step=1,
+                key="suppliers_page", on_change=change_supplier_page
+            )
+        editor_key = f"suppliers_editor_{store.generation}"
+        st.data_editor(
+            store.page_frame,
+            column_config=column_config,
+            num_rows="dynamic", # Allow adding rows
+            width="stretch",
+            hide_index=True,
+            key=editor_key,
+            on_change=apply_supplier_edits,
+            args=(editor_key,),
+            disabled=False  # Ensure all cells are editable
+        )
+
+        # Option columns are held as categoricals; measuring walks every record, so it runs on demand
+        col_mem1, col_mem2 = st.columns([1, 3])
+        with col_mem1:
+            st.button("🧠 Measure memory", key="supplier_memory", on_click=measure_supplier_memory,
+                      width="stretch")
+        memory = st.session_state.get("supplier_memory_report")
+        if memory:
+            with col_mem2:
+                st.caption(f"{memory['rows']:,} rows: table {memory['bytes'] / 2**20:.2f} MiB "
+                           f"(plain text: {memory['text_bytes'] / 2**20:.2f} MiB), "
+                           f"records {memory['records_bytes'] / 2**20:.2f} MiB")
+
+supplier_pool_section()
 
 st.divider()
 
@@ -788,7 +817,9 @@ col_green, col_red = st.columns(2)
 # ---------------------------------------------------------
 # LEFT COLUMN: BUYING CHANNELS
 # ---------------------------------------------------------
-with col_green:
+@st.fragment
+@profiled("buying channels & blacklist")
+def buying_channels_section():
     st.markdown('<div class="header-style">⬅️ Buying Channels</div>', unsafe_allow_html=True)
     st.markdown('<div class="green-lane">', unsafe_allow_html=True)
     
@@ -834,7 +865,7 @@ with col_green:
             st.session_state.buying_channels_df,
             column_config=buying_channel_config,
             num_rows="dynamic",
-            use_container_width=True,
+            width="stretch",
             hide_index=True,
             key="buying_channels_editor"
         )
@@ -890,7 +921,7 @@ with col_green:
                 st.session_state.mkp_blacklist_df,
                 column_config=blacklist_config,
                 num_rows="dynamic",
-                use_container_width=True,
+                width="stretch",
                 hide_index=True,
                 key="mkp_blacklist_editor"
             )
@@ -898,18 +929,8 @@ with col_green:
             # Update session state
             st.session_state.mkp_blacklist_df = mkp_blacklist_df.copy()
             
-            # Convert to list of dictionaries, filtering out empty rows
-            mkp_blacklist = []
-            if mkp_blacklist_df is not None and not mkp_blacklist_df.empty:
-                for _, row in mkp_blacklist_df.iterrows():
-                    item_name = str(row.get("Item Name", "")).strip()
-                    if item_name:  # Only include rows with at least an item name
-                        mkp_blacklist.append({
-                            "item_name": item_name,
-                            "item_code": str(row.get("Item Code/SKU", "")).strip(),
-                            "category": str(row.get("Category", "")).strip(),
-                            "reason": str(row.get("Reason", "")).strip()
-                        })
+            # Convert to list of dictionaries, filtering out rows without an item name
+            mkp_blacklist = blacklist_records(mkp_blacklist_df)
             
             if mkp_blacklist:
                 st.info(f"📋 {len(mkp_blacklist)} item(s) in blacklist")
@@ -920,15 +941,25 @@ with col_green:
         mkp_limit = 0
         mkp_blacklist = []
     
-    # Set enable_stream1 based on buying channels toggle
-    enable_stream1 = enable_buying_channels
+    publish_part("buying_channels", {
+        "enabled": enable_buying_channels,
+        "channels": channel_records(buying_channels_df),
+        "allow_marketplace": allow_mkp,
+        "marketplace_limit": mkp_limit,
+        "marketplace_blacklist": mkp_blacklist,
+    })
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+with col_green:
+    buying_channels_section()
+
 # ---------------------------------------------------------
 # RIGHT COLUMN: SOURCING LOGIC
 # ---------------------------------------------------------
-with col_red:
+@st.fragment
+@profiled("sourcing logic")
+def sourcing_logic_section():
     st.markdown('<div class="header-style">➡️ Sourcing Logic</div>', unsafe_allow_html=True)
     st.markdown('<div class="red-lane">', unsafe_allow_html=True)
     
@@ -949,7 +980,7 @@ with col_red:
         
         if enable_tactical:
             tact_action = st.selectbox("Tactical Action", 
-                                       ["Fairmarkit (Autonomous)", "3-Bids (Local Buyer)", "Spot Buy Desk", "No-Touch PO"],
+                                       TACTICAL_ACTIONS,
                                        key="tact_action_select")
             
             tact_manager = st.text_input("Sourcing Manager Name (Optional)", 
@@ -972,7 +1003,7 @@ with col_red:
         
         if enable_strategic:
             strat_action = st.selectbox("Strategic Owner", 
-                                        ["Global Category Lead", "Sourcing Manager", "Regional Hub", "RFP Team"],
+                                        STRATEGIC_OWNERS,
                                         key="strat_action_select")
             
             strat_manager = st.text_input("Sourcing Manager Name (Optional)", 
@@ -1002,591 +1033,363 @@ with col_red:
         strat_comments = ""
         instr = ""
     
+    publish_part("stream2", {
+        "enabled": enable_stream2,
+        "tactical_threshold": threshold,
+        "tactical": {"enabled": enable_tactical, "action": tact_action, "manager": tact_manager, "comments": tact_comments},
+        "strategic": {"enabled": enable_strategic, "owner": strat_action, "manager": strat_manager, "comments": strat_comments},
+        "instructions": instr,
+    })
     st.markdown('</div>', unsafe_allow_html=True)
 
+with col_red:
+    sourcing_logic_section()
+
 # ==========================================
 # RENDER LOGIC FLOW VISUALIZATION (After Stream 1 & 2)
 # ==========================================
-st.divider()
-st.subheader("🗺️ Logic Flow Visualization")
+@st.fragment
+@profiled("logic flow")
+def flow_diagram_section():
+    st.divider()
+    st.subheader("🗺️ Logic Flow Visualization")
+    blueprint = current_blueprint()
+    _, flow_key = blueprint_keys(blueprint)
+    st.session_state.drawn_flow_key = flow_key
+    scope = blueprint["scope"]
 
-# Check if any logic is enabled - only show visualization if at least one is enabled
-enable_supplier_pool_val = enable_supplier_pool if 'enable_supplier_pool' in locals() else False
-enable_buying_channels_val = enable_buying_channels if 'enable_buying_channels' in locals() else False
-enable_stream2_val = enable_stream2 if 'enable_stream2' in locals() else False
+    # Check if any logic is enabled - only show visualization if at least one is enabled
+    enable_supplier_pool_val = blueprint["supplier_pool"].get("enabled", False)
+    enable_buying_channels_val = blueprint["buying_channels"].get("enabled", False)
+    enable_stream2_val = blueprint["stream2"].get("enabled", False)
 
-# Only show visualization if at least one component is enabled
-if not (enable_supplier_pool_val or enable_buying_channels_val or enable_stream2_val):
-    st.warning("⚠️ Please enable at least one of: Supplier Pool, Buying Channels, or Sourcing Logic to see the visualization.")
-else:
-    # Show user context
-    context_info = []
-    if 'selected_markets' in locals() and selected_markets:
-        context_info.append(f"**End Markets:** {', '.join(selected_markets[:3])}{'...' if len(selected_markets) > 3 else ''}")
-    if 'business_user_markets' in locals() and business_user_markets:
-        context_info.append(f"**Business User Markets:** {', '.join(business_user_markets[:3])}{'...' if len(business_user_markets) > 3 else ''}")
-    if 'company_code' in locals() and company_code and company_code != "N/A":
-        context_info.append(f"**Company Code:** {company_code}")
-    if 'full_cat_path' in locals() and full_cat_path and full_cat_path != "N/A > N/A > N/A > N/A":
-        context_info.append(f"**Category:** {full_cat_path}")
-    
-    # Show enabled components
-    enabled_components = []
-    if enable_supplier_pool_val:
-        enabled_components.append("Supplier Pool")
-    if enable_buying_channels_val:
-        enabled_components.append("Buying Channels")
-    if enable_stream2_val:
-        enabled_components.append("Sourcing Logic")
-    
-    if enabled_components:
-        context_info.append(f"**Enabled:** {', '.join(enabled_components)}")
-
-    if context_info:
-        st.info(" | ".join(context_info))
-
-    # Prepare Supplier Nodes for Diagram (sanitized) - only if Supplier Pool is enabled
-    supp_nodes_list = []
-    supp_node_ids = []
-    buying_channel_nodes = []
-    sourcing_nodes = []
-    local_suppliers = []
-    global_suppliers = []
-
-    if enable_supplier_pool_val and 'suppliers_df' in locals() and suppliers_df is not None and not suppliers_df.empty:
-        for idx, row in suppliers_df.iterrows():
-            supplier_name = str(row.get("Supplier Name", "")).strip()
-            if supplier_name:
-                node_id = f"Supp{idx}"
-                supp_node_ids.append(node_id)
-                # Sanitize text for Mermaid
-                channel_clean = str(row.get("Buying Channel", "")).replace(":", "-").replace("<", "").replace(">", "").replace('"', "'")
-                name_clean = supplier_name.replace(":", "-").replace("<", "").replace(">", "").replace('"', "'")
-                supp_type = str(row.get("Supplier Type", "")).strip() or "Local"
-                logic_type = str(row.get("Logic Type", "")).strip() or "Buying Channel"
-                tender = str(row.get("Tender Required", "")).strip() or "No"
-                
-                # Create node label
-                node_label = f"{name_clean}\\n{channel_clean}"
-                if tender != "No":
-                    node_label += f"\\n⚠️ Tender: {tender}"
-                
-                supp_nodes_list.append(f'    {node_id}["{node_label}"]')
-                
-                # Categorize by supplier type and logic type
-                if supp_type == "Local":
-                    local_suppliers.append(node_id)
-                else:
-                    global_suppliers.append(node_id)
-                
-                if logic_type == "Buying Channel":
-                    buying_channel_nodes.append(node_id)
-                else:
-                    sourcing_nodes.append(node_id)
-
-    if not supp_nodes_list and enable_supplier_pool_val:
-        supp_nodes_list = ['    NoSupp["No Defined Suppliers"]']
-        supp_node_ids = ["NoSupp"]
-
-    # Get toggle states (use the actual values from the toggles)
-    allow_mkp_val = allow_mkp if 'allow_mkp' in locals() and enable_buying_channels_val else False
-    mkp_limit_val = mkp_limit if 'mkp_limit' in locals() and enable_buying_channels_val else 0
-    threshold_val = threshold if 'threshold' in locals() and enable_stream2_val else 10000
-    enable_tactical_val = enable_tactical if 'enable_tactical' in locals() and enable_stream2_val else False
-    enable_strategic_val = enable_strategic if 'enable_strategic' in locals() and enable_stream2_val else False
-    tact_action_val = tact_action if 'tact_action' in locals() and enable_stream2_val and enable_tactical_val else "N/A"
-    strat_action_val = strat_action if 'strat_action' in locals() and enable_stream2_val and enable_strategic_val else "N/A"
-    tact_manager_val = tact_manager if 'tact_manager' in locals() and enable_stream2_val and enable_tactical_val else ""
-    strat_manager_val = strat_manager if 'strat_manager' in locals() and enable_stream2_val and enable_strategic_val else ""
-
-    # Get category path for display
-    cat_path_display = full_cat_path if 'full_cat_path' in locals() else "N/A"
-
-    # Build Mermaid code with new flow: Taxonomy → Local/Global → Logic
-    mermaid_lines = [
-        "graph TD",
-        "    Start([User Request]) --> CheckTaxonomy{Taxonomy Match?}",
-    ]
-
-    # Use full category path for display (no truncation)
-    # Escape special characters for Mermaid
-    cat_display_clean = cat_path_display.replace('"', "'").replace('\n', ' ')
-    mermaid_lines.append(f'    CheckTaxonomy -->|Yes| CheckTaxonomyYes["Category: {cat_display_clean}"]')
-    mermaid_lines.append("    CheckTaxonomy -->|No| Reject[Reject Request]")
-
-    # Get supplier type filter
-    supplier_filter_val = supplier_type_filter if 'supplier_type_filter' in locals() else "All"
-
-    # Add supplier nodes first
-    for node_line in supp_nodes_list:
-        mermaid_lines.append(node_line)
-
-    # Route based on supplier type filter selection - only if Supplier Pool is enabled
-    if enable_supplier_pool_val:
-        if supplier_filter_val == "Local":
-            # Only show Local suppliers
-            mermaid_lines.append("    CheckTaxonomyYes --> LocalPool((Local Pool))")
-            if local_suppliers:
-                if len(local_suppliers) == 1:
-                    mermaid_lines.append(f"    LocalPool --> {local_suppliers[0]}")
-                else:
-                    mermaid_lines.append(f"    LocalPool --> {' --> '.join(local_suppliers)}")
-            else:
-                mermaid_lines.append("    LocalPool --> NoLocalSupp[No Local Suppliers]")
-        elif supplier_filter_val == "Global":
-            # Only show Global suppliers
-            mermaid_lines.append("    CheckTaxonomyYes --> GlobalPool((Global Pool))")
-            if global_suppliers:
-                if len(global_suppliers) == 1:
-                    mermaid_lines.append(f"    GlobalPool --> {global_suppliers[0]}")
-                else:
-                    mermaid_lines.append(f"    GlobalPool --> {' --> '.join(global_suppliers)}")
-            else:
-                mermaid_lines.append("    GlobalPool --> NoGlobalSupp[No Global Suppliers]")
-        else:
-            # Show both Local and Global (All)
-            mermaid_lines.append("    CheckTaxonomyYes --> CheckSuppType{Local or Global Supplier?}")
-            
-            # Add supplier type branches
-            if local_suppliers:
-                mermaid_lines.append("    CheckSuppType -->|Local| LocalPool((Local Pool))")
-                if len(local_suppliers) == 1:
-                    mermaid_lines.append(f"    LocalPool --> {local_suppliers[0]}")
-                else:
-                    mermaid_lines.append(f"    LocalPool --> {' --> '.join(local_suppliers)}")
-            
-            if global_suppliers:
-                mermaid_lines.append("    CheckSuppType -->|Global| GlobalPool((Global Pool))")
-                if len(global_suppliers) == 1:
-                    mermaid_lines.append(f"    GlobalPool --> {global_suppliers[0]}")
-                else:
-                    mermaid_lines.append(f"    GlobalPool --> {' --> '.join(global_suppliers)}")
-            
-            # If no suppliers match the filter, show message
-            if not local_suppliers and not global_suppliers:
-                mermaid_lines.append("    CheckSuppType -->|Any| NoSupp[No Suppliers Defined]")
+    # Only show visualization if at least one component is enabled
+    if not (enable_supplier_pool_val or enable_buying_channels_val or enable_stream2_val):
+        st.warning("⚠️ Please enable at least one of: Supplier Pool, Buying Channels, or Sourcing Logic to see the visualization.")
     else:
-        # Supplier Pool disabled - skip directly to next available logic
-        mermaid_lines.append("    CheckTaxonomyYes --> CheckNextLogic{Next Logic?}")
+        # Show user context
+        context_info = []
+        selected_markets, business_user_markets = scope["end_markets"], scope["business_user_markets"]
+        company_code, full_cat_path = scope["company_code"], blueprint["category"]["full_path"]
+        if selected_markets:
+            context_info.append(f"**End Markets:** {', '.join(selected_markets[:3])}{'...' if len(selected_markets) > 3 else ''}")
+        if business_user_markets:
+            context_info.append(f"**Business User Markets:** {', '.join(business_user_markets[:3])}{'...' if len(business_user_markets) > 3 else ''}")
+        if company_code and company_code != "N/A":
+            context_info.append(f"**Company Code:** {company_code}")
+        if full_cat_path and full_cat_path != "N/A > N/A > N/A > N/A":
+            context_info.append(f"**Category:** {full_cat_path}")
 
-    # Route suppliers based on logic type and toggles (for all filter types)
-    # Only process if Supplier Pool is enabled
-    if enable_supplier_pool_val and (local_suppliers or global_suppliers):
+        # Show enabled components
+        enabled_components = []
+        if enable_supplier_pool_val:
+            enabled_components.append("Supplier Pool")
         if enable_buying_channels_val:
-            # Buying Channels enabled - use buying channel logic
-            if buying_channel_nodes:
-                mermaid_lines.append("    %% BUYING CHANNEL ROUTE")
-                for bc_node in buying_channel_nodes:
-                    mermaid_lines.append(f"    {bc_node} --> BuyChannel[Use Buying Channel]")
-            
-            if sourcing_nodes:
-                mermaid_lines.append("    %% SOURCING ROUTE")
-                for src_node in sourcing_nodes:
-                    if enable_stream2_val:
-                        mermaid_lines.append(f"    {src_node} --> Sourcing")
-                    else:
-                        mermaid_lines.append(f"    {src_node} --> RejectSourcing[Reject - Sourcing Disabled]")
-            
-            # Failover from buying channels to sourcing
-            if buying_channel_nodes and enable_stream2_val:
-                mermaid_lines.append("    BuyChannel -.->|Failover| Sourcing")
-        else:
-            # Buying Channels disabled - suppliers go directly to sourcing or reject
-            if buying_channel_nodes:
-                mermaid_lines.append("    %% BUYING CHANNEL ROUTE (Buying Channels Disabled)")
-                for bc_node in buying_channel_nodes:
-                    # When Buying Channels is disabled, buying channel suppliers go to sourcing or reject
-                    if enable_stream2_val:
-                        mermaid_lines.append(f"    {bc_node} --> Sourcing")
-                    else:
-                        mermaid_lines.append(f"    {bc_node} --> RejectSourcing[Reject - Sourcing Disabled]")
-            
-            if sourcing_nodes:
-                mermaid_lines.append("    %% SOURCING ROUTE")
-                for src_node in sourcing_nodes:
-                    if enable_stream2_val:
-                        mermaid_lines.append(f"    {src_node} --> Sourcing")
-                    else:
-                        mermaid_lines.append(f"    {src_node} --> RejectSourcing[Reject - Sourcing Disabled]")
-    elif enable_supplier_pool_val:
-        # Supplier Pool enabled but no suppliers defined - check marketplace or sourcing
-        if supplier_filter_val == "All":
-            mermaid_lines.append("    CheckSuppType -->|Any| CheckSupp{Suppliers?}")
-        else:
-            mermaid_lines.append("    CheckTaxonomyYes --> CheckSupp{Suppliers?}")
-    else:
-        # Supplier Pool disabled - go directly to Buying Channels or Sourcing
-        if enable_buying_channels_val:
-            mermaid_lines.append("    CheckNextLogic -->|Buying Channels| BuyChannel[Use Buying Channel]")
-        elif enable_stream2_val:
-            mermaid_lines.append("    CheckNextLogic -->|Sourcing| Sourcing")
-        else:
-            mermaid_lines.append("    CheckNextLogic --> RejectAll[Reject - All Logic Disabled]")
-
-    # Add marketplace logic (only if Buying Channels enabled and marketplace allowed)
-    if enable_buying_channels_val and allow_mkp_val:
-        mermaid_lines.extend([
-            "",
-            "    %% MARKETPLACE",
-            "    CheckSupp -->|No| CheckMKP{Marketplace?}",
-            f"    CheckMKP -->|Yes| MKPLimit{{< £{mkp_limit_val}?}}",
-            "    MKPLimit -->|Yes| GoMKP[Buy on Marketplace]",
-        ])
-        if enable_stream2_val:
-            mermaid_lines.append(f"    MKPLimit -->|No| Sourcing")
-        else:
-            mermaid_lines.append(f"    MKPLimit -->|No| RejectSourcing[Reject - Sourcing Disabled]")
-        mermaid_lines.append("    CheckMKP -->|No| " + ("Sourcing" if enable_stream2_val else "RejectSourcing[Reject - Sourcing Disabled]"))
-    elif not enable_buying_channels_val:
-        # Buying Channels disabled - if no suppliers, go directly to Sourcing if enabled
-        if enable_stream2_val:
-            mermaid_lines.append("    CheckSupp -->|No| Sourcing")
-        else:
-            mermaid_lines.append("    CheckSupp -->|No| RejectAll[Reject - All Logic Disabled]")
-    else:
-        # Buying Channels enabled but no marketplace - failover to sourcing
+            enabled_components.append("Buying Channels")
         if enable_stream2_val:
-            mermaid_lines.append("    CheckSupp -->|No| Sourcing")
-        else:
-            mermaid_lines.append("    CheckSupp -->|No| RejectSourcing[Reject - Sourcing Disabled]")
-
-    # Add sourcing subgraph (only if Stream 2 enabled)
-    if enable_stream2_val:
-        mermaid_lines.extend([
-            "",
-            "    subgraph SourcingBox [Sourcing Logic]",
-            "        direction TB",
-            "        Sourcing(Start Sourcing) --> CheckThresh{> £" + str(threshold_val) + "?}",
-        ])
-        
-        # Handle Tactical path
-        if enable_tactical_val:
-            tact_label = f"Tactical: {tact_action_val}"
-            if tact_manager_val:
-                manager_clean = tact_manager_val.replace(':', '-').replace('"', "'")
-                tact_label += f"\\nManager: {manager_clean}"
-            mermaid_lines.append(f'        CheckThresh -->|No| Tactical["{tact_label}"]')
-        else:
-            mermaid_lines.append('        CheckThresh -->|No| RejectTactical[Reject - Tactical Disabled]')
-        
-        # Handle Strategic path
-        if enable_strategic_val:
-            strat_label = f"Strategic: {strat_action_val}"
-            if strat_manager_val:
-                manager_clean = strat_manager_val.replace(':', '-').replace('"', "'")
-                strat_label += f"\\nManager: {manager_clean}"
-            mermaid_lines.append(f'        CheckThresh -->|Yes| Strategic["{strat_label}"]')
-        else:
-            mermaid_lines.append('        CheckThresh -->|Yes| RejectStrategic[Reject - Strategic Disabled]')
-        
-        mermaid_lines.append("    end")
-
-    # Add styling
-    mermaid_lines.extend([
-        "",
-        "    %% STYLING",
-        "    classDef green fill:#dcfce7,stroke:#16a34a,stroke-width:2px",
-        "    classDef red fill:#fee2e2,stroke:#ef4444,stroke-width:2px",
-        "    classDef blue fill:#dbeafe,stroke:#3b82f6,stroke-width:2px",
-        "    classDef yellow fill:#fef3c7,stroke:#f59e0b,stroke-width:2px",
-    ])
-
-    # Style nodes
-    if supp_node_ids and supp_node_ids[0] != "NoSupp":
-        mermaid_lines.append(f"    class {','.join(supp_node_ids)} green")
-    if allow_mkp_val:
-        mermaid_lines.append("    class GoMKP green")
-    if enable_stream2_val:
-        # Style tactical and strategic nodes only if enabled
-        style_nodes = []
-        if enable_tactical_val:
-            style_nodes.append("Tactical")
-        if enable_strategic_val:
-            style_nodes.append("Strategic")
-        if style_nodes:
-            mermaid_lines.append(f"    class {','.join(style_nodes)} red")
-    mermaid_lines.append("    class Reject,RejectSourcing,RejectAll,RejectTactical,RejectStrategic red")
-    mermaid_lines.append("    class CheckTaxonomy,CheckSuppType blue")
-
-    mermaid_code = "\n".join(mermaid_lines)
-
-    # Display Mermaid code and download button
-    col_viz1, col_viz2 = st.columns([3, 1])
-    with col_viz1:
-        with st.expander("📝 View Mermaid Code"):
-            st.code(mermaid_code, language="text")
-
-    with col_viz2:
-        st.download_button(
-            label="📥 Download Mermaid",
-            data=mermaid_code,
-            file_name=f"logic_flow_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.mmd",
-            mime="text/plain",
-            use_container_width=True
-        )
+            enabled_components.append("Sourcing Logic")
+
+        if enabled_components:
+            context_info.append(f"**Enabled:** {', '.join(enabled_components)}")
 
-    # Render Mermaid diagram
-    components.html(f"""
-    <div style="text-align:center; width:100%; padding:20px;">
-        <div class="mermaid">{mermaid_code}</div>
-    </div>
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@11/dist/mermaid.min.js"></script>
-    <script>
-        mermaid.initialize({{startOnLoad:true, theme:'default'}});
-    </script>
-    """, height=600, scrolling=True)
+        if context_info:
+            st.info(" | ".join(context_info))
+
+        # Flow graph for the current blueprint: the diagram is rendered from it, and it is checked
+        # for dangling / unreachable nodes and against the routing engine's possible outcomes.
+        # Large pools are drawn as one node per (pool, logic type, buying channel) group, with a drill-down
+        detail_limit, expand_group = DETAIL_LIMIT, None
+        if len(blueprint["supplier_pool"]["suppliers"]) > DETAIL_LIMIT:
+            col_lod1, col_lod2 = st.columns([1, 2])
+            with col_lod1:
+                detail_limit = st.number_input("Group suppliers above", min_value=5, max_value=500, value=DETAIL_LIMIT,
+                                               step=5, key="diagram_detail_limit",
+                                               help="Pools larger than this are drawn as grouped nodes with counts")
+            # Grouping walks the whole pool: keyed on the pool alone, so Sourcing Logic changes reuse it
+            pool_key = flow_hash({"supplier_pool": blueprint["supplier_pool"]},
+                                 suppliers_digest=supplier_store().digest(FLOW_SUPPLIER_COLUMNS))
+            with perf_section("supplier grouping"):
+                groups = dict(export_artifact(pool_key, ("groups", detail_limit), lambda: supplier_groups(blueprint, detail_limit)))
+            if groups:
+                with col_lod2:
+                    expand_group = st.selectbox(
+                        "Drill into supplier group", [None] + list(groups),
+                        format_func=lambda key: "— all groups collapsed —" if key is None else f"{group_label(key)} ({groups[key]:,})",
+                        key="diagram_expand_group"
+                    )
+        def build_flow_view():
+            flow_graph = build_flow_graph(blueprint, detail_limit=detail_limit, expand=expand_group)
+            return flow_graph.to_mermaid(), flow_issues(blueprint, flow_graph)
+
+        with perf_section("mermaid build"):
+            mermaid_code, flow_problems = export_artifact(flow_key, ("mermaid", detail_limit, expand_group), build_flow_view)
+        if flow_problems:
+            with st.expander(f"⚠️ {len(flow_problems)} issue(s) in the logic flow"):
+                for problem in flow_problems:
+                    st.write(f"- {problem}")
+
+        # Display Mermaid code and download button
+        col_viz1, col_viz2 = st.columns([3, 1])
+        with col_viz1:
+            with st.expander("📝 View Mermaid Code"):
+                st.code(mermaid_code, language="text")
+
+        with col_viz2:
+            st.download_button(
+                label="📥 Download Mermaid",
+                data=mermaid_code,
+                file_name=f"logic_flow_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.mmd",
+                mime="text/plain",
+                on_click="ignore",
+                width="stretch"
+            )
+
+        # Render Mermaid diagram: plain SVG when mermaid-cli is installed, otherwise rendered in the
+        # browser from the local bundle (static/, CDN fallback) and cached there by diagram hash
+        with perf_section("mermaid render"):
+            svg = render_svg(mermaid_code)
+            if svg is None and not local_bundle_available():
+                st.warning("The Mermaid bundle isn't installed, so the diagram is loaded from the CDN "
+                           f"(unreachable on offline hosts). Install it on the server: `{MERMAID_INSTALL_HINT}`")
+            st.iframe(diagram_html(mermaid_code, svg=svg), height=600)
+
+flow_diagram_section()
 
 # ==========================================
 # 5. FINAL OUTPUT (At the bottom)
 # ==========================================
-st.divider()
-st.markdown("---")
+@st.fragment
+@profiled("output / export")
+def output_section():
+    st.divider()
+    st.markdown("---")
 
-# Initialize session state for output
-if 'show_output' not in st.session_state:
-    st.session_state.show_output = False
+    # Initialize session state for output
+    if 'show_output' not in st.session_state:
+        st.session_state.show_output = False
 
-# Button to generate and show output
-col1, col2, col3 = st.columns([1, 1, 2])
-with col1:
-    if st.button("📊 Generate Logic Output", type="primary", use_container_width=True):
-        st.session_state.show_output = True
-        st.rerun()
+    # Button to generate and show output
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        st.button("📊 Generate Logic Output", type="primary", width="stretch", key="generate_output",
+                  on_click=set_show_output, args=(True,))
 
-with col2:
-    if st.button("🔄 Reset Output", use_container_width=True):
-        st.session_state.show_output = False
-        st.rerun()
+    with col2:
+        st.button("🔄 Reset Output", width="stretch", key="reset_output", on_click=set_show_output, args=(False,))
 
-if st.session_state.show_output:
-    st.subheader("📋 Final Output - Ready for ORO Team")
-    
-    # Collect all data
-    # Handle multiple category selections
-    selected_l1_list = selected_l1 if 'selected_l1' in locals() and isinstance(selected_l1, list) else ([] if 'selected_l1' not in locals() else [selected_l1])
-    selected_l2_list = selected_l2 if 'selected_l2' in locals() and isinstance(selected_l2, list) else ([] if 'selected_l2' not in locals() else [selected_l2])
-    selected_l3_list = selected_l3 if 'selected_l3' in locals() and isinstance(selected_l3, list) else ([] if 'selected_l3' not in locals() else [selected_l3])
-    selected_l4_list = selected_l4 if 'selected_l4' in locals() and isinstance(selected_l4, list) else ([] if 'selected_l4' not in locals() else [selected_l4])
-    
-    output_data = {
-        "scope": {
-            "region": region if 'region' in locals() else "N/A",
-            "cluster": cluster if 'cluster' in locals() else "N/A",
-            "end_markets": selected_markets if 'selected_markets' in locals() else [],
-            "business_user_markets": business_user_markets if 'business_user_markets' in locals() else [],
-            "company_code": company_code if 'company_code' in locals() else "N/A"
-        },
-        "category": {
-            "full_path": full_cat_path if 'full_cat_path' in locals() else "N/A",
-            "l1": selected_l1_list,
-            "l2": selected_l2_list,
-            "l3": selected_l3_list,
-            "l4": selected_l4_list
-        },
-        "supplier_pool": {
-            "enabled": enable_supplier_pool if 'enable_supplier_pool' in locals() else True,
-            "suppliers": suppliers_df.to_dict('records') if 'suppliers_df' in locals() and suppliers_df is not None and not suppliers_df.empty and len(suppliers_df) > 0 and (suppliers_df.iloc[0].get("Supplier Name", "") if len(suppliers_df) > 0 else "") else [],
-            "supplier_type_filter": supplier_type_filter if 'supplier_type_filter' in locals() else "All"
-        },
-        "buying_channels": {
-            "enabled": enable_buying_channels if 'enable_buying_channels' in locals() else True,
-            "channels": buying_channels_df.to_dict('records') if 'buying_channels_df' in locals() and buying_channels_df is not None and not buying_channels_df.empty else [],
-            "allow_marketplace": allow_mkp if 'allow_mkp' in locals() else False,
-            "marketplace_limit": mkp_limit if 'mkp_limit' in locals() else 0,
-            "marketplace_blacklist": mkp_blacklist if 'mkp_blacklist' in locals() else []
-        },
-        "stream2": {
-            "enabled": enable_stream2 if 'enable_stream2' in locals() else True,
-            "tactical_threshold": threshold if 'threshold' in locals() else 0,
-            "tactical": {
-                "enabled": enable_tactical if 'enable_tactical' in locals() else False,
-                "action": tact_action if 'tact_action' in locals() else "N/A",
-                "manager": tact_manager if 'tact_manager' in locals() else "",
-                "comments": tact_comments if 'tact_comments' in locals() else ""
-            },
-            "strategic": {
-                "enabled": enable_strategic if 'enable_strategic' in locals() else False,
-                "owner": strat_action if 'strat_action' in locals() else "N/A",
-                "manager": strat_manager if 'strat_manager' in locals() else "",
-                "comments": strat_comments if 'strat_comments' in locals() else ""
-            },
-            "instructions": instr if 'instr' in locals() else ""
-        },
-        "metadata": {
-            "created_at": pd.Timestamp.now().isoformat(),
-            "version": "2.0"
-        }
-    }
-    
-    # Display JSON Blueprint
-    st.markdown("### 📄 JSON Blueprint")
-    json_output = json.dumps(output_data, indent=2, ensure_ascii=False)
-    st.code(json_output, language="json")
-    
-    # Download buttons
-    col_dl1, col_dl2, col_dl3 = st.columns(3)
-    
-    with col_dl1:
-        st.download_button(
-            label="💾 Download JSON",
-            data=json_output,
-            file_name=f"oro_logic_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json",
-            use_container_width=True
-        )
-    
-    with col_dl2:
-        # Create Excel file
-        if OPENPYXL_AVAILABLE:
-            try:
-                import io
-                from openpyxl import Workbook
-                from openpyxl.styles import Font, PatternFill
-                
-                wb = Workbook()
-                
-                # Sheet 1: Logic Matrix
-                ws1 = wb.active
-                ws1.title = "Logic Matrix"
-                ws1.append(["Field", "Value"])
-                ws1.append(["Region", output_data["scope"]["region"]])
-                ws1.append(["Cluster/DRBU", output_data["scope"]["cluster"]])
-                ws1.append(["End Markets", ", ".join(output_data["scope"]["end_markets"]) if output_data["scope"]["end_markets"] else "N/A"])
-                ws1.append(["Business User Markets", ", ".join(output_data["scope"]["business_user_markets"]) if output_data["scope"]["business_user_markets"] else "N/A"])
-                ws1.append(["Company Code", output_data["scope"]["company_code"]])
-                ws1.append(["Category L1", ", ".join(output_data["category"]["l1"]) if output_data["category"]["l1"] else "N/A"])
-                ws1.append(["Category L2", ", ".join(output_data["category"]["l2"]) if output_data["category"]["l2"] else "N/A"])
-                ws1.append(["Category L3", ", ".join(output_data["category"]["l3"]) if output_data["category"]["l3"] else "N/A"])
-                ws1.append(["Category L4", ", ".join(output_data["category"]["l4"]) if output_data["category"]["l4"] else "N/A"])
-                ws1.append(["Category Full Path", output_data["category"]["full_path"]])
-                ws1.append(["Supplier Pool Enabled", output_data["supplier_pool"]["enabled"]])
-                ws1.append(["Supplier Type Filter", output_data["supplier_pool"]["supplier_type_filter"]])
-                ws1.append(["Buying Channels Enabled", output_data["buying_channels"]["enabled"]])
-                ws1.append(["Allow Marketplace", output_data["buying_channels"]["allow_marketplace"]])
-                ws1.append(["Marketplace Limit", output_data["buying_channels"]["marketplace_limit"]])
-                ws1.append(["Marketplace Blacklist Items", len(output_data["buying_channels"]["marketplace_blacklist"])])
-                ws1.append(["Stream 2 Enabled", output_data["stream2"]["enabled"]])
-                ws1.append(["Tactical Threshold", output_data["stream2"]["tactical_threshold"]])
-                ws1.append(["Tactical Enabled", output_data["stream2"]["tactical"]["enabled"]])
-                ws1.append(["Tactical Action", output_data["stream2"]["tactical"]["action"]])
-                ws1.append(["Tactical Manager", output_data["stream2"]["tactical"]["manager"]])
-                ws1.append(["Tactical Comments", output_data["stream2"]["tactical"]["comments"]])
-                ws1.append(["Strategic Enabled", output_data["stream2"]["strategic"]["enabled"]])
-                ws1.append(["Strategic Owner", output_data["stream2"]["strategic"]["owner"]])
-                ws1.append(["Strategic Manager", output_data["stream2"]["strategic"]["manager"]])
-                ws1.append(["Strategic Comments", output_data["stream2"]["strategic"]["comments"]])
-                ws1.append(["SDC / Desk Instructions", output_data["stream2"]["instructions"]])
-                
-                # Sheet 2: Suppliers
-                ws2 = wb.create_sheet("Suppliers")
-                if output_data["supplier_pool"]["suppliers"]:
-                    ws2.append(["Supplier Name", "Vendor Code", "Supplier Type", "Logic Type", "Buying Channel", "Tender Required", "Comments"])
-                    for supp in output_data["supplier_pool"]["suppliers"]:
-                        ws2.append([
-                            supp.get("Supplier Name", ""),
-                            supp.get("Vendor Code", ""),
-                            supp.get("Supplier Type", ""),
-                            supp.get("Logic Type", ""),
-                            supp.get("Buying Channel", ""),
-                            supp.get("Tender Required", ""),
-                            supp.get("Comments", "")
-                        ])
-                else:
-                    ws2.append(["No suppliers defined"])
-                
-                # Sheet 3: Buying Channels
-                ws3_bc = wb.create_sheet("Buying Channels")
-                if output_data["buying_channels"]["channels"]:
-                    ws3_bc.append(["Channel Type", "Supplier", "Vendor Code", "Link", "Comments"])
-                    for ch in output_data["buying_channels"]["channels"]:
-                        ws3_bc.append([
-                            ch.get("Channel Type", ""),
-                            ch.get("Supplier", ""),
-                            ch.get("Vendor Code", ""),
-                            ch.get("Link", ""),
-                            ch.get("Comments", "")
-                        ])
-                else:
-                    ws3_bc.append(["No buying channels defined"])
-                
-                # Sheet 4: Marketplace Blacklist
-                ws4_mkp = wb.create_sheet("Marketplace Blacklist")
-                if output_data["buying_channels"]["marketplace_blacklist"]:
-                    ws4_mkp.append(["Item Name", "Item Code/SKU", "Category", "Reason"])
-                    for item in output_data["buying_channels"]["marketplace_blacklist"]:
-                        ws4_mkp.append([
-                            item.get("item_name", ""),
-                            item.get("item_code", ""),
-                            item.get("category", ""),
-                            item.get("reason", "")
-                        ])
-                else:
-                    ws4_mkp.append(["No blacklist items defined"])
-                
-                # Sheet 5: Summary
-                ws5 = wb.create_sheet("Summary")
-                ws5.append(["Item", "Count"])
-                ws5.append(["End Markets", len(output_data["scope"]["end_markets"])])
-                ws5.append(["Business User Markets", len(output_data["scope"]["business_user_markets"])])
-                ws5.append(["Suppliers", len(output_data["supplier_pool"]["suppliers"])])
-                ws5.append(["Buying Channels", len(output_data["buying_channels"]["channels"])])
-                ws5.append(["Marketplace Blacklist Items", len(output_data["buying_channels"]["marketplace_blacklist"])])
-                
-                excel_buffer = io.BytesIO()
-                wb.save(excel_buffer)
-                excel_buffer.seek(0)
-                
+    if st.session_state.show_output:
+        st.subheader("📋 Final Output - Ready for ORO Team")
+        blueprint = current_blueprint()
+        blueprint_key, _ = blueprint_keys(blueprint)
+        st.session_state.drawn_output_key = blueprint_key
+
+        from oro_logic.container import CONTAINER_SUFFIX, build_container
+        from oro_logic.export import PREVIEW_ROWS, blueprint_json, blueprint_preview, build_excel, stamped_json
+
+        def output_metadata():
+            return {"created_at": pd.Timestamp.now().isoformat(), "version": BLUEPRINT_VERSION}
+
+        content = {key: value for key, value in blueprint.items() if key != "metadata"}  # what blueprint_key hashes
+        output_data = {**content, "metadata": output_metadata()}
+
+        # Display JSON Blueprint (a capped preview; the full document is only built for a download)
+        st.markdown("### 📄 JSON Blueprint")
+        preview, truncated = blueprint_preview(output_data)
+        st.code(preview, language="json")
+        if truncated:
+            st.caption(f"Preview: the first {PREVIEW_ROWS} rows of each table. "
+                       "Download the JSON or the compact .oro container for the full blueprint.")
+
+        # Download buttons
+        col_dl1, col_dl2, col_dl3, col_dl4 = st.columns(4)
+
+        with col_dl1:
+            st.download_button(
+                label="💾 Download JSON",
+                # The memoized body is keyed by blueprint hash; created_at is stamped on each click
+                data=lambda: stamped_json(export_artifact(blueprint_key, "json",
+                                                          profiled_download("json export", lambda: blueprint_json(content))),
+                                          output_metadata()),
+                file_name=f"oro_logic_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                on_click="ignore",
+                width="stretch"
+            )
+
+        with col_dl2:
+            # The Excel file is only built when the button is clicked (then memoized by blueprint hash)
+            if OPENPYXL_AVAILABLE:
                 st.download_button(
                     label="📊 Download Excel",
-                    data=excel_buffer.getvalue(),
+                    data=lambda: export_artifact(blueprint_key, "excel",
+                                                 profiled_download("excel export", lambda: build_excel(content))),
                     file_name=f"oro_logic_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
+                    on_click="ignore",
+                    width="stretch"
                 )
-            except Exception as e:
-                st.error(f"Excel export error: {str(e)}")
-        else:
+            else:
+                st.download_button(
+                    label="📊 Download Excel",
+                    data="",  # Empty data since openpyxl is not available
+                    file_name="",
+                    disabled=True,
+                    width="stretch",
+                    help="Install openpyxl: pip install openpyxl"
+                )
+                st.info("💡 Install openpyxl to enable Excel export: `pip install openpyxl`")
+
+        with col_dl3:
+            # Scalar config as JSON plus the record tables as Parquet, built (and stamped) on click
             st.download_button(
-                label="📊 Download Excel",
-                data="",  # Empty data since openpyxl is not available
-                file_name="",
-                disabled=True,
-                use_container_width=True,
-                help="Install openpyxl: pip install openpyxl"
+                label="🗜️ Download Compact (.oro)",
+                data=profiled_download("container export",
+                                       lambda: build_container({**content, "metadata": output_metadata()})),
+                file_name=f"oro_logic_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{CONTAINER_SUFFIX}",
+                mime="application/zip",
+                on_click="ignore",
+                width="stretch"
             )
-            st.info("💡 Install openpyxl to enable Excel export: `pip install openpyxl`")
-    
-    with col_dl3:
-        # Copy to clipboard button (JSON)
-        if st.button("📋 Copy JSON to Clipboard", use_container_width=True):
-            st.code(json_output, language="json")
-            st.success("JSON copied! (Use Ctrl+C to copy from the code block above)")
-    
-    # Share section
-    st.markdown("---")
-    st.markdown("### 🔗 Share with ORO Team")
-    st.info("💡 **Share Options:**")
-    st.markdown("""
-    1. **Download JSON** - Share the JSON file with the ORO team for integration
-    2. **Download Excel** - Share the Excel file for review and validation
-    3. **Copy Mermaid Code** - Share the Mermaid code for diagram visualization
-    4. **Screenshot** - Take a screenshot of the visualization above
-    """)
-    
-    # Summary table
-    st.markdown("### 📊 Summary")
-    summary_df = pd.DataFrame([
-        ["Scope", f"{output_data['scope']['region']} / {output_data['scope']['cluster']}"],
-        ["End Markets", len(output_data['scope']['end_markets'])],
-        ["Business User Markets", len(output_data['scope']['business_user_markets'])],
-        ["Category", output_data['category']['full_path']],
-        ["Suppliers", len(output_data['supplier_pool']['suppliers'])],
-        ["Buying Channels", len(output_data['buying_channels']['channels'])],
-        ["Marketplace Enabled", "Yes" if output_data['buying_channels']['allow_marketplace'] else "No"],
-        ["Marketplace Limit", f"£{output_data['buying_channels']['marketplace_limit']}" if output_data['buying_channels']['allow_marketplace'] else "N/A"],
-        ["Marketplace Blacklist Items", len(output_data['buying_channels']['marketplace_blacklist'])],
-        ["Tactical Threshold", f"£{output_data['stream2']['tactical_threshold']}"],
-    ], columns=["Item", "Value"])
-    st.dataframe(summary_df, use_container_width=True, hide_index=True)
-else:
-    st.info("👆 Click 'Generate Logic Output' to create and view the final output")
\ No newline at end of file
+
+        with col_dl4:
+            # Copy to clipboard button (JSON)
+            if st.button("📋 Copy JSON to Clipboard", width="stretch"):
+                if truncated:
+                    st.warning("This blueprint is too large to show in full; use 💾 Download JSON instead.")
+                else:
+                    st.code(preview, language="json")
+                    st.success("JSON copied! (Use Ctrl+C to copy from the code block above)")
+
+        # Save into the rule set served by the routing service (picked up without a restart)
+        col_save1, col_save2 = st.columns([1, 3])
+        with col_save1:
+            if st.button("🚀 Publish to Routing Service", width="stretch", key="publish_ruleset"):
+                try:
+                    saved_path = save_blueprint(output_data)
+                    st.success(f"Saved {os.path.basename(saved_path)}")
+                except OSError as e:
+                    st.error(f"Could not save blueprint: {str(e)}")
+        with col_save2:
+            st.caption(f"Rule set directory: `{DEFAULT_RULESET_DIR}` - run `python -m oro_logic.service` to serve it")
+
+        # Versioned, searchable copy (sidebar: 📚 Blueprint Store)
+        col_store1, col_store2 = st.columns([1, 3])
+        with col_store2:
+            store_label = st.text_input("Label (optional)", key="store_label", placeholder="e.g. Vietnam facilities - Q3 review",
+                                        label_visibility="collapsed")
+        with col_store1:
+            if st.button("💾 Save to Blueprint Store", width="stretch", key="store_save"):
+                try:
+                    stored_id, stored_version = get_store().save(output_data, label=store_label)
+                    st.success(f"Saved #{stored_id} (version {stored_version})")
+                except sqlite3.Error as e:
+                    st.error(f"Could not save blueprint: {str(e)}")
+
+        # Share section
+        st.markdown("---")
+        st.markdown("### 🔗 Share with ORO Team")
+        st.info("💡 **Share Options:**")
+        st.markdown("""
+        1. **Download JSON** - Share the JSON file with the ORO team for integration
+        2. **Download Excel** - Share the Excel file for review and validation
+        3. **Copy Mermaid Code** - Share the Mermaid code for diagram visualization
+        4. **Screenshot** - Take a screenshot of the visualization above
+        """)
+
+        # Summary table
+        st.markdown("### 📊 Summary")
+        summary_df = pd.DataFrame([
+            ["Scope", f"{output_data['scope']['region']} / {output_data['scope']['cluster']}"],
+            ["End Markets", len(output_data['scope']['end_markets'])],
+            ["Business User Markets", len(output_data['scope']['business_user_markets'])],
+            ["Category", output_data['category']['full_path']],
+            ["Suppliers", len(output_data['supplier_pool']['suppliers'])],
+            ["Buying Channels", len(output_data['buying_channels']['channels'])],
+            ["Marketplace Enabled", "Yes" if output_data['buying_channels']['allow_marketplace'] else "No"],
+            ["Marketplace Limit", f"£{output_data['buying_channels']['marketplace_limit']}" if output_data['buying_channels']['allow_marketplace'] else "N/A"],
+            ["Marketplace Blacklist Items", len(output_data['buying_channels']['marketplace_blacklist'])],
+            ["Tactical Threshold", f"£{output_data['stream2']['tactical_threshold']}"],
+        ], columns=["Item", "Value"])
+        st.dataframe(summary_df, width="stretch", hide_index=True)
+    else:
+        st.session_state.drawn_output_key = None
+        st.info("👆 Click 'Generate Logic Output' to create and view the final output")
+
+output_section()
+
+# ==========================================
+# 6. CONFLICTS ACROSS STORED BLUEPRINTS
+# ==========================================
+@st.fragment
+def conflicts_section():
+    st.divider()
+    st.markdown("### 🧭 Blueprint Conflicts")
+    st.caption("Finds stored blueprints (latest versions) that cover the same End Market / L4 and checks whether their rules disagree.")
+    col_conf1, col_conf2 = st.columns([1, 3])
+    with col_conf2:
+        include_current = st.checkbox("Include the blueprint being edited", value=True, key="conflicts_include_current")
+    with col_conf1:
+        if st.button("🔍 Analyze Conflicts", width="stretch", key="conflicts_run"):
+            from oro_logic.conflicts import analyze as analyze_conflicts
+
+            conflict_blueprints = dict(get_store().iter_latest())
+            conflict_names = {blueprint_id: f"#{blueprint_id}" for blueprint_id in conflict_blueprints}
+            if include_current:
+                conflict_blueprints["current"] = current_blueprint()
+                conflict_names["current"] = "current"
+            st.session_state.conflict_report = analyze_conflicts(conflict_blueprints, conflict_names)
+            st.session_state.conflict_report_size = len(conflict_blueprints)
+
+    if 'conflict_report' in st.session_state:
+        conflict_report = st.session_state.conflict_report
+        n_overlaps = int((conflict_report["kind"] == "Overlap").sum())
+        n_conflicts = int((conflict_report["kind"] != "Overlap").sum())
+        col_m1, col_m2, col_m3 = st.columns(3)
+        col_m1.metric("Blueprints analyzed", st.session_state.conflict_report_size)
+        col_m2.metric("Overlapping sets", n_overlaps)
+        col_m3.metric("Conflicting rules", n_conflicts)
+        if conflict_report.empty:
+            st.success("No overlapping scopes")
+        else:
+            conflicts_only = st.toggle("Show conflicts only", value=True, key="conflicts_only")
+            shown = conflict_report[conflict_report["severity"] == "conflict"] if conflicts_only else conflict_report
+            st.dataframe(shown, width="stretch", hide_index=True)
+
+conflicts_section()
+
+# ==========================================
+# 7. PERFORMANCE PANEL (ORO_PROFILE=1 or ORO_PROFILE=time)
+# ==========================================
+@st.fragment
+def perf_panel():
+    """The session's recently profiled runs, section by section (Refresh picks up fragment runs)"""
+    with st.expander("🐢 Performance (debug)"):
+        col_perf1, col_perf2 = st.columns([1, 3])
+        col_perf1.button("🔄 Refresh", key="perf_refresh", width="stretch")
+        col_perf2.caption(f"Profiling {'wall time + allocations' if TRACE_ALLOCATIONS else 'wall time'} per section | "
+                          f"JSON log: `{DEFAULT_LOG_PATH}` (`python -m oro_logic.profiling` aggregates it)")
+        history = list(st.session_state.get("perf_history", ()))
+        if not history:
+            st.caption("No profiled runs yet")
+            return
+        last = history[-1]
+        alloc = f" | {last['alloc_kib']:,.0f} KiB allocated, peak {last['peak_kib']:,.0f} KiB" if last["alloc_kib"] is not None else ""
+        st.markdown(f"**Last run:** {last['kind']}{' (interrupted)' if last['interrupted'] else ''} | "
+                    f"{last['wall_ms']:,.0f} ms, {last['other_ms']:,.0f} ms outside the sections{alloc}")
+        sections = pd.DataFrame(last["sections"])
+        if not sections.empty:
+            sections["name"] = ["    " * depth + name for depth, name in zip(sections["depth"], sections["name"])]
+            st.dataframe(sections.drop(columns="depth").dropna(axis=1, how="all"), hide_index=True, width="stretch")
+        st.markdown("**Recent runs** (ms, newest first)")
+        recent = pd.DataFrame([
+            {"time": record["ts"][11:], "kind": record["kind"], "total": record["wall_ms"],
+             **{section["name"]: section["wall_ms"] for section in record["sections"]}}
+            for record in reversed(history)
+        ])
+        st.dataframe(recent, hide_index=True, width="stretch")
+
+if PROFILING:
+    finish_perf_run()
+    perf_panel()
+
+st.session_state.page_run_active = False
@@ -0,0 +1,109 @@
+"""Benchmark: legacy iterrows hierarchy loaders vs the vectorized builders.
+
+    python -m benchmarks.bench_hierarchy                 # 1k, 100k, 1M rows
+    python -m benchmarks.bench_hierarchy --rows 1000 50000 --skip-legacy-above 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from oro_logic.hierarchy import build_cat_hierarchy, build_geo_hierarchy
+
+
+# --- Reference implementations (the row-by-row loaders previously in app.py) ---
+
+def legacy_load_geo_from_df(df):
+    hierarchy = {}
+    if df is not None and not df.empty:
+        for _, row in df.iterrows():
+            region = str(row.get('Region', '')).strip() if pd.notna(row.get('Region', '')) else ''
+            drbu = str(row.get('DRBU', '')).strip() if pd.notna(row.get('DRBU', '')) else ''
+            end_market = str(row.get('End Market', '')).strip() if pd.notna(row.get('End Market', '')) else ''
+            if region or drbu or end_market:
+                region = region or 'Unknown'
+                drbu = drbu or 'Unknown'
+                end_market = end_market or 'Unknown'
+                if region not in hierarchy:
+                    hierarchy[region] = {}
+                if drbu not in hierarchy[region]:
+                    hierarchy[region][drbu] = []
+                if end_market not in hierarchy[region][drbu]:
+                    hierarchy[region][drbu].append(end_market)
+    return hierarchy
+
+
+def legacy_load_cat_from_df(df):
+    hierarchy = {}
+    if df is not None and not df.empty:
+        for _, row in df.iterrows():
+            l1, l2, l3, l4 = row.get('L1', ''), row.get('L2', ''), row.get('L3', ''), row.get('L4', '')
+            if l1 and l2 and l3 and l4:
+                if l1 not in hierarchy:
+                    hierarchy[l1] = {}
+                if l2 not in hierarchy[l1]:
+                    hierarchy[l1][l2] = {}
+                if l3 not in hierarchy[l1][l2]:
+                    hierarchy[l1][l2][l3] = []
+                if l4 not in hierarchy[l1][l2][l3]:
+                    hierarchy[l1][l2][l3].append(l4)
+    return hierarchy
+
+
+# --- Synthetic data ---
+
+def make_geo_frame(n_rows, seed=0):
+    """Region x DRBU x End Market rows with many duplicates (one row per L4 x market)"""
+    rng = np.random.default_rng(seed)
+    market_ids = rng.integers(0, 400, n_rows)
+    return pd.DataFrame({
+        'Region': [f"Region {i % 5}" for i in market_ids],
+        'DRBU': [f"DRBU {i % 40}" for i in market_ids],
+        'End Market': [f" Market {i} " for i in market_ids],
+    })
+
+
+def make_cat_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    leaf_ids = rng.integers(0, max(n_rows // 20, 50), n_rows)
+    return pd.DataFrame({
+        'L1': [f"L1-{i % 8}" for i in leaf_ids],
+        'L2': [f"L2-{i % 60}" for i in leaf_ids],
+        'L3': [f"L3-{i % 600}" for i in leaf_ids],
+        'L4': [f"L4-{i}" for i in leaf_ids],
+    })
+
+
+def _time(fn, df):
+    start = time.perf_counter()
+    result = fn(df)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="Skip the (slow) legacy loaders for inputs larger than this")
+    args = parser.parse_args(argv)
+
+    print(f"{'tree':<5} {'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in args.rows:
+        for tree, make, legacy, fast in (
+            ("geo", make_geo_frame, legacy_load_geo_from_df, build_geo_hierarchy),
+            ("cat", make_cat_frame, legacy_load_cat_from_df, build_cat_hierarchy),
+        ):
+            df = make(n_rows)
+            fast_s, fast_result = _time(fast, df)
+            if args.skip_legacy_above is not None and n_rows > args.skip_legacy_above:
+                print(f"{tree:<5} {n_rows:>10,} {'skipped':>12} {fast_s:>15.4f} {'-':>9}")
+                continue
+            legacy_s, legacy_result = _time(legacy, df)
+            assert legacy_result == fast_result, f"{tree} hierarchy mismatch at {n_rows} rows"
+            print(f"{tree:<5} {n_rows:>10,} {legacy_s:>12.4f} {fast_s:>15.4f} {legacy_s / fast_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Benchmark: Logic Flow rendering, CDN re-initialization vs. local bundle + SVG cache.
+
+    python -m benchmarks.bench_mermaid                    # 10 / 200 / 2000 suppliers
+    python -m benchmarks.bench_mermaid --suppliers 50 --runs 10
+    python -m benchmarks.bench_mermaid --detail-limit 50  # grouped (level-of-detail) diagrams
+    python -m benchmarks.bench_mermaid --apptest          # + rerun time through AppTest (no browser needed)
+
+Server side it times what each rerun costs in Python (diagram HTML, SVG cache
+lookups, mermaid-cli when installed) and the payload sent to the browser.
+When Playwright and the local bundle (``python -m oro_logic.mermaid fetch``)
+are available it also measures rerun-to-paint in headless Chromium: time from
+navigation start until the diagram's SVG is in the DOM, for
+
+- ``cdn_reinit``:   the previous markup (script tag + startOnLoad, renders on every rerun)
+- ``client_cold``:  the cached renderer on first paint (loads the bundle and renders)
+- ``client_rerun``: the cached renderer on rerun (SVG from localStorage, no Mermaid)
+- ``server_svg``:   plain server-rendered SVG (only with mermaid-cli)
+
+The browser loads the bundle from a local HTTP server in every case, so the
+numbers exclude network latency (which only widens the gap on real hosts).
+
+Without a browser, ``--apptest`` gives a server-side proxy: each mode's
+diagram is drawn by a one-element page run through Streamlit's AppTest, and
+reruns with the diagram unchanged are timed up to the finished delta
+(script run, element serialization). That is the part of rerun-to-paint the
+server controls; what the browser then does differs per mode (``cdn_reinit``
+renders with Mermaid again, ``client`` repaints the SVG from localStorage)
+and needs the Chromium run above.
+"""
+
+import argparse
+import functools
+import http.server
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.workload import make_blueprint
+from oro_logic import mermaid
+from oro_logic.flow import build_flow_graph
+
+LEGACY_TEMPLATE = """
+<div style="text-align:center; width:100%; padding:20px;">
+    <div class="mermaid">{code}</div>
+</div>
+<script src="{bundle}"></script>
+<script>
+    mermaid.initialize({{startOnLoad:true, theme:'default'}});
+</script>
+"""
+
+
+def make_diagram(n_suppliers, detail_limit=None):
+    return build_flow_graph(make_blueprint(n_suppliers=n_suppliers), detail_limit=detail_limit).to_mermaid()
+
+
+def _ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def bench_server(code, runs):
+    """Per-rerun Python cost and payload size of each mode"""
+    rows = {}
+    legacy = LEGACY_TEMPLATE.format(code=code, bundle=mermaid.CDN_URL)
+    rows["cdn_reinit"] = (_ms(lambda: LEGACY_TEMPLATE.format(code=code, bundle=mermaid.CDN_URL), runs), len(legacy))
+    client = mermaid.diagram_html(code, local_bundle=True)
+    rows["client (cached renderer)"] = (_ms(lambda: mermaid.diagram_html(code, local_bundle=True), runs), len(client))
+
+    mmdc = shutil.which("mmdc")
+    if mmdc:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            svg = mermaid.render_svg(code, cache_dir=cache_dir, mmdc=mmdc)
+            cold_ms = (time.perf_counter() - start) * 1e3
+            if svg is not None:
+                rows["server_svg cold (mmdc)"] = (cold_ms, len(svg))
+                rows["server_svg memory hit"] = (_ms(lambda: mermaid.render_svg(code, cache_dir=cache_dir), runs), len(svg))
+                rows["server_svg disk hit"] = (
+                    _ms(lambda: (mermaid._svg_memory.clear(), mermaid.render_svg(code, cache_dir=cache_dir)), runs), len(svg))
+    return rows
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def bench_browser(code, runs):
+    """Rerun-to-paint per mode in headless Chromium, or None if Playwright / the bundle are missing"""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return None
+    if not mermaid.local_bundle_available():
+        return None
+
+    with tempfile.TemporaryDirectory() as root:
+        # Same layout Streamlit serves: <page>, app/static/mermaid.min.js
+        os.makedirs(os.path.join(root, "app", "static"))
+        shutil.copy(os.path.join(mermaid.STATIC_DIR, mermaid.BUNDLE_FILE), os.path.join(root, "app", "static"))
+        pages = {
+            "cdn_reinit": LEGACY_TEMPLATE.format(code=code, bundle=mermaid.STATIC_URL),
+            "client": mermaid.diagram_html(code, local_bundle=True),
+        }
+        svg = mermaid.render_svg(code)
+        if svg is not None:
+            pages["server_svg"] = mermaid.diagram_html(code, svg=svg)
+        for name, html in pages.items():
+            with open(os.path.join(root, f"{name}.html"), "w", encoding="utf-8") as f:
+                f.write(f"<!doctype html><meta charset='utf-8'><body>{html}</body>")
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=root))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def paint_ms(page, url):
+            page.goto(url)
+            page.wait_for_function("document.querySelector('#oro-diagram svg, .mermaid svg, div > svg') !== null")
+            return page.evaluate("performance.now()")
+
+        results = {}
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch()
+                for name in pages:
+                    if name == "client":
+                        cold, rerun = [], []
+                        for _ in range(runs):
+                            context = browser.new_context()  # empty localStorage
+                            page = context.new_page()
+                            cold.append(paint_ms(page, f"{base}/client.html"))
+                            rerun.append(paint_ms(page, f"{base}/client.html"))
+                            context.close()
+                        results["client_cold"] = statistics.median(cold)
+                        results["client_rerun"] = statistics.median(rerun)
+                    else:
+                        page = browser.new_page()
+                        results[name] = statistics.median(paint_ms(page, f"{base}/{name}.html") for _ in range(runs))
+                        page.close()
+                browser.close()
+        finally:
+            server.shutdown()
+    return results
+
+
+# Logged on every AppTest run (deprecations, Arrow auto-fixes, bare-mode notices)
+QUIET_LOGGERS = (
+    "streamlit.deprecation_util",
+    "streamlit.dataframe_util",
+    "streamlit.runtime.scriptrunner_utils.script_run_context",
+)
+APPTEST_PAGE = """
+import streamlit as st
+from benchmarks.bench_mermaid import page_html
+st.iframe(page_html({mode!r}, {n_suppliers}, {detail_limit}), height=600)
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _diagram(n_suppliers, detail_limit):
+    return make_diagram(n_suppliers, detail_limit)
+
+
+def page_html(mode, n_suppliers, detail_limit=None):
+    """The Logic Flow HTML a rerun sends in ``mode`` (the diagram text is built once per process)"""
+    code = _diagram(n_suppliers, detail_limit)
+    if mode == "cdn_reinit":
+        return LEGACY_TEMPLATE.format(code=code, bundle=mermaid.CDN_URL)
+    return mermaid.diagram_html(code, svg=mermaid.render_svg(code) if mode == "server_svg" else None, local_bundle=True)
+
+
+def bench_apptest(n_suppliers, detail_limit, runs):
+    """{mode: (median rerun ms, delta KiB)} for unchanged-diagram reruns through AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).disabled = True
+    modes = ["cdn_reinit", "client"] + (["server_svg"] if shutil.which("mmdc") else [])
+    results = {}
+    for mode in modes:
+        at = AppTest.from_string(APPTEST_PAGE.format(mode=mode, n_suppliers=n_suppliers, detail_limit=detail_limit))
+        at.run()  # first run: imports and the diagram text
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - start) * 1e3)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        delta = sum(len(node.proto.SerializeToString()) for node in at.main.children.values())
+        results[mode] = (statistics.median(samples), delta / 1024)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suppliers", type=int, nargs="+", default=[10, 200, 2_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--detail-limit", type=int, help="Group suppliers above this count (default: draw every supplier)")
+    parser.add_argument("--apptest", action="store_true", help="Also time unchanged-diagram reruns through AppTest")
+    args = parser.parse_args(argv)
+
+    for n_suppliers in args.suppliers:
+        code = make_diagram(n_suppliers, args.detail_limit)
+        print(f"== {n_suppliers:,} suppliers ({len(code) / 1024:,.1f} KiB of Mermaid text) ==")
+        print(f"{'server side, per rerun':<28} {'python ms':>10} {'payload KiB':>12}")
+        for name, (ms, size) in bench_server(code, args.runs).items():
+            print(f"{name:<28} {ms:>10.3f} {size / 1024:>12.1f}")
+        browser = bench_browser(code, args.runs)
+        if browser is None:
+            print("(rerun-to-paint skipped: needs `pip install playwright && playwright install chromium` "
+                  "and `python -m oro_logic.mermaid fetch`)")
+        else:
+            print(f"{'rerun-to-paint':<28} {'ms':>10}")
+            for name, ms in browser.items():
+                print(f"{name:<28} {ms:>10.1f}")
+        if args.apptest:
+            print(f"{'AppTest rerun (proxy)':<28} {'ms':>10} {'delta KiB':>12}")
+            for name, (ms, size) in bench_apptest(n_suppliers, args.detail_limit, args.runs).items():
+                print(f"{name:<28} {ms:>10.1f} {size:>12.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Rerun latency of the running app, driven the way a browser drives it.
+
+    python -m benchmarks.bench_rerun                         # 10k-supplier scenario, 7 samples per interaction
+    python -m benchmarks.bench_rerun --suppliers 2000 --runs 15 --output rerun.json
+
+Starts ``streamlit run app.py`` headless against a temporary Blueprint Store
+holding one large blueprint, opens a session over the app's websocket
+protocol, loads the blueprint into the form ("📂 Load into form") and picks
+a category path, then times each interaction from the widget change being
+sent to the run finishing (``script_finished``), together with the bytes the
+server sent back. Like the browser, the client sends the id of the fragment
+a widget was drawn in, so fragment-only reruns are measured as such; runs
+cut short by ``st.rerun()`` are counted into the run that follows them.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import make_blueprint
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STARTUP_TIMEOUT_S = 60
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Session:
+    """One browser session: keeps every widget's state and resends it on each rerun"""
+
+    def __init__(self, ws):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        self._WidgetState = WidgetState
+        self.ws = ws
+        self.widgets = {}    # key -> (widget id, element type, element proto, fragment id)
+        self.states = {}     # widget id -> WidgetState
+        self.first_element_s = None  # of the last rerun: seconds until its first element arrived
+
+    async def rerun(self, fragment_id=""):
+        """Send a rerun and wait for it to finish; returns (seconds, bytes received, finish status).
+
+        The status is "EXCEPTION" when the app drew an exception.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        received, drawn, failed = 0, set(), False
+        self.first_element_s = None
+        while True:
+            raw = await self.ws.recv()
+            received += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                if self.first_element_s is None:
+                    self.first_element_s = time.perf_counter() - start
+                failed = failed or forward.delta.new_element.WhichOneof("type") == "exception"
+                drawn.add(self._register(forward.delta.new_element, forward.delta.fragment_id))
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(forward.script_finished)
+                if status != "FINISHED_EARLY_FOR_RERUN":
+                    break
+        # Buttons are triggers: they only fire for one run. Like the browser, forget widgets the
+        # run would have drawn but didn't (e.g. the previous page's data editor)
+        for key, (widget_id, _, _, widget_fragment) in list(self.widgets.items()):
+            if widget_id not in drawn and (not fragment_id or widget_fragment == fragment_id):
+                del self.widgets[key]
+                self.states.pop(widget_id, None)
+        for widget_id, state in list(self.states.items()):
+            if state.WhichOneof("value") == "trigger_value":
+                del self.states[widget_id]
+        return time.perf_counter() - start, received, "EXCEPTION" if failed else status
+
+    def _register(self, element, fragment_id):
+        element_type = element.WhichOneof("type")
+        proto = getattr(element, element_type)
+        widget_id = getattr(proto, "id", "") if hasattr(proto, "id") else ""
+        if widget_id.startswith("$$ID-") and widget_id.count("-") >= 2:
+            key = widget_id.split("-", 2)[2]
+            self.widgets[key] = (widget_id, element_type, proto, fragment_id)
+        return widget_id
+
+    def set(self, key, field, value):
+        """Set widget ``key`` (by its user key) and return the fragment id to rerun with"""
+        widget_id, _, _, fragment_id = self.widgets[key]
+        state = self._WidgetState(id=widget_id)
+        if field.endswith("array_value"):
+            getattr(state, field).data.extend(value)
+        else:
+            setattr(state, field, value)
+        self.states[widget_id] = state
+        return fragment_id
+
+    def options(self, key):
+        return list(self.widgets[key][2].options)
+
+    def editor_key(self):
+        return max((key for key in self.widgets if key.startswith("suppliers_editor_")),
+                   key=lambda key: int(key.rsplit("_", 1)[1]))
+
+
+async def _scenario(port, runs):
+    import websockets
+
+    results = {}
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                  max_size=None) as ws:
+        session = Session(ws)
+        await session.rerun()
+        await session.rerun(session.set("store_load", "trigger_value", True))
+        # Walk the category cascade so the L4 Select All button exists
+        for level in range(1, 4):
+            key = f"cat_l{level}_multiselect"
+            await session.rerun(session.set(key, "string_array_value", session.options(key)[:2]))
+
+        def text(key, label):
+            return lambda i: session.set(key, "string_value", f"{label} {i}")
+
+        def number(key, values):
+            return lambda i: session.set(key, "double_value", values[i % len(values)])
+
+        def editor(column, values):
+            def change(i):
+                delta = {"edited_rows": {"0": {column: values[i % len(values)]}}, "added_rows": [], "deleted_rows": []}
+                return session.set(session.editor_key(), "string_value", json.dumps(delta))
+            return change
+
+        interactions = {
+            "tactical comment": text("tact_comments_text_area", "note"),
+            "tactical threshold": number("threshold_input", [12000, 10000]),
+            "supplier comment": editor("Comments", ["checked", "re-checked"]),
+            "supplier logic type": editor("Logic Type", ["Sourcing", "Buying Channel"]),
+            "supplier page": number("suppliers_page", [2, 1]),
+            "diagram group size": number("diagram_detail_limit", [45, 50]),
+            "L4 select all": lambda i: session.set("select_all_l4" if i % 2 == 0 else "clear_all_l4", "trigger_value", True),
+        }
+        for name, change in interactions.items():
+            if (name == "supplier page" and "suppliers_page" not in session.widgets
+                    or name == "diagram group size" and "diagram_detail_limit" not in session.widgets):
+                continue
+            samples, sizes, full_runs, failed = [], [], 0, False
+            for i in range(runs + 1):
+                try:
+                    seconds, received, status = await session.rerun(change(i))
+                except KeyError:  # the widget is gone (the previous run failed)
+                    break
+                failed = failed or status == "EXCEPTION"
+                if i:  # first sample warms the memoized views for this interaction
+                    samples.append(seconds)
+                    sizes.append(received)
+                    full_runs += status != "FINISHED_FRAGMENT_RUN_SUCCESSFULLY"
+            if not samples:
+                samples, sizes = [seconds], [received]
+            results[name] = {
+                "runs": len(samples),
+                "median_ms": statistics.median(samples) * 1e3,
+                "p90_ms": sorted(samples)[int(0.9 * (len(samples) - 1))] * 1e3,
+                "median_kib": statistics.median(sizes) / 1024,
+                "run": ("exception" if failed else "fragment" if not full_runs else
+                        "full page" if full_runs == len(samples) else f"full page {full_runs} of {len(samples)}"),
+            }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time widget interactions against a running app")
+    parser.add_argument("--suppliers", type=int, default=10_000, help="Supplier Pool size of the loaded blueprint")
+    parser.add_argument("--runs", type=int, default=7, help="Samples per interaction")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    from oro_logic.store import BlueprintStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "bench.sqlite")
+        BlueprintStore(store_path).save(make_blueprint(n_suppliers=args.suppliers), label="bench")
+        port = _free_port()
+        env = dict(os.environ, ORO_STORE_PATH=store_path)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+            env=env, cwd=os.path.dirname(APP_PATH), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.time() + STARTUP_TIMEOUT_S
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise SystemExit("streamlit server did not start")
+                    time.sleep(0.2)
+            results = asyncio.run(_scenario(port, args.runs))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{args.suppliers:,} suppliers, {args.runs} runs per interaction")
+    print(f"{'interaction':<22} {'median ms':>10} {'p90 ms':>8} {'KiB sent':>9}  run")
+    for name, row in results.items():
+        print(f"{name:<22} {row['median_ms']:>10.0f} {row['p90_ms']:>8.0f} {row['median_kib']:>9.1f}  {row['run']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"suppliers": args.suppliers, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: vectorized requisition routing and the compiled decision table.
+
+    python -m benchmarks.bench_routing                      # 10k, 100k, 1M lines
+    python -m benchmarks.bench_routing --rows 5000000
+    python -m benchmarks.bench_routing --blueprints 1000    # compiled table over many scopes
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.workload import make_blueprint, make_requisitions
+from oro_logic.decision_table import CompiledRules, compile_blueprints
+from oro_logic.routing import route_requisitions
+
+
+def make_scoped_blueprints(n_blueprints, n_markets=50, n_l4=250, seed=0):
+    """Many blueprints, each owning a slice of L4 x market scopes"""
+    rng = np.random.default_rng(seed)
+    blueprints = []
+    for i in range(n_blueprints):
+        blueprint = make_blueprint(n_markets=0, n_l4=0, n_suppliers=50, seed=seed + i)
+        blueprint["category"]["l4"] = [f"L4-{j}" for j in rng.choice(n_l4, 3, replace=False)]
+        blueprint["scope"]["end_markets"] = [f"Market {j}" for j in rng.choice(n_markets, 5, replace=False)]
+        blueprint["stream2"]["tactical_threshold"] = int(rng.integers(1, 50)) * 1000
+        blueprint["buying_channels"]["marketplace_limit"] = int(rng.integers(1, 20)) * 100
+        blueprints.append(blueprint)
+    return blueprints
+
+
+def check_compiled(blueprint, requisitions, seed=0):
+    """Assert the compiled table routes like ``route_requisitions``, with and without supplier names.
+
+    With names, a tenth of the lines also carry a Buying Channels table vendor
+    code, so a pool supplier matched by name has to win over the table.
+    """
+    rng = np.random.default_rng(seed)
+    pool_names = [supp["Supplier Name"] for supp in blueprint["supplier_pool"]["suppliers"] if supp["Supplier Name"]]
+    table_codes = [channel["Vendor Code"] for channel in blueprint["buying_channels"]["channels"]]
+    named = requisitions.assign(supplier_name=rng.choice(pool_names + [""] * len(pool_names), len(requisitions)))
+    table = rng.random(len(named)) < 0.1
+    named.loc[table, "vendor_code"] = rng.choice(table_codes, table.sum())
+
+    compiled = compile_blueprints(blueprint)
+    columns = ["route", "route_detail", "route_reason"]
+    for sample in (requisitions, named):
+        expected = route_requisitions(blueprint, sample)[columns].astype(str)
+        batch = compiled.decide_batch(sample)[columns].astype(str)
+        assert batch.equals(expected), "decide_batch differs from route_requisitions"
+        head = sample.head(2_000)
+        single = [compiled.decide(row["l4"], row["end_market"], row["vendor_code"], row["amount"],
+                                  item_code=row["item_code"], supplier_name=row.get("supplier_name"))
+                  for row in head.to_dict("records")]
+        assert [tuple(row) for row in expected.head(len(head)).itertuples(index=False)] == \
+            [(route, detail, str(reason)) for route, detail, reason in single], "decide differs from route_requisitions"
+
+
+def _percentile_us(samples, q):
+    return np.percentile(samples, q) * 1e6
+
+
+def bench_compiled(blueprints, rows):
+    start = time.perf_counter()
+    compiled = compile_blueprints(blueprints)
+    compile_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.pkl")
+        compiled.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        compiled = CompiledRules.load(path)
+        load_s = time.perf_counter() - start
+    print(f"compiled {len(blueprints):,} blueprint(s): compile {compile_s * 1e3:.1f} ms, "
+          f"artifact {size / 1024:.0f} KiB, load {load_s * 1e3:.1f} ms")
+
+    # Single decisions
+    sample = make_requisitions(20_000, seed=1)
+    records = list(sample[["l4", "end_market", "vendor_code", "amount", "item_code"]].itertuples(index=False, name=None))
+    latencies = np.empty(len(records))
+    for i, (l4, market, vendor, amount, item_code) in enumerate(records):
+        start = time.perf_counter()
+        compiled.decide(l4, market, vendor, amount, item_code=item_code)
+        latencies[i] = time.perf_counter() - start
+    print(f"single decide(): p50 {_percentile_us(latencies, 50):.1f} us, p99 {_percentile_us(latencies, 99):.1f} us, "
+          f"{len(records) / latencies.sum():,.0f} decisions/s")
+
+    # Batches
+    print(f"{'batch rows':>10} {'seconds':>9} {'lines/s':>12}")
+    for n_rows in rows:
+        requisitions = make_requisitions(n_rows)
+        start = time.perf_counter()
+        compiled.decide_batch(requisitions)
+        elapsed = time.perf_counter() - start
+        print(f"{n_rows:>10,} {elapsed:>9.3f} {n_rows / elapsed:>12,.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--blueprints", type=int, default=1,
+                        help="Number of scoped blueprints compiled into one decision table")
+    args = parser.parse_args(argv)
+
+    blueprint = make_blueprint()
+    check_compiled(blueprint, make_requisitions(20_000, seed=2))
+    print("compiled decision table matches route_requisitions (with and without supplier names)")
+    print("== route_requisitions (single blueprint, interpreted) ==")
+    print(f"{'rows':>10} {'seconds':>9} {'lines/s':>12}")
+    for n_rows in args.rows:
+        requisitions = make_requisitions(n_rows)
+        start = time.perf_counter()
+        routed = route_requisitions(blueprint, requisitions)
+        elapsed = time.perf_counter() - start
+        print(f"{n_rows:>10,} {elapsed:>9.3f} {n_rows / elapsed:>12,.0f}")
+    print(routed["route"].value_counts().to_string())
+    print("-- same lines, Stream 2 (sourcing) disabled --")
+    print(route_requisitions(make_blueprint(sourcing=False), requisitions)["route"].value_counts().to_string())
+
+    print()
+    print("== compiled decision table ==")
+    blueprints = [blueprint] if args.blueprints == 1 else make_scoped_blueprints(args.blueprints)
+    bench_compiled(blueprints, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Cold-start cost of the app: what its imports cost and how long the first render takes.
+
+    python -m benchmarks.bench_startup                       # 3 cold server starts, empty taxonomy cache
+    python -m benchmarks.bench_startup --runs 5 --warm-cache --output startup.json
+
+Imports: runs app.py's top-level import statements in a fresh interpreter
+under ``python -X importtime`` and reports the total plus the cumulative
+cost of each module they pull in first (so a new heavy import shows up by
+name).
+
+First render: starts ``streamlit run app.py`` headless (a temporary Blueprint
+Store and, unless ``--warm-cache``, an empty taxonomy cache, as on a fresh
+deploy), then times the server coming up, the first session's first
+element (first paint) and finished run (first render), and a second
+session's first run (the cost every new visitor pays on a warm process).
+"""
+
+import argparse
+import ast
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_rerun import APP_PATH, STARTUP_TIMEOUT_S, Session, _free_port
+
+
+def app_imports():
+    """Source of app.py's module-level import statements (with the ``try`` blocks guarding optional ones)"""
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imports = (ast.Import, ast.ImportFrom)
+    return "\n".join(
+        ast.unparse(node) for node in tree.body
+        if isinstance(node, imports) or isinstance(node, ast.Try) and any(isinstance(n, imports) for n in node.body)
+    )
+
+
+def import_profile():
+    """(total ms, {module: cumulative ms}) for the modules app.py's imports load first"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", app_imports()],
+        cwd=os.path.dirname(APP_PATH), capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):  # top level of the import tree
+            modules[name.strip()] = int(cumulative) / 1e3
+    return sum(modules.values()), modules
+
+
+async def _first_runs(port):
+    import websockets
+
+    timings = {}
+    for name in ("first session", "second session"):
+        start = time.perf_counter()
+        async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                      max_size=None) as ws:
+            session = Session(ws)
+            connected = time.perf_counter() - start
+            seconds, _, status = await session.rerun()
+        if status == "EXCEPTION":
+            raise SystemExit(f"{name}: the app raised an exception")
+        timings[f"{name} paint ms"] = (connected + session.first_element_s) * 1e3
+        timings[f"{name} render ms"] = (connected + seconds) * 1e3
+    return timings
+
+
+def first_render(warm_cache):
+    """Timings of one server start and its first two sessions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, ORO_STORE_PATH=os.path.join(tmp, "bench.sqlite"))
+        if not warm_cache:
+            env["ORO_TAXONOMY_CACHE"] = os.path.join(tmp, "taxonomy")
+        port = _free_port()
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+            env=env, cwd=os.path.dirname(APP_PATH), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.time() + STARTUP_TIMEOUT_S
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise SystemExit("streamlit server did not start")
+                    time.sleep(0.02)
+            timings = {"server up ms": (time.perf_counter() - start) * 1e3}
+            timings.update(asyncio.run(_first_runs(port)))
+        finally:
+            server.terminate()
+            server.wait()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile app imports and time the first render")
+    parser.add_argument("--runs", type=int, default=3, help="Server starts (medians are reported)")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the taxonomy cache in .cache/taxonomy")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports to list")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    imports = {name: statistics.median(modules.get(name, 0.0) for _, modules in profiles) for name in profiles[0][1]}
+    starts = [first_render(args.warm_cache) for _ in range(args.runs)]
+    render = {name: statistics.median(run[name] for run in starts) for name in starts[0]}
+
+    print(f"app.py imports: {statistics.median(total for total, _ in profiles):.0f} ms")
+    for name, ms in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<34} {ms:>7.1f} ms")
+    print(f"first render ({'warm' if args.warm_cache else 'empty'} taxonomy cache, median of {args.runs}):")
+    for name, ms in render.items():
+        print(f"  {name:<34} {ms:>7.0f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"warm_cache": args.warm_cache, "runs": args.runs, "imports_ms": imports,
+                       "first_render_ms": render, "samples": starts}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Load test for the local routing service (oro_logic.service).
+
+    python -m benchmarks.loadtest_service                          # spawn a service on a synthetic rule set
+    python -m benchmarks.loadtest_service --port 8600 --no-spawn   # hit an already running instance
+    python -m benchmarks.loadtest_service --batch 500 --concurrency 8
+
+Each client keeps one HTTP/1.1 keep-alive connection open and sends requests
+back to back; reports throughput and p50/p99 latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.workload import make_blueprint, make_requisitions
+from oro_logic.rulesets import save_blueprint
+
+
+async def _request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _client(host, port, payloads, path, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, path, random.choice(payloads))
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration, batch):
+    records = make_requisitions(20_000, seed=2)[["l4", "end_market", "vendor_code", "amount", "item_code"]].to_dict("records")
+    if batch:
+        path = "/route/batch"
+        payloads = [{"requisitions": records[i:i + batch]} for i in range(0, len(records) - batch + 1, batch)]
+    else:
+        path = "/route"
+        payloads = records
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, payloads, path, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def _wait_for_port(host, port, timeout=30):
+    async def probe():
+        _, writer = await asyncio.open_connection(host, port)
+        writer.close()
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Service did not start on {host}:{port}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8650)
+    parser.add_argument("--no-spawn", action="store_true", help="Don't start a service; use the one on --port")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--batch", type=int, default=0, help="Lines per request (0 = single /route requests)")
+    args = parser.parse_args(argv)
+
+    service = None
+    with tempfile.TemporaryDirectory() as rules_dir:
+        if not args.no_spawn:
+            save_blueprint(make_blueprint(), rules_dir)
+            service = subprocess.Popen(
+                [sys.executable, "-m", "oro_logic.service", "--host", args.host, "--port", str(args.port), "--rules", rules_dir],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        try:
+            _wait_for_port(args.host, args.port)
+            latencies, errors, elapsed = asyncio.run(
+                run_load(args.host, args.port, args.concurrency, args.duration, args.batch))
+        finally:
+            if service is not None:
+                service.terminate()
+                service.wait()
+
+    lines = len(latencies) * (args.batch or 1)
+    print(f"requests:    {len(latencies):,} in {elapsed:.1f}s ({len(errors)} errors), concurrency {args.concurrency}")
+    print(f"throughput:  {len(latencies) / elapsed:,.0f} req/s, {lines / elapsed:,.0f} lines/s")
+    print(f"latency:     p50 {np.percentile(latencies, 50) * 1e3:.2f} ms, p99 {np.percentile(latencies, 99) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Concurrent-session load test of app.py: many browser sessions on one server process.
+
+    python -m benchmarks.loadtest_sessions                       # 8 sessions at once, 5k suppliers each
+    python -m benchmarks.loadtest_sessions --sessions 16 --suppliers 10000 --output load.json
+
+Starts ``streamlit run app.py`` headless against a temporary Blueprint Store
+and opens ``--sessions`` sessions over the app's websocket protocol (the
+``bench_rerun`` client), all in one server process as in a deployment: their
+scripts run on the server's threads, contend for its interpreter (the GIL)
+and share its process-wide caches. One session opens the page first to warm
+the server (imports, the shared taxonomy); then every session walks the same
+script at once, one rerun per step: open the page, pick a region and a
+cluster, Select All markets, Select All L1 to L4, paste the suppliers into
+the Supplier Pool editor (sent as the browser sends it: the editor's
+``added_rows`` delta), allow the marketplace and generate the output.
+Reported:
+
+- rerun latency per step and overall (p50 / p90 / p99), from the widget
+  change being sent to the run finishing, under that contention
+- the server's RSS, measured: once warm, with every session still connected
+  after its run, and at its peak; the per-session figure is the growth
+  divided by the number of sessions
+
+The clients run in this process; on a machine with few CPUs they compete
+with the server for them, so run it where the server has CPUs of its own
+when sizing a deployment.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_rerun import APP_PATH, STARTUP_TIMEOUT_S, Session, _free_port
+
+SCRIPT_TIMEOUT_S = 300
+SAMPLE_INTERVAL_S = 0.05
+
+
+def rss_bytes(pid="self"):
+    """Current resident set size of a process (Linux /proc); None where that isn't available"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def scenario(session, suppliers):
+    """(step name, change) pairs; each change sets a widget and returns the fragment id to rerun"""
+
+    def select_first(key):
+        return lambda: session.set(key, "string_value", session.options(key)[0])
+
+    def click(key):
+        return lambda: session.set(key, "trigger_value", True)
+
+    def paste():
+        delta = {"edited_rows": {}, "added_rows": suppliers, "deleted_rows": []}
+        return session.set(session.editor_key(), "string_value", json.dumps(delta))
+
+    return [
+        ("open page", lambda: ""),
+        ("region", select_first("geo_region")),
+        ("cluster", select_first("geo_cluster")),
+        ("select all markets", click("select_all_markets")),
+        ("select all L1", click("select_all_l1")),
+        ("select all L2", click("select_all_l2")),
+        ("select all L3", click("select_all_l3")),
+        ("select all L4", click("select_all_l4")),
+        ("paste suppliers", paste),
+        ("allow marketplace", lambda: session.set("allow_mkp_toggle", "bool_value", True)),
+        ("generate output", click("generate_output")),
+    ]
+
+
+def _connect(port):
+    import websockets
+
+    return websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+
+
+async def _session(index, port, suppliers, start, walked, release):
+    """Walk the scenario once every session is connected; stay connected until the server's memory is read"""
+    result = {"session": index, "steps": {}, "error": None}
+    try:
+        async with _connect(port) as ws:
+            session = Session(ws)
+            try:
+                await start.wait()
+                for name, change in scenario(session, suppliers):
+                    seconds, _, status = await asyncio.wait_for(session.rerun(change()), SCRIPT_TIMEOUT_S)
+                    result["steps"][name] = seconds
+                    if status == "EXCEPTION":
+                        raise RuntimeError(f"{name}: the app raised an exception")
+            except Exception as e:  # reported with the results; the other sessions carry on
+                result["error"] = f"{type(e).__name__}: {e}"
+                await start.abort()
+            await walked.wait()
+            await release.wait()
+    except Exception as e:
+        result["error"] = result["error"] or f"{type(e).__name__}: {e}"
+        await start.abort()
+        await walked.wait()
+    return result
+
+
+async def _load(port, pid, supplier_sets):
+    async with _connect(port) as ws:  # warm the server: imports, the shared taxonomy
+        await asyncio.wait_for(Session(ws).rerun(), SCRIPT_TIMEOUT_S)
+    baseline = rss_bytes(pid)
+
+    n_sessions = len(supplier_sets)
+    start, walked, release = asyncio.Barrier(n_sessions), asyncio.Barrier(n_sessions + 1), asyncio.Event()
+    peak = baseline or 0
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, rss_bytes(pid) or 0)
+            await asyncio.sleep(SAMPLE_INTERVAL_S)
+
+    sampler = asyncio.create_task(sample())
+    sessions = [asyncio.create_task(_session(index, port, suppliers, start, walked, release))
+                for index, suppliers in enumerate(supplier_sets)]
+    await walked.wait()
+    held = rss_bytes(pid)
+    release.set()
+    results = await asyncio.gather(*sessions)
+    sampler.cancel()
+
+    memory = {"baseline_rss": baseline, "sessions_rss": held, "peak_rss": max(peak, held or 0) or None}
+    if baseline and held:
+        memory["per_session_rss"] = (held - baseline) / n_sessions
+    return results, memory
+
+
+def run_load(n_sessions, n_suppliers):
+    """Run ``n_sessions`` sessions against one server process; returns (per-session results, server memory)"""
+    from benchmarks.workload import make_supplier_pool
+
+    supplier_sets = [make_supplier_pool(n_suppliers, seed=index).to_dict("records") for index in range(n_sessions)]
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        env = dict(os.environ, ORO_STORE_PATH=os.path.join(tmp, "loadtest.sqlite"))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+            env=env, cwd=os.path.dirname(APP_PATH), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.time() + STARTUP_TIMEOUT_S
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise SystemExit("streamlit server did not start")
+                    time.sleep(0.2)
+            return asyncio.run(_load(port, server.pid, supplier_sets))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1e3
+    return {"runs": len(ordered), "p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1e3}
+
+
+def summarize(sessions, memory):
+    ok = [session for session in sessions if not session["error"]]
+    steps = {}
+    for session in ok:
+        for name, seconds in session["steps"].items():
+            steps.setdefault(name, []).append(seconds)
+    return {
+        "sessions": len(sessions),
+        "failed": [session["error"] for session in sessions if session["error"]],
+        "steps": {name: _percentiles(samples) for name, samples in steps.items()},
+        "overall": _percentiles([seconds for samples in steps.values() for seconds in samples]) if steps else None,
+        **memory,
+        "client_peak_rss": peak_rss_bytes(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive one app server with concurrent browser sessions")
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions run concurrently")
+    parser.add_argument("--suppliers", type=int, default=5_000, help="Suppliers each session pastes")
+    parser.add_argument("--output", help="Write the summary and per-session results as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    sessions, memory = run_load(args.sessions, args.suppliers)
+    summary = summarize(sessions, memory)
+    elapsed = time.perf_counter() - start
+
+    mib = lambda value: f"{value / 2**20:,.0f} MiB" if value else "n/a"
+    print(f"{args.sessions} sessions x {args.suppliers:,} suppliers on one server process, "
+          f"{os.cpu_count()} CPUs shared with the clients ({elapsed:.0f}s)")
+    for error in summary["failed"]:
+        print(f"  failed: {error}")
+    if summary["overall"]:
+        print(f"{'step':<20} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, row in [*summary["steps"].items(), ("(all reruns)", summary["overall"])]:
+            print(f"{name:<20} {row['p50_ms']:>8.0f} {row['p90_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['max_ms']:>8.0f}")
+    print(f"server RSS: {mib(summary.get('baseline_rss'))} warm, {mib(summary.get('sessions_rss'))} "
+          f"holding {args.sessions} sessions, {mib(summary.get('peak_rss'))} peak "
+          f"(~{mib(summary.get('per_session_rss'))} per session)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"suppliers": args.suppliers, "summary": summary, "sessions": sessions}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
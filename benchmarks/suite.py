@@ -0,0 +1,185 @@
+"""Benchmark suite: times every stage of an app rerun on synthetic workloads.
+
+    python -m benchmarks.suite                                # writes benchmarks/results/suite_<timestamp>.json
+    python -m benchmarks.suite --quick                        # small sizes, fewer repeats
+    python -m benchmarks.suite --compare benchmarks/results/suite_20240101_120000.json
+
+Stages: hierarchy building, taxonomy index build, cascade options (cold and
+cached), taxonomy search (index build and typeahead queries), flow graph building, Mermaid generation (full and grouped), JSON serialization
+and loading, the output preview, the .oro container (build and load) and
+Excel export, each over a range of taxonomy / supplier-pool sizes.
+Results are written as JSON (one record per stage and size, plus run
+metadata), so runs can be diffed over time; ``--compare`` prints the
+median ratio against a previous run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.workload import make_blueprint, make_taxonomy
+from oro_logic.container import build_container, read_container
+from oro_logic.export import blueprint_json, blueprint_preview, build_excel
+from oro_logic.flow import DETAIL_LIMIT, build_flow_graph
+from oro_logic.hierarchy import HierarchyIndex, build_cat_hierarchy, build_geo_hierarchy
+from oro_logic.search import PathSearchIndex
+from oro_logic.taxonomy import Taxonomy
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCHEMA_VERSION = 1
+SLOWER_RATIO = 1.2  # flagged in --compare output
+
+
+def measure(fn, setup=None, repeat=5):
+    """min / median / max wall time of ``fn(setup())`` (setup is not timed)"""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        samples.append(time.perf_counter() - start)
+    return {"repeat": repeat, "min_s": min(samples), "median_s": statistics.median(samples), "max_s": max(samples)}
+
+
+def _cascade(geo_index, cat_index):
+    """The option lists a user walks through: region -> cluster -> markets -> company codes, L1 -> L4"""
+    regions = geo_index.options()
+    clusters = geo_index.options([regions[0]])
+    markets = geo_index.options([regions[0], clusters[0]])
+    geo_index.options([regions[0], clusters[0], markets[:5]])
+    l1 = cat_index.options()
+    l2 = cat_index.options([l1[:2]])
+    l3 = cat_index.options([l1[:2], l2[:3]])
+    cat_index.options([l1[:2], l2[:3], l3[:10]])
+
+
+def bench_taxonomy(n_l4, repeat):
+    geo_df, cat_df = make_taxonomy(n_markets=max(n_l4 // 10, 50), n_l4=n_l4)
+    params = {"markets": len(geo_df), "l4": n_l4}
+    geo_levels = ("Region", "DRBU", "End Market", "Company Code")
+    cat_levels = ("L1", "L2", "L3", "L4")
+    yield "geo_hierarchy", params, measure(lambda: build_geo_hierarchy(geo_df), repeat=repeat)
+    yield "cat_hierarchy", params, measure(lambda: build_cat_hierarchy(cat_df), repeat=repeat)
+    yield "taxonomy_index", params, measure(
+        lambda: Taxonomy("bench", geo_df.copy(), cat_df.copy()), repeat=repeat)
+    # Cold: fresh indexes (empty option caches); warm: the same indexes again (a typical rerun)
+    fresh = lambda: (HierarchyIndex(geo_df, geo_levels), HierarchyIndex(cat_df, cat_levels))
+    yield "cascade_options_cold", params, measure(lambda idx: _cascade(*idx), setup=fresh, repeat=repeat)
+    warm = fresh()
+    _cascade(*warm)
+    yield "cascade_options_cached", params, measure(lambda: _cascade(*warm), repeat=repeat)
+    paths = warm[1].paths()
+    yield "search_index", params, measure(lambda: PathSearchIndex(paths), repeat=repeat)
+    search = PathSearchIndex(paths)
+    # A user typing a leaf name: broad prefixes first, then the exact label
+    queries = ["l", "l4", "l4-1", f"l4-{n_l4 // 2}", f"l3 l4-{n_l4 // 2}"]
+    yield "search_queries", params, measure(lambda: [search.search(q) for q in queries], repeat=repeat)
+
+
+def bench_suppliers(n_suppliers, repeat):
+    params = {"suppliers": n_suppliers}
+    blueprint = make_blueprint(n_suppliers=n_suppliers)
+    yield "flow_graph", params, measure(lambda: build_flow_graph(blueprint), repeat=repeat)
+    graph = build_flow_graph(blueprint)
+    yield "mermaid", params, measure(graph.to_mermaid, repeat=repeat)
+    yield "mermaid_grouped", params, measure(
+        lambda: build_flow_graph(blueprint, detail_limit=DETAIL_LIMIT).to_mermaid(), repeat=repeat)
+    yield "blueprint_json", params, measure(lambda: blueprint_json(blueprint), repeat=repeat)
+    yield "blueprint_preview", params, measure(lambda: blueprint_preview(blueprint), repeat=repeat)
+    text = json.dumps(blueprint, ensure_ascii=False)
+    yield "json_load", params, measure(lambda: json.loads(text), repeat=repeat)
+    yield "container_build", params, measure(lambda: build_container(blueprint), repeat=repeat)
+    container = build_container(blueprint)
+    yield "container_load", params, measure(lambda: read_container(container), repeat=repeat)
+    yield "container_load_frames", params, measure(lambda: read_container(container, frames=True), repeat=repeat)
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return
+    yield "excel_export", params, measure(lambda: build_excel(blueprint), repeat=max(1, repeat // 2))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(taxonomy_sizes, supplier_sizes, repeat=5, log=print):
+    """Run every stage; returns the JSON-serializable report"""
+    results = []
+    benches = [(bench_taxonomy, n) for n in taxonomy_sizes] + [(bench_suppliers, n) for n in supplier_sizes]
+    for bench, size in benches:
+        for name, params, timing in bench(size, repeat):
+            results.append({"name": name, "params": params, **timing})
+            log(f"{name:<24} {json.dumps(params):<32} median {timing['median_s'] * 1e3:>10.2f} ms")
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+
+def _key(record):
+    return record["name"], json.dumps(record["params"], sort_keys=True)
+
+
+def compare(baseline, current):
+    """Print median ratios (current / baseline) for every stage present in both runs"""
+    old = {_key(r): r for r in baseline["results"]}
+    print(f"\nvs {baseline['meta'].get('commit') or '?'} ({baseline['meta'].get('created_at', '?')})")
+    print(f"{'stage':<24} {'params':<32} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for record in current["results"]:
+        before = old.get(_key(record))
+        if before is None:
+            continue
+        ratio = record["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+        flag = "  slower" if ratio > SLOWER_RATIO else ""
+        print(f"{record['name']:<24} {_key(record)[1]:<32} {before['median_s'] * 1e3:>10.2f} "
+              f"{record['median_s'] * 1e3:>10.2f} {ratio:>6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--l4", type=int, nargs="+", default=[1_000, 20_000, 100_000], help="Taxonomy sizes (L4 leaves)")
+    parser.add_argument("--suppliers", type=int, nargs="+", default=[10, 1_000, 10_000, 50_000], help="Supplier pool sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Small sizes and 3 repeats (smoke run)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/suite_<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.l4, args.suppliers, args.repeat = [1_000], [10, 1_000], 3
+
+    report = run_suite(args.l4, args.suppliers, args.repeat)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"suite_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
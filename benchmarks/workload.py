@@ -0,0 +1,192 @@
+"""Synthetic workloads shaped like the real inputs.
+
+    python -m benchmarks.workload out/ --markets 400 --l4 5000 --suppliers 50000 --requisitions 1000000
+
+Writes a taxonomy extract (geography + category CSVs), a supplier pool in the
+editor's column layout, a marketplace blacklist, a requisition file and a
+complete v2.0 blueprint. Everything is seeded, so two runs with the same
+arguments produce identical files.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from oro_logic.blueprint import SUPPLIER_COLUMNS
+
+SUPPLIER_TYPES = ["Local", "Global", ""]
+LOGIC_TYPES = ["Buying Channel", "Sourcing", ""]
+CHANNEL_TYPES = ["Hosted Catalog", "Punch-out", "Web Form", "Free Text", "P-Card"]
+TENDER_OPTIONS = ["No", "Yes - Every Time", "Yes - Above Threshold", ""]
+
+
+def _labels(prefix, ids, fmt="{}"):
+    """Vectorized f"{prefix}{id}" over an integer array"""
+    return pd.Series(ids).map(lambda i: prefix + fmt.format(i))
+
+
+def make_taxonomy(n_regions=5, n_clusters=40, n_markets=400, n_l4=5_000, seed=0):
+    """(geo_df, cat_df) with the columns of the taxonomy extract.
+
+    The category tree fans out 8 L1 -> 60 L2 -> 600 L3 -> ``n_l4`` leaves.
+    """
+    rng = np.random.default_rng(seed)
+    market_ids = np.arange(n_markets)
+    cluster_ids = rng.integers(0, n_clusters, n_markets)
+    geo_df = pd.DataFrame({
+        "Region": _labels("Region ", cluster_ids % n_regions),
+        "DRBU": _labels("DRBU ", cluster_ids),
+        "End Market": _labels("Market ", market_ids),
+        "Company Code": _labels("CC", market_ids, "{:04d}"),
+    })
+    leaf_ids = np.arange(n_l4)
+    l3_ids = rng.integers(0, min(600, n_l4), n_l4)
+    cat_df = pd.DataFrame({
+        "L1": _labels("L1-", l3_ids % 8),
+        "L2": _labels("L2-", l3_ids % 60),
+        "L3": _labels("L3-", l3_ids),
+        "L4": _labels("L4-", leaf_ids),
+    })
+    return geo_df, cat_df
+
+
+def make_supplier_pool(n_suppliers, seed=0, blank_names=0.02):
+    """Supplier pool in the data editor's layout (a few rows left without a name, as in real edits)"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_suppliers)
+    names = _labels("Supplier ", ids)
+    names[rng.random(n_suppliers) < blank_names] = ""
+    return pd.DataFrame({
+        "Supplier Name": names,
+        "Vendor Code": _labels("V", ids, "{:06d}"),
+        "Supplier Type": rng.choice(SUPPLIER_TYPES, n_suppliers),
+        "Logic Type": rng.choice(LOGIC_TYPES, n_suppliers),
+        "Buying Channel": rng.choice(CHANNEL_TYPES, n_suppliers),
+        "Tender Required": rng.choice(TENDER_OPTIONS, n_suppliers, p=[0.7, 0.1, 0.1, 0.1]),
+        "Comments": "",
+    }, columns=SUPPLIER_COLUMNS)
+
+
+def make_blacklist(n_items, seed=0):
+    """Marketplace blacklist records as stored in the blueprint"""
+    rng = np.random.default_rng(seed)
+    return [
+        {"item_name": f"Item {i}", "item_code": f"SKU{i}", "category": f"L4-{c}", "reason": "Restricted"}
+        for i, c in zip(range(n_items), rng.integers(0, 5_000, n_items))
+    ]
+
+
+def make_blueprint(n_markets=40, n_l4=200, n_suppliers=2_000, n_blacklist=100, seed=0, sourcing=True):
+    """Complete v2.0 blueprint (same shape as the app's ``output_data``); ``sourcing=False`` turns Stream 2 off"""
+    suppliers = make_supplier_pool(n_suppliers, seed=seed, blank_names=0).to_dict("records")
+    return {
+        "scope": {
+            "region": "R", "cluster": "C",
+            "end_markets": [f"Market {i}" for i in range(n_markets)],
+            "business_user_markets": [],
+            "company_code": "N/A",
+        },
+        "category": {
+            "full_path": "L1-0 > L2-0 > L3-0 > L4-0",
+            "l1": ["L1-0"], "l2": ["L2-0"], "l3": ["L3-0"],
+            "l4": [f"L4-{i}" for i in range(n_l4)],
+        },
+        "supplier_pool": {"enabled": True, "suppliers": suppliers, "supplier_type_filter": "All"},
+        "buying_channels": {
+            "enabled": True,
+            "channels": [{"Channel Type": "Punch-out", "Supplier": "", "Vendor Code": f"V{i:06d}", "Link": "", "Comments": ""}
+                         for i in range(n_suppliers, n_suppliers + 200)],
+            "allow_marketplace": True,
+            "marketplace_limit": 500,
+            "marketplace_blacklist": make_blacklist(n_blacklist, seed=seed),
+        },
+        "stream2": {
+            "enabled": sourcing,
+            "tactical_threshold": 10000,
+            "tactical": {"enabled": True, "action": "Fairmarkit (Autonomous)", "manager": "", "comments": ""},
+            "strategic": {"enabled": True, "owner": "Global Category Lead", "manager": "", "comments": ""},
+            "instructions": "",
+        },
+        "metadata": {"created_at": "2024-01-01T00:00:00", "version": "2.0"},
+    }
+
+
+def make_requisitions(n_rows, n_markets=40, n_l4=200, n_vendors=2_000, n_blacklist=100, marketplace_limit=500,
+                      out_of_scope=0.1, unknown_vendors=0.15, blacklisted=0.05, seed=0):
+    """Requisition lines (l4, end_market, vendor_code, amount, item_code) against ``make_blueprint``'s scope.
+
+    Most lines buy from the blueprint's Supplier Pool at log-normal amounts
+    (Buying Channel, Tactical, Strategic). The given shares reach the other
+    routes: ``out_of_scope`` lines fall outside its L4s or markets (Reject),
+    ``unknown_vendors`` lines come from vendors it doesn't know, below the
+    marketplace limit (Marketplace), and ``blacklisted`` ones do the same for
+    a blacklisted item (on to Sourcing).
+    """
+    rng = np.random.default_rng(seed)
+    l4 = rng.integers(0, n_l4, n_rows)
+    market = rng.integers(0, n_markets, n_rows)
+    vendor = _labels("V", rng.integers(0, n_vendors, n_rows), "{:06d}").to_numpy(dtype=object)
+    amount = rng.lognormal(7, 2, n_rows).round(2)
+    item = rng.integers(n_blacklist, n_blacklist + 10_000, n_rows)
+
+    kind = rng.choice(4, n_rows, p=[out_of_scope, unknown_vendors, blacklisted,
+                                    1 - out_of_scope - unknown_vendors - blacklisted])
+    outside = kind == 0
+    outside_l4 = outside & (rng.random(n_rows) < 0.5)
+    l4[outside_l4] += n_l4
+    market[outside & ~outside_l4] += n_markets
+    unknown = (kind == 1) | (kind == 2)
+    vendor[unknown] = _labels("N", rng.integers(0, n_vendors, unknown.sum()), "{:06d}").to_numpy(dtype=object)
+    amount[unknown] = rng.uniform(1, marketplace_limit - 1, unknown.sum()).round(2)
+    item[kind == 2] = rng.integers(0, max(n_blacklist, 1), (kind == 2).sum())
+    return pd.DataFrame({
+        "l4": _labels("L4-", l4),
+        "end_market": _labels("Market ", market),
+        "vendor_code": vendor,
+        "amount": amount,
+        "item_code": _labels("SKU", item),
+    })
+
+
+def write_workload(directory, n_markets=400, n_l4=5_000, n_suppliers=50_000, n_blacklist=1_000,
+                   n_requisitions=100_000, seed=0):
+    """Write every workload file into ``directory``; returns {name: path}"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, name) for name in (
+        "geo_master.csv", "categories.csv", "suppliers.csv", "blacklist.csv", "requisitions.csv", "blueprint.json")}
+    geo_df, cat_df = make_taxonomy(n_markets=n_markets, n_l4=n_l4, seed=seed)
+    geo_df.to_csv(paths["geo_master.csv"], index=False)
+    cat_df.to_csv(paths["categories.csv"], index=False)
+    make_supplier_pool(n_suppliers, seed=seed).to_csv(paths["suppliers.csv"], index=False)
+    pd.DataFrame(make_blacklist(n_blacklist, seed=seed)).to_csv(paths["blacklist.csv"], index=False)
+    scope_markets, scope_l4 = min(n_markets, 40), min(n_l4, 200)  # the blueprint's scope; requisitions target it
+    make_requisitions(n_requisitions, n_markets=scope_markets, n_l4=scope_l4, n_vendors=n_suppliers,
+                      n_blacklist=n_blacklist, seed=seed).to_csv(paths["requisitions.csv"], index=False)
+    blueprint = make_blueprint(n_markets=scope_markets, n_l4=scope_l4,
+                               n_suppliers=n_suppliers, n_blacklist=n_blacklist, seed=seed)
+    with open(paths["blueprint.json"], "w", encoding="utf-8") as f:
+        json.dump(blueprint, f, ensure_ascii=False)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--markets", type=int, default=400)
+    parser.add_argument("--l4", type=int, default=5_000)
+    parser.add_argument("--suppliers", type=int, default=50_000)
+    parser.add_argument("--blacklist", type=int, default=1_000)
+    parser.add_argument("--requisitions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = write_workload(args.directory, args.markets, args.l4, args.suppliers, args.blacklist,
+                           args.requisitions, args.seed)
+    for path in paths.values():
+        print(f"{os.path.getsize(path) / 1024:>10,.0f} KiB  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Core logic for the ORO Logic Capturer (kept free of Streamlit imports)."""
@@ -0,0 +1,144 @@
+"""Multi-process chunked routing for very large requisition extracts.
+
+    python -m oro_logic.batch requisitions.csv routed.csv --rules blueprints/ --workers 8
+    python -m oro_logic.batch extract.csv routed.csv --blueprint oro_logic.json --chunk-mb 64
+
+The input CSV is cut into byte ranges of about ``--chunk-mb`` (aligned to
+line ends) and the ranges are fanned out to a process pool. Workers read and
+parse their own range, so CSV parsing scales with cores instead of
+bottlenecking the parent. Each worker loads the compiled rules once (pool
+initializer), not per chunk. Results are appended to the output file in
+input order as soon as each chunk finishes; at most ``2 * workers`` chunks are
+in flight, so memory is bounded by the chunk size rather than the file size.
+
+Quoted fields must not contain line breaks (true for ERP/PO extracts), since
+chunks are split on newlines.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from oro_logic.container import load_blueprint_file
+from oro_logic.decision_table import CompiledRules, compile_blueprints
+from oro_logic.rulesets import load_compiled_ruleset
+
+DEFAULT_CHUNK_MB = 32
+OUTPUT_COLUMNS = ["route", "route_detail", "route_reason"]
+
+_worker_rules = None
+
+
+def _init_worker(compiled_path):
+    global _worker_rules
+    _worker_rules = CompiledRules.load(compiled_path)
+
+
+def _route_range(path, columns, start, end):
+    """Worker: parse one byte range of the input and route it; returns (csv bytes, line count)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    chunk = pd.read_csv(io.BytesIO(data), names=columns, header=None, dtype=str, keep_default_na=False)
+    routed = _worker_rules.decide_batch(chunk)
+    return routed.to_csv(index=False, header=False).encode("utf-8"), len(routed)
+
+
+def split_byte_ranges(path, chunk_bytes):
+    """Return (header line, [(start, end), ...]) with every range ending on a line boundary.
+
+    Only seeks and reads one line per range, so this is cheap even for huge files.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def load_rules(rules_dir=None, blueprint_path=None):
+    """CompiledRules from a single blueprint file (JSON or container) or a rule-set directory"""
+    if blueprint_path:
+        return compile_blueprints(load_blueprint_file(blueprint_path))
+    compiled, _ = load_compiled_ruleset(rules_dir)
+    return compiled
+
+
+def route_file(input_path, output_path, compiled, workers=None, chunk_mb=DEFAULT_CHUNK_MB, progress=None):
+    """Route a CSV extract into ``output_path``; returns the number of lines routed.
+
+    ``progress`` is called with the running line count after each chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    header, ranges = split_byte_ranges(input_path, int(chunk_mb * 1024 * 1024))
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    total = 0
+
+    # Ship the compiled table to the workers once, through a file they load in the initializer
+    compiled_path = f"{output_path}.rules.pkl"
+    compiled.save(compiled_path)
+    try:
+        with open(output_path, "wb") as out, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(compiled_path,)) as pool:
+            out.write(pd.DataFrame(columns=columns + OUTPUT_COLUMNS).to_csv(index=False).encode("utf-8"))
+            pending = deque()
+            for start, end in ranges:
+                pending.append(pool.submit(_route_range, input_path, columns, start, end))
+                if len(pending) >= 2 * workers:
+                    total += _drain_one(pending, out, progress, total)
+            while pending:
+                total += _drain_one(pending, out, progress, total)
+    finally:
+        if os.path.exists(compiled_path):
+            os.unlink(compiled_path)
+    return total
+
+
+def _drain_one(pending, out, progress, total):
+    data, n_rows = pending.popleft().result()
+    out.write(data)
+    if progress is not None:
+        progress(total + n_rows)
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route a large requisition CSV across a process pool")
+    parser.add_argument("input", help="Requisition CSV (l4, end_market, vendor_code, amount, ...)")
+    parser.add_argument("output", help="Output CSV (input columns + route, route_detail, route_reason)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--rules", help="Rule-set directory (default: blueprints/)")
+    source.add_argument("--blueprint", help="Single blueprint file (JSON or .oro container)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_MB, help="Approximate chunk size in MiB")
+    args = parser.parse_args(argv)
+
+    compiled = load_rules(args.rules, args.blueprint)
+    start = time.perf_counter()
+
+    def progress(n_rows):
+        elapsed = time.perf_counter() - start
+        print(f"\r{n_rows:,} lines routed ({n_rows / elapsed:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    total = route_file(args.input, args.output, compiled, args.workers, args.chunk_mb, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\nRouted {total:,} lines in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} lines/s) -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Blueprint (``output_data`` v2.0) layout and conversion of the app's editor tables."""
+
+import hashlib
+import json
+
+import pandas as pd
+
+BLUEPRINT_VERSION = "2.0"
+
+SUPPLIER_COLUMNS = ["Supplier Name", "Vendor Code", "Supplier Type", "Logic Type", "Buying Channel", "Tender Required", "Comments"]
+CHANNEL_COLUMNS = ["Channel Type", "Supplier", "Vendor Code", "Link", "Comments"]
+
+# Allowed values of the Supplier Pool's option columns ("" = not set)
+SUPPLIER_TYPES = ["", "Local", "Global"]
+LOGIC_TYPES = ["", "Buying Channel", "Sourcing"]
+BUYING_CHANNELS = ["", "Hosted Catalog", "Punch-out", "Web Form", "Free Text", "P-Card"]
+TENDER_OPTIONS = ["", "No", "Yes - Every Time", "Yes - Above Threshold"]
+SUPPLIER_OPTIONS = {
+    "Supplier Type": SUPPLIER_TYPES,
+    "Logic Type": LOGIC_TYPES,
+    "Buying Channel": BUYING_CHANNELS,
+    "Tender Required": TENDER_OPTIONS,
+}
+
+BLACKLIST_FIELDS = {"Item Name": "item_name", "Item Code/SKU": "item_code", "Category": "category", "Reason": "reason"}
+
+# (part, field) of the blueprint's record tables; they hold almost all of a large blueprint
+BLUEPRINT_TABLES = (("supplier_pool", "suppliers"), ("buying_channels", "channels"),
+                    ("buying_channels", "marketplace_blacklist"))
+
+
+def _text_frame(df, columns):
+    """``df[columns]`` as stripped strings; missing columns and None/NaN become ''"""
+    frame = df.reindex(columns=columns)
+    return frame.where(frame.notna(), "").astype(str).apply(lambda col: col.str.strip())
+
+
+def editor_records(df, columns, key_columns):
+    """Rows of a data-editor table as JSON-safe records, skipping rows where every key column is blank"""
+    if df is None or df.empty:
+        return []
+    frame = _text_frame(df, columns)
+    keep = (frame[key_columns] != "").any(axis=1)
+    return frame.loc[keep].to_dict("records")
+
+
+def supplier_records(df):
+    return editor_records(df, SUPPLIER_COLUMNS, ["Supplier Name", "Vendor Code"])
+
+
+def channel_records(df):
+    return editor_records(df, CHANNEL_COLUMNS, ["Channel Type", "Supplier", "Vendor Code"])
+
+
+def blacklist_records(df):
+    """Marketplace blacklist rows that have an item name, with the blueprint's field names"""
+    records = editor_records(df, list(BLACKLIST_FIELDS), ["Item Name"])
+    return pd.DataFrame(records, columns=list(BLACKLIST_FIELDS)).rename(columns=BLACKLIST_FIELDS).to_dict("records")
+
+
+def editor_frame(records, columns):
+    """Records back into a data-editor table (one blank row when there are none)"""
+    frame = pd.DataFrame(list(records or []), columns=columns)
+    frame = frame.where(frame.notna(), "").astype(str)
+    return frame if not frame.empty else pd.DataFrame([dict.fromkeys(columns, "")])
+
+
+def blacklist_frame(records):
+    """Blueprint blacklist items back into the marketplace blacklist table"""
+    renamed = [{column: item.get(field, "") for column, field in BLACKLIST_FIELDS.items()} for item in records or []]
+    return editor_frame(renamed, list(BLACKLIST_FIELDS))
+
+
+def blueprint_hash(blueprint, suppliers_digest=None):
+    """Content hash of a blueprint, ignoring its metadata (creation time); keys memoized exports.
+
+    ``suppliers_digest`` stands in for the supplier list when the caller
+    already keeps a content digest of it, so large pools aren't re-serialized.
+    """
+    content = {key: value for key, value in blueprint.items() if key != "metadata"}
+    if suppliers_digest is not None and "supplier_pool" in content:
+        content["supplier_pool"] = dict(content["supplier_pool"], suppliers=suppliers_digest)
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
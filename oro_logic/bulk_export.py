@@ -0,0 +1,343 @@
+"""Bulk export of blueprint logic across many scopes, one row per (End Market, L4, rule).
+
+    python -m oro_logic.bulk_export rules.xlsx                                   # every saved blueprint
+    python -m oro_logic.bulk_export rules_parquet/ --rules blueprints/ --workers 8
+    python -m oro_logic.bulk_export rules.xlsx --blueprint oro_logic.json --scope scope.csv
+
+Saved blueprints are expanded over their own scope (End Markets x L4s).
+Each pair is exported under the blueprint the router would apply to it: the
+most specific scope wins, then the newest blueprint. "*" stands for an
+unrestricted End Market or L4 and applies where no more specific row exists.
+The blueprints can also be fanned out over a scope list (CSV or xlsx with
+End Market and L4 columns).
+
+A blueprint's rules are listed in decision order (Supplier Pool vendors,
+Buying Channels table, Marketplace, Sourcing), with the outcomes the
+compiled decision table gives, and repeated for every scope it covers.
+
+Work is cut into tasks of about ``--chunk-rows`` rows and fanned out to a
+process pool; at most ``2 * workers`` tasks are in flight, so memory is
+bounded by the chunk size rather than the export size.
+
+- ``.xlsx`` output: one "Rules" sheet (continued on "Rules (2)", ... past
+  Excel's row limit), written by the parent in openpyxl's write-only mode.
+- Anything else is a Parquet dataset directory: each worker writes its own
+  ``part-NNNNN.parquet`` file, so encoding and writing run in parallel too.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from oro_logic.container import load_blueprint_file
+from oro_logic.decision_table import (
+    UNKNOWN, UNKNOWN_BLACKLISTED, amount_edges, bin_representatives, compile_blueprints, evaluate, supplier_states,
+)
+from oro_logic.routing import DEFAULT_SUPPLIER_TYPE, REASONS, REQUISITION_ALIASES, BlueprintRules, text_value
+from oro_logic.rulesets import blueprint_paths
+
+ANY_SCOPE = "*"  # blueprint not restricted on that dimension
+ROUTE_SOURCING = "Sourcing"  # continues to the Sourcing rules (amount vs threshold)
+DEFAULT_CHUNK_ROWS = 200_000
+EXCEL_MAX_ROWS = 1_048_576
+SCOPE_COLUMNS = ["blueprint", "region", "cluster", "company_code", "end_market", "l4"]
+RULE_COLUMNS = ["rule_order", "stage", "match_type", "match_value", "condition", "route", "route_detail", "reason"]
+COLUMNS = SCOPE_COLUMNS + RULE_COLUMNS
+
+
+def rule_rows(blueprint):
+    """The blueprint's effective rules in decision order, as a DataFrame.
+
+    Outcomes come from ``decision_table.evaluate``, the router's own decision
+    order; a supplier whose outcome is that of the Sourcing rules is listed
+    as continuing to Sourcing.
+    """
+    rules = BlueprintRules.from_blueprint(blueprint)
+    by_code, by_name, by_channel = supplier_states(rules)
+    amounts = bin_representatives(amount_edges(rules))  # one amount per range the outcome can change at
+
+    def outcomes(kind, detail=""):
+        return tuple(evaluate(rules, kind, detail, amount) for amount in amounts)
+
+    sourcing = outcomes(UNKNOWN_BLACKLISTED)  # what a vendor that can't use the Marketplace gets
+
+    def supplier_rule(stage, match_type, key, condition, state):
+        outcome = outcomes(*state)
+        if outcome == sourcing:
+            return (stage, match_type, key, condition, ROUTE_SOURCING, "", "")
+        route, detail, reason = outcome[0]  # known suppliers don't depend on the amount
+        return (stage, match_type, key, condition, route, detail, REASONS[reason])
+
+    rows = [supplier_rule("Supplier Pool", "Vendor Code", code, f"Logic Type: {rules.supplier_logic[code]}", state)
+            for code, state in by_code.items()]
+    # Suppliers without a vendor code are only matched by name
+    for name in _unnamed_vendor_suppliers(blueprint):
+        key = name.casefold()
+        if key in by_name:
+            rows.append(supplier_rule("Supplier Pool", "Supplier Name", name,
+                                      f"Logic Type: {rules.supplier_logic_by_name[key]}", by_name[key]))
+    rows.extend(supplier_rule("Buying Channels", "Vendor Code", code, "", state) for code, state in by_channel.items())
+
+    marketplace = outcomes(UNKNOWN)
+    if marketplace != sourcing:  # unknown vendors can reach the Marketplace (blacklisted items can't)
+        for code in sorted(rules.blacklist_codes):
+            rows.append(("Marketplace Blacklist", "Item Code", code, "Blacklisted", ROUTE_SOURCING, "", ""))
+        for name in sorted(rules.blacklist_names):
+            rows.append(("Marketplace Blacklist", "Item Name", name, "Blacklisted", ROUTE_SOURCING, "", ""))
+        route, detail, reason = next(o for o, s in zip(marketplace, sourcing) if o != s)
+        limit = f"< £{rules.marketplace_limit:g}"
+        rows.append(("Marketplace", "Amount", limit, f"Amount {limit}", route, detail, REASONS[reason]))
+
+    at_threshold = evaluate(rules, UNKNOWN_BLACKLISTED, "", rules.threshold)
+    above_threshold = evaluate(rules, UNKNOWN_BLACKLISTED, "", float(np.nextafter(rules.threshold, np.inf)))
+    if at_threshold == above_threshold:
+        route, detail, reason = at_threshold
+        rows.append(("Sourcing", "Any", "", "", route, detail, REASONS[reason]))
+    else:
+        for outcome, limit in ((above_threshold, f"> £{rules.threshold:g}"), (at_threshold, f"<= £{rules.threshold:g}")):
+            route, detail, reason = outcome
+            rows.append(("Sourcing", "Amount", limit, f"Amount {limit}", route, detail, REASONS[reason]))
+
+    frame = pd.DataFrame(rows, columns=RULE_COLUMNS[1:])
+    frame.insert(0, "rule_order", range(1, len(frame) + 1))
+    return frame
+
+
+def _unnamed_vendor_suppliers(blueprint):
+    """Names of pool suppliers (after the type filter) that have no vendor code, first row per name"""
+    pool = blueprint.get("supplier_pool", {})
+    type_filter = pool.get("supplier_type_filter", "All") or "All"
+    names, seen = [], set()
+    for supp in pool.get("suppliers", []) or []:
+        name = text_value(supp.get("Supplier Name"))
+        supp_type = text_value(supp.get("Supplier Type")) or DEFAULT_SUPPLIER_TYPE
+        if not name or text_value(supp.get("Vendor Code")) or (type_filter != "All" and supp_type != type_filter):
+            continue
+        if name.casefold() not in seen:
+            seen.add(name.casefold())
+            names.append(name)
+    return names
+
+
+def blueprint_scope(blueprint):
+    """(End Market, L4) pairs a blueprint covers; ANY_SCOPE where it is unrestricted"""
+    markets = [text_value(m) for m in blueprint.get("scope", {}).get("end_markets", []) or []] or [ANY_SCOPE]
+    l4s = [text_value(l4) for l4 in blueprint.get("category", {}).get("l4", []) or []] or [ANY_SCOPE]
+    return [(market, l4) for market in dict.fromkeys(markets) for l4 in dict.fromkeys(l4s)]
+
+
+def read_scope(path):
+    """(End Market, L4) pairs from a CSV / xlsx scope list (headers as in requisition extracts)"""
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, dtype=str)
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    columns = {}
+    for col in df.columns:
+        target = REQUISITION_ALIASES.get(str(col).strip().lower())
+        if target in ("end_market", "l4") and target not in columns:
+            columns[target] = col
+    missing = [name for name in ("end_market", "l4") if name not in columns]
+    if missing:
+        raise ValueError(f"Scope list is missing column(s): {', '.join(missing)}")
+    pairs = zip(df[columns["end_market"]].fillna("").str.strip(), df[columns["l4"]].fillna("").str.strip())
+    return list(dict.fromkeys((market, l4) for market, l4 in pairs if market and l4))
+
+
+def owned_pairs(named_blueprints, scope=None):
+    """Per blueprint, the (End Market, L4) pairs it decides, resolved as the router resolves scopes.
+
+    ``named_blueprints`` is [(name, blueprint)], newest first. A pair goes to
+    the blueprint ``CompiledRules.find_rule`` picks: exact scope, then the L4
+    for any market, any L4 in the market, then unrestricted, newest first
+    among equal scopes. Without ``scope`` each blueprint keeps those of its
+    own pairs (ANY_SCOPE ones included) it owns; an ANY_SCOPE row applies
+    where no more specific row exists. With ``scope`` the given pairs are
+    shared out; pairs no blueprint covers go to the newest one, so a single
+    blueprint is fanned out over the whole list.
+    """
+    compiled = compile_blueprints([blueprint for _, blueprint in named_blueprints])
+    owned = [[] for _ in named_blueprints]
+    if scope is not None:
+        for market, l4 in scope:
+            rule = compiled.find_rule(l4, market)
+            owned[0 if rule is None else rule].append((market, l4))
+        return owned
+    for index, (_, blueprint) in enumerate(named_blueprints):
+        for market, l4 in blueprint_scope(blueprint):
+            key = (None if l4 == ANY_SCOPE else l4, None if market == ANY_SCOPE else market)
+            if compiled.scope.get(key) == index:
+                owned[index].append((market, l4))
+    return owned
+
+
+def plan_tasks(named_blueprints, scope=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """[(blueprint index, [(market, l4), ...])] work units of about ``chunk_rows`` output rows (see ``owned_pairs``)"""
+    tasks = []
+    for index, pairs in enumerate(owned_pairs(named_blueprints, scope)):
+        if not pairs:
+            continue
+        blueprint = named_blueprints[index][1]
+        per_task = max(1, chunk_rows // max(1, len(rule_rows(blueprint))))
+        tasks.extend((index, pairs[i:i + per_task]) for i in range(0, len(pairs), per_task))
+    return tasks
+
+
+_worker_blueprints = None
+_worker_rules = {}
+
+
+def _init_worker(named_blueprints):
+    global _worker_blueprints
+    _worker_blueprints = named_blueprints
+    _worker_rules.clear()
+
+
+def expand_rules(name, blueprint, pairs, rules=None):
+    """One row per (pair, rule): the rules frame repeated for every (End Market, L4) pair"""
+    rules = rule_rows(blueprint) if rules is None else rules
+    scope = blueprint.get("scope", {})
+    frame = rules.iloc[np.tile(np.arange(len(rules)), len(pairs))].reset_index(drop=True)
+    pairs = np.array(pairs, dtype=object).reshape(-1, 2)
+    frame.insert(0, "blueprint", name)
+    frame.insert(1, "region", text_value(scope.get("region")))
+    frame.insert(2, "cluster", text_value(scope.get("cluster")))
+    frame.insert(3, "company_code", text_value(scope.get("company_code")))
+    frame.insert(4, "end_market", np.repeat(pairs[:, 0], len(rules)))
+    frame.insert(5, "l4", np.repeat(pairs[:, 1], len(rules)))
+    return frame
+
+
+def _worker_frame(index, pairs):
+    name, blueprint = _worker_blueprints[index]
+    if index not in _worker_rules:
+        _worker_rules[index] = rule_rows(blueprint)
+    return expand_rules(name, blueprint, pairs, _worker_rules[index])
+
+
+def _rows_task(index, pairs):
+    """Worker (workbook output): the task's rows as plain tuples for the parent to append"""
+    frame = _worker_frame(index, pairs)
+    return list(frame.itertuples(index=False, name=None))
+
+
+def _parquet_task(index, pairs, path):
+    """Worker (Parquet output): write the task's rows to its own part file; returns the row count"""
+    frame = _worker_frame(index, pairs)
+    frame.to_parquet(path, index=False)
+    return len(frame)
+
+
+def export_rules(named_blueprints, output_path, scope=None, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """Write the consolidated rules export; returns the number of rows written.
+
+    ``.xlsx`` paths get a workbook, anything else a Parquet dataset
+    directory. ``progress`` is called with the running row count.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = plan_tasks(named_blueprints, scope, chunk_rows)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(named_blueprints,)) as pool:
+        if output_path.lower().endswith(".xlsx"):
+            return _write_workbook(pool, tasks, output_path, workers, progress)
+        return _write_dataset(pool, tasks, output_path, workers, progress)
+
+
+def _submit_bounded(pool, tasks, submit, workers):
+    """Yield task results in order with at most ``2 * workers`` tasks in flight"""
+    pending = deque()
+    for task in tasks:
+        pending.append(submit(pool, task))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_workbook(pool, tasks, output_path, workers, progress):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    sheets, ws, sheet_rows, total = 0, None, EXCEL_MAX_ROWS, 0
+    submit = lambda pool, task: pool.submit(_rows_task, *task)
+    for rows in _submit_bounded(pool, tasks, submit, workers):
+        for row in rows:
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet("Rules" if sheets == 1 else f"Rules ({sheets})")
+                ws.append(COLUMNS)
+                sheet_rows = 1
+            ws.append(row)
+            sheet_rows += 1
+        total += len(rows)
+        if progress is not None:
+            progress(total)
+    if ws is None:
+        wb.create_sheet("Rules").append(COLUMNS)
+    wb.save(output_path)
+    return total
+
+
+def _write_dataset(pool, tasks, output_path, workers, progress):
+    os.makedirs(output_path, exist_ok=True)
+    for entry in os.scandir(output_path):  # a rerun replaces the previous export
+        if entry.name.startswith("part-") and entry.name.endswith(".parquet"):
+            os.unlink(entry.path)
+    numbered = [(n, task) for n, task in enumerate(tasks)]
+    submit = lambda pool, item: pool.submit(
+        _parquet_task, *item[1], os.path.join(output_path, f"part-{item[0]:05d}.parquet"))
+    total = 0
+    for n_rows in _submit_bounded(pool, numbered, submit, workers):
+        total += n_rows
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def load_named_blueprints(rules_dir=None, blueprint_path=None):
+    """[(name, blueprint)], newest first: one blueprint file (JSON or container), or every blueprint in a rule-set directory"""
+    paths = [blueprint_path] if blueprint_path else blueprint_paths(rules_dir)
+    named = []
+    for path in paths:
+        try:
+            named.append((os.path.basename(path), load_blueprint_file(path)))
+        except (OSError, ValueError):
+            if blueprint_path:
+                raise
+    return sorted(named, key=lambda item: str(item[1].get("metadata", {}).get("created_at", "")), reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export blueprint rules for every End Market x L4 scope")
+    parser.add_argument("output", help="rules.xlsx for a workbook, otherwise a Parquet dataset directory")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--rules", help="Rule-set directory (default: blueprints/)")
+    source.add_argument("--blueprint", help="Single blueprint file (JSON or .oro container)")
+    parser.add_argument("--scope", help="CSV / xlsx scope list (End Market, L4) to fan the blueprint(s) out over")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Approximate rows per task")
+    args = parser.parse_args(argv)
+
+    named = load_named_blueprints(args.rules, args.blueprint)
+    if not named:
+        sys.exit("No blueprints found")
+    scope = read_scope(args.scope) if args.scope else None
+    start = time.perf_counter()
+
+    def progress(n_rows):
+        elapsed = time.perf_counter() - start
+        print(f"\r{n_rows:,} rows written ({n_rows / elapsed:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    total = export_rules(named, args.output, scope, args.workers, args.chunk_rows, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\nExported {total:,} rows from {len(named):,} blueprint(s) in {elapsed:.1f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
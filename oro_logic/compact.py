@@ -0,0 +1,93 @@
+"""Compact in-memory storage for repetitive text columns.
+
+Taxonomy levels (Region, DRBU, L1-L3) and the Supplier Pool's option columns
+hold a handful of distinct values over thousands of rows. Stored as
+categoricals, each row keeps a small integer code and every distinct string
+exists once - also in the records built from the frame, whose values are the
+categories' own string objects. The values read back are unchanged, so
+records, JSON and Excel exports are identical to the plain-text layout.
+"""
+
+import sys
+
+import pandas as pd
+
+CATEGORY_MAX_RATIO = 0.5  # distinct values / rows at or below which a text column becomes a categorical
+
+
+def is_categorical(series):
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def compact_frame(df, columns=None, max_ratio=CATEGORY_MAX_RATIO):
+    """Copy of ``df`` with repetitive text columns stored as categoricals.
+
+    ``columns`` are always converted; otherwise every text column with at
+    most ``max_ratio`` distinct values per row is. Missing values become ''
+    (always a category), as in the editor tables.
+    """
+    out = df.copy()
+    for column in out.columns:
+        series = out[column]
+        if is_categorical(series):
+            if series.cat.categories.dtype != object:  # read back from Parquet: share string objects again
+                out[column] = series.astype(_categories(series.cat.categories, [""]))
+            continue
+        if not (pd.api.types.is_string_dtype(series) or series.dtype == object):
+            continue
+        if columns is not None:
+            if column not in columns:
+                continue
+        elif len(series) == 0 or series.nunique(dropna=True) > max_ratio * len(series):
+            continue
+        values = series.where(series.notna(), "")
+        out[column] = values.astype(_categories(pd.unique(values.to_numpy(dtype=object)), [""]))
+    return out
+
+
+def _categories(existing, extra):
+    """Categorical dtype over ``existing`` + ``extra``; an object index, so reads share its string objects"""
+    return pd.CategoricalDtype(pd.Index(list(dict.fromkeys([*existing, *extra])), dtype=object))
+
+
+def add_categories(df, column, values):
+    """Make sure ``values`` can be written into ``df[column]`` (a no-op for text columns)"""
+    series = df[column]
+    if is_categorical(series):
+        missing = [value for value in dict.fromkeys(values) if value not in series.cat.categories]
+        if missing:
+            df[column] = series.cat.set_categories(_categories(series.cat.categories, missing).categories)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def text_frame_bytes(df):
+    """Deep size ``df`` would have with every categorical column stored as plain text"""
+    if df is None:
+        return 0
+    categorical = [column for column in df.columns if is_categorical(df[column])]
+    if not categorical:
+        return frame_bytes(df)
+    return frame_bytes(df.astype({column: "str" for column in categorical}))
+
+
+def records_bytes(records):
+    """Approximate size of a list of record dicts, counting each distinct string object once"""
+    seen = set()
+    total = sys.getsizeof(records)
+    for record in records:
+        total += sys.getsizeof(record)
+        for value in record.values():
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def memory_report(df):
+    """{rows, bytes, text_bytes, saved_bytes} for a (possibly) compacted frame"""
+    compact = frame_bytes(df)
+    text = text_frame_bytes(df)
+    return {"rows": 0 if df is None else len(df), "bytes": compact, "text_bytes": text, "saved_bytes": text - compact}
@@ -0,0 +1,277 @@
+"""Overlap and conflict detection across many blueprints.
+
+    python -m oro_logic.conflicts                          # latest version of every stored blueprint
+    python -m oro_logic.conflicts --rules blueprints/ --output conflicts.csv
+
+Scopes are (End Market, L4) pairs; a blueprint that doesn't restrict a
+dimension covers every value of it (``*``). Instead of comparing every pair
+of blueprints, each blueprint's pairs go into inverted indexes (exact pairs,
+market-only, L4-only, unrestricted) and the blueprints sharing a pair are
+read off the index; where market-only and L4-only entries meet, markets and
+L4s named by the same blueprints are handled as one class rather than pair
+by pair. Pairs covered by the same set of blueprints are compared once, so
+the cost grows with the number of scope entries, not blueprints² or
+markets x L4s.
+
+Within an overlapping set the analyzer reports differing settings (tactical
+threshold, marketplace limit), amount bands the blueprints route differently
+(interval check over the sorted thresholds and limits), and vendors the
+Supplier Pool or Buying Channels table treat differently.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from collections import defaultdict
+
+import pandas as pd
+
+from oro_logic.bulk_export import ANY_SCOPE, blueprint_scope
+from oro_logic.decision_table import UNKNOWN, evaluate
+from oro_logic.routing import ROUTE_MARKETPLACE, BlueprintRules
+
+REPORT_COLUMNS = ["severity", "kind", "blueprints", "scopes", "example_scope", "detail"]
+_MAX_LISTED = 5  # vendors / bands listed per finding before "(+N more)"
+
+
+def overlapping_scopes(scopes):
+    """{frozenset(blueprint ids): (pairs, smallest pair)} for scopes covered by two or more blueprints.
+
+    ``scopes`` maps blueprint id -> iterable of (market, l4) pairs (``*`` = any).
+    A ``(market, *)`` or ``(*, l4)`` entry counts as one pair. Where an
+    any-L4 entry meets an any-market one, markets (and L4s) named by the same
+    blueprints form one class and each pair of classes is counted at once, so
+    the work doesn't grow with markets x L4s.
+    """
+    exact, any_market, any_l4, anywhere = defaultdict(set), defaultdict(set), defaultdict(set), set()
+    for blueprint_id, pairs in scopes.items():
+        for market, l4 in pairs:
+            if market == ANY_SCOPE and l4 == ANY_SCOPE:
+                anywhere.add(blueprint_id)
+            elif market == ANY_SCOPE:
+                any_market[l4].add(blueprint_id)
+            elif l4 == ANY_SCOPE:
+                any_l4[market].add(blueprint_id)
+            else:
+                exact[(market, l4)].add(blueprint_id)
+
+    groups = {}
+
+    def add(ids, n_pairs, example):
+        if len(ids) > 1 and n_pairs:
+            count, smallest = groups.get(ids, (0, example))
+            groups[ids] = (count + n_pairs, min(smallest, example))
+
+    # Pairs some blueprint names outright, one at a time
+    keys = set(exact)
+    keys.update((market, ANY_SCOPE) for market in any_l4)
+    keys.update((ANY_SCOPE, l4) for l4 in any_market)
+    if anywhere:
+        keys.add((ANY_SCOPE, ANY_SCOPE))
+    for market, l4 in keys:
+        ids = set(anywhere)
+        ids |= exact.get((market, l4), set())
+        ids |= any_market.get(l4, set())
+        ids |= any_l4.get(market, set())
+        add(frozenset(ids), 1, (market, l4))
+
+    # The meet of market-only and L4-only entries (minus the pairs counted above), class by class
+    market_class = {market: frozenset(ids) for market, ids in any_l4.items()}
+    l4_class = {l4: frozenset(ids) for l4, ids in any_market.items()}
+    markets_by_class, l4s_by_class = defaultdict(list), defaultdict(list)
+    for market, ids in market_class.items():
+        markets_by_class[ids].append(market)
+    for l4, ids in l4_class.items():
+        l4s_by_class[ids].append(l4)
+    named = defaultdict(set)  # (market class, l4 class) -> exact pairs inside that meet
+    for market, l4 in exact:
+        if market in market_class and l4 in l4_class:
+            named[(market_class[market], l4_class[l4])].add((market, l4))
+    for market_ids, markets in markets_by_class.items():
+        for l4_ids, l4s in l4s_by_class.items():
+            ids = frozenset(anywhere | market_ids | l4_ids)
+            skip = named.get((market_ids, l4_ids), set())
+            n_pairs = len(markets) * len(l4s) - len(skip)
+            if len(ids) > 1 and n_pairs:
+                example = next(pair for pair in itertools.product(sorted(markets), sorted(l4s)) if pair not in skip)
+                add(ids, n_pairs, example)
+    return groups
+
+
+def _generic_route(rules, amount):
+    """Route (and detail) the router gives a requisition matched by no pool supplier or channel vendor"""
+    route, detail, _ = evaluate(rules, UNKNOWN, "", amount)
+    # The Marketplace detail is the limit, which "Marketplace limit" already compares
+    return f"{route}: {detail}" if detail and route != ROUTE_MARKETPLACE else route
+
+
+def amount_bands(rules_by_id):
+    """[(low, high, {id: route})] amount ranges where the blueprints route a generic requisition differently.
+
+    Breakpoints are every threshold and marketplace limit. Each open
+    interval between them, and each breakpoint itself (where < / <= / >
+    differ), is checked once; adjacent disagreeing pieces with the same
+    routes are merged. ``high`` is None for "and above".
+    """
+    edges = sorted({rules.threshold for rules in rules_by_id.values()}
+                   | {rules.marketplace_limit for rules in rules_by_id.values() if rules.allow_marketplace})
+    # (representative amount, low, high) for every piece of the amount axis
+    pieces = [(edges[0] - 1 if edges else 0, None, edges[0] if edges else None)]
+    for i, edge in enumerate(edges):
+        pieces.append((edge, edge, edge))
+        upper = edges[i + 1] if i + 1 < len(edges) else None
+        pieces.append(((edge + upper) / 2 if upper is not None else edge + 1, edge, upper))
+
+    bands, previous = [], None
+    for amount, low, high in pieces:
+        routes = {blueprint_id: _generic_route(rules, amount) for blueprint_id, rules in rules_by_id.items()}
+        if len(set(routes.values())) < 2:
+            previous = None
+            continue
+        if previous == routes:
+            bands[-1][1] = high
+        else:
+            bands.append([low, high, routes])
+        previous = routes
+    return [tuple(band) for band in bands]
+
+
+def _band_text(low, high):
+    if low is None:
+        return f"below £{high:g}"
+    if high is None:
+        return f"above £{low:g}"
+    return f"£{low:g}" if low == high else f"£{low:g}-£{high:g}"
+
+
+def _differing(rules_by_id, attribute):
+    """{vendor: {id: value}} for vendors the blueprints' ``attribute`` mappings disagree on"""
+    by_vendor = defaultdict(dict)
+    for blueprint_id, rules in rules_by_id.items():
+        for vendor, value in attribute(rules).items():
+            by_vendor[vendor][blueprint_id] = value
+    return {vendor: values for vendor, values in by_vendor.items() if len(set(values.values())) > 1}
+
+
+def _listed(items):
+    items = list(items)
+    text = "; ".join(items[:_MAX_LISTED])
+    return text + (f" (+{len(items) - _MAX_LISTED} more)" if len(items) > _MAX_LISTED else "")
+
+
+def _values_detail(values, names):
+    return ", ".join(f"{names[blueprint_id]}: {value}" for blueprint_id, value in sorted(values.items(), key=lambda item: str(item[0])))
+
+
+def compare_rules(rules_by_id, names):
+    """[(kind, detail)] conflicts among blueprints that share a scope"""
+    findings = []
+    sourcing = {i: f"£{r.threshold:g}" for i, r in rules_by_id.items() if r.sourcing_enabled}
+    if len(set(sourcing.values())) > 1:
+        findings.append(("Tactical threshold", _values_detail(sourcing, names)))
+    marketplace = {i: (f"£{r.marketplace_limit:g}" if r.allow_marketplace else "not allowed")
+                   for i, r in rules_by_id.items() if r.buying_channels_enabled}
+    if len(set(marketplace.values())) > 1:
+        findings.append(("Marketplace limit", _values_detail(marketplace, names)))
+
+    bands = amount_bands(rules_by_id)
+    if bands:
+        findings.append(("Amount band", _listed(
+            f"{_band_text(low, high)} -> {_values_detail(routes, names)}" for low, high, routes in bands)))
+
+    pool = {i: r for i, r in rules_by_id.items() if r.pool_enabled}
+    suppliers = _differing(pool, lambda r: {code: f"{r.supplier_logic[code]} / {r.supplier_channel[code] or '-'}"
+                                            for code in r.supplier_logic})
+    if suppliers:
+        findings.append(("Supplier Pool vendor", _listed(
+            f"{vendor} ({_values_detail(values, names)})" for vendor, values in sorted(suppliers.items()))))
+    channels = _differing({i: r for i, r in rules_by_id.items() if r.buying_channels_enabled},
+                          lambda r: r.channel_by_vendor)
+    if channels:
+        findings.append(("Buying Channel vendor", _listed(
+            f"{vendor} ({_values_detail(values, names)})" for vendor, values in sorted(channels.items()))))
+    return findings
+
+
+def _scope_text(pair):
+    market, l4 = pair
+    return f"{'All markets' if market == ANY_SCOPE else market} / {'All L4' if l4 == ANY_SCOPE else l4}"
+
+
+def analyze(blueprints, names=None):
+    """Report (DataFrame, REPORT_COLUMNS) of overlapping scopes and their conflicts.
+
+    ``blueprints`` maps id -> blueprint dict; ``names`` maps id -> display
+    name (defaults to the id). One "Overlap" row per set of blueprints
+    sharing scopes, then one row per conflicting rule in that set.
+    """
+    names = {blueprint_id: str(blueprint_id) for blueprint_id in blueprints} | dict(names or {})
+    groups = overlapping_scopes({blueprint_id: blueprint_scope(bp) for blueprint_id, bp in blueprints.items()})
+    parsed = {}
+    rows = []
+    for ids, (n_pairs, example) in sorted(groups.items(), key=lambda item: -item[1][0]):
+        for blueprint_id in ids:
+            if blueprint_id not in parsed:
+                parsed[blueprint_id] = BlueprintRules.from_blueprint(blueprints[blueprint_id])
+        ordered = sorted(ids, key=str)
+        common = {
+            "blueprints": ", ".join(names[i] for i in ordered),
+            "scopes": n_pairs,
+            "example_scope": _scope_text(example),
+        }
+        findings = compare_rules({i: parsed[i] for i in ordered}, names)
+        rows.append({"severity": "conflict" if findings else "overlap", "kind": "Overlap", **common,
+                     "detail": f"{len(ids)} blueprints cover the same scope"
+                               + ("" if findings else "; their rules agree")})
+        rows.extend({"severity": "conflict", "kind": kind, **common, "detail": detail} for kind, detail in findings)
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+
+def analyze_store(store):
+    """Report for the latest version of every blueprint in a BlueprintStore"""
+    blueprints = dict(store.iter_latest())
+    return analyze(blueprints, {blueprint_id: f"#{blueprint_id}" for blueprint_id in blueprints})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find overlapping scopes and conflicting rules across blueprints")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", help="Blueprint store (default: the app's blueprints.sqlite)")
+    source.add_argument("--rules", help="Directory of blueprint JSON files instead of the store")
+    parser.add_argument("--output", help="Write the report as CSV (default: print it)")
+    parser.add_argument("--conflicts-only", action="store_true", help="Skip overlaps whose rules agree")
+    args = parser.parse_args(argv)
+
+    if args.rules:
+        from oro_logic.rulesets import blueprint_paths
+        blueprints = {}
+        for path in blueprint_paths(args.rules):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    blueprints[os.path.basename(path)] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        report = analyze(blueprints)
+        count = len(blueprints)
+    else:
+        from oro_logic.store import BlueprintStore
+        store = BlueprintStore(args.db)
+        report = analyze_store(store)
+        count = store.count()
+    if args.conflicts_only:
+        report = report[report["severity"] == "conflict"]
+
+    if args.output:
+        report.to_csv(args.output, index=False)
+    elif not report.empty:
+        with pd.option_context("display.max_colwidth", 120, "display.width", 240):
+            print(report.to_string(index=False))
+    n_sets = int((report["kind"] == "Overlap").sum())
+    n_conflicts = int((report["kind"] != "Overlap").sum())
+    print(f"{count:,} blueprints: {n_sets:,} overlapping set(s), {n_conflicts:,} conflicting rule(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compact blueprint container: the scalar config as JSON, the record tables as Parquet.
+
+    python -m oro_logic.container oro_logic.json               # -> oro_logic.oro
+    python -m oro_logic.container oro_logic.oro --to-json      # -> oro_logic.json
+
+A container is a zip archive holding ``blueprint.json`` (the blueprint with
+each table in ``BLUEPRINT_TABLES`` replaced by a ``{"$table": name, "rows":
+n}`` stub) and one ``tables/<name>.parquet`` per table. A table whose
+columns mix value types stays in ``blueprint.json`` as it is. Parquet stores the
+repetitive option columns dictionary-encoded and compressed, so a 50k
+supplier pool is a fraction of its JSON size, and loading reads the
+columns directly instead of parsing one object per row.
+
+Requires pyarrow (ImportError otherwise).
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+import zipfile
+
+from oro_logic.blueprint import BLUEPRINT_TABLES
+
+CONTAINER_SUFFIX = ".oro"
+CONTAINER_FORMAT = "oro-blueprint"
+CONTAINER_VERSION = 1
+CONFIG_MEMBER = "blueprint.json"
+
+
+def build_container(blueprint):
+    """The blueprint as container bytes"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in blueprint.items()}
+    tables = {}
+    for part, field in BLUEPRINT_TABLES:
+        records = (config.get(part) or {}).get(field)
+        if not isinstance(records, list):
+            continue
+        try:
+            tables[field] = pa.Table.from_pylist(records)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, AttributeError):
+            continue  # mixed value types (or not records): the table stays in the JSON as it is
+        config[part][field] = {"$table": field, "rows": len(records)}
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        document = {"format": CONTAINER_FORMAT, "format_version": CONTAINER_VERSION, "blueprint": config}
+        archive.writestr(CONFIG_MEMBER, json.dumps(document, ensure_ascii=False), zipfile.ZIP_DEFLATED)
+        for name, table in tables.items():
+            data = io.BytesIO()
+            pq.write_table(table, data, compression="zstd")
+            archive.writestr(f"tables/{name}.parquet", data.getvalue(), zipfile.ZIP_STORED)  # already compressed
+    return buffer.getvalue()
+
+
+def read_container(source, frames=False):
+    """Blueprint from a container (path, bytes or binary file).
+
+    Tables come back as lists of records, as in the JSON blueprint, or with
+    ``frames=True`` as DataFrames of strings (skips building one dict per row).
+    """
+    import pyarrow.parquet as pq
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        with zipfile.ZipFile(source) as archive:
+            document = json.loads(archive.read(CONFIG_MEMBER))
+            if document.get("format") != CONTAINER_FORMAT or document.get("format_version") != CONTAINER_VERSION:
+                raise ValueError(f"not a version {CONTAINER_VERSION} blueprint container")
+            blueprint = document["blueprint"]
+            for part, field in BLUEPRINT_TABLES:
+                stub = (blueprint.get(part) or {}).get(field)
+                if not isinstance(stub, dict) or "$table" not in stub:
+                    continue
+                table = pq.read_table(io.BytesIO(archive.read(f"tables/{stub['$table']}.parquet")))
+                blueprint[part][field] = table.to_pandas() if frames else table.to_pylist()
+    except (zipfile.BadZipFile, KeyError) as e:  # a damaged archive or a missing member
+        raise ValueError(f"invalid blueprint container: {e}") from e
+    return blueprint
+
+
+def is_container(path):
+    return zipfile.is_zipfile(path)
+
+
+def load_blueprint_file(path):
+    """Blueprint (or list of blueprints) from a JSON file or a container"""
+    if is_container(path):
+        return read_container(path)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert blueprints between JSON and the compact container")
+    parser.add_argument("paths", nargs="+", help="Blueprint JSON files (or containers with --to-json)")
+    parser.add_argument("--to-json", action="store_true", help="Write containers back out as JSON")
+    args = parser.parse_args(argv)
+
+    from oro_logic.export import blueprint_json
+
+    for path in args.paths:
+        start = time.perf_counter()
+        blueprint = load_blueprint_file(path)
+        loaded = time.perf_counter() - start
+        stem = os.path.splitext(path)[0]
+        if args.to_json:
+            output, data = f"{stem}.json", blueprint_json(blueprint).encode("utf-8")
+        else:
+            output, data = f"{stem}{CONTAINER_SUFFIX}", build_container(blueprint)
+        with open(output, "wb") as f:
+            f.write(data)
+        print(f"{path} ({os.path.getsize(path) / 1024:,.1f} KiB, loaded in {loaded * 1e3:,.0f} ms) "
+              f"-> {output} ({len(data) / 1024:,.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
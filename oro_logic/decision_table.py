@@ -0,0 +1,342 @@
+"""Compile blueprints into a flat decision table for low-latency routing.
+
+``route_requisitions`` re-reads the nested blueprint on every call. When the
+rules rarely change, ``compile_blueprints`` flattens one or many blueprints
+once into:
+
+* a scope map ``(L4, end market) -> rule`` (blank = wildcard),
+* supplier maps ``(rule, vendor code or name) -> supplier state``, looked up
+  in the router's order: pool by vendor code, pool by supplier name, then
+  the Buying Channels table (no match = unknown vendor),
+* per-rule amount edges (marketplace limit, tactical threshold), and
+* an outcome table ``[rule, state, amount bin] -> (route, detail, reason)``.
+
+A single decision is then a few dict lookups plus a bisect over two edges;
+batches do the same with ``Index.get_indexer`` and array indexing. The
+compiled object pickles compactly and loads without re-parsing blueprints.
+"""
+
+import bisect
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from oro_logic.routing import (
+    DEFAULT_LOGIC_TYPE, REASONS, ROUTE_BUYING_CHANNEL, ROUTE_MARKETPLACE, ROUTE_REJECT, ROUTE_STRATEGIC,
+    ROUTE_TACTICAL, ROUTES, BlueprintRules, normalize_requisitions,
+)
+
+# Supplier states (kind); detail carries the channel where relevant
+UNKNOWN = 0          # vendor not in the pool or the Buying Channels table
+UNKNOWN_BLACKLISTED = 1
+POOL_BUYING = 2
+POOL_SOURCING = 3
+TABLE_CHANNEL = 4
+
+COMPILED_FORMAT_VERSION = 2
+
+
+def _reason(text):
+    return REASONS.index(text)
+
+
+def evaluate(rules, kind, detail, amount):
+    """Reference (scalar) decision for one supplier state and amount.
+
+    Mirrors the decision order of ``route_requisitions``; used to fill the
+    outcome table at compile time. Returns ``(route, detail, reason_code)``.
+    """
+    if kind == POOL_BUYING:
+        return ROUTE_BUYING_CHANNEL, detail, _reason("Supplier Pool buying channel")
+    if kind == TABLE_CHANNEL:
+        return ROUTE_BUYING_CHANNEL, detail, _reason("Buying Channels table")
+    if (kind == UNKNOWN and rules.buying_channels_enabled and rules.allow_marketplace
+            and amount < rules.marketplace_limit):
+        return ROUTE_MARKETPLACE, f"< £{rules.marketplace_limit:g}", _reason("Marketplace below limit")
+    if not rules.sourcing_enabled:
+        return ROUTE_REJECT, "", _reason("Sourcing disabled")
+    if amount > rules.threshold:
+        if rules.strategic_enabled:
+            return ROUTE_STRATEGIC, rules.strategic_owner, _reason("Above threshold")
+        return ROUTE_REJECT, "", _reason("Strategic disabled")
+    if rules.tactical_enabled:
+        return ROUTE_TACTICAL, rules.tactical_action, _reason("Below threshold")
+    return ROUTE_REJECT, "", _reason("Tactical disabled")
+
+
+def amount_edges(rules):
+    """Two sorted edges so that every predicate is constant inside each bin.
+
+    Bins are ``(-inf, e0)``, ``[e0, e1)``, ``[e1, inf)`` (bisect_right). The
+    strategic test is ``amount > threshold``, i.e. ``amount >= nextafter(threshold)``.
+    """
+    strategic_edge = float(np.nextafter(rules.threshold, np.inf))
+    return tuple(sorted((rules.marketplace_limit, strategic_edge)))
+
+
+def bin_representatives(edges):
+    """One amount inside each of the three bins ``amount_edges`` cuts"""
+    return (float(np.nextafter(edges[0], -np.inf)), edges[0], edges[1])
+
+
+def supplier_states(rules):
+    """(pool vendor code -> state, pool supplier name -> state, Buying Channels table code -> state).
+
+    A state is (kind, detail). Table codes the pool already covers are left
+    out; the router checks the pool (by code, then by name) before the table.
+    """
+    by_code, by_name, by_channel = {}, {}, {}
+    if rules.pool_enabled:
+        for mapping, logic, channel, target in (
+            (rules.supplier_logic, rules.supplier_logic, rules.supplier_channel, by_code),
+            (rules.supplier_logic_by_name, rules.supplier_logic_by_name, rules.supplier_channel_by_name, by_name),
+        ):
+            for key in mapping:
+                if logic[key] == DEFAULT_LOGIC_TYPE and rules.buying_channels_enabled:
+                    target[key] = (POOL_BUYING, channel.get(key, ""))
+                else:
+                    target[key] = (POOL_SOURCING, "")
+    if rules.buying_channels_enabled:
+        for code, channel_type in rules.channel_by_vendor.items():
+            if code not in by_code:
+                by_channel[code] = (TABLE_CHANNEL, channel_type)
+    return by_code, by_name, by_channel
+
+
+class CompiledRules:
+    """Flattened, immutable decision table over one or many blueprints.
+
+    When scopes overlap, the first blueprint passed to ``compile_blueprints``
+    wins.
+    """
+
+    def __init__(self, rules, scope, states, vendor_states, name_states, channel_states, edges, outcome_ids, outcomes,
+                 blacklists):
+        self.rules = rules
+        self.scope = scope                  # (l4 or None, market or None) -> rule index
+        self.states = states                # state id -> (kind, detail)
+        self.vendor_states = vendor_states  # (rule, pool vendor code) -> state id
+        self.name_states = name_states      # (rule, casefolded pool supplier name) -> state id
+        self.channel_states = channel_states  # (rule, Buying Channels table vendor code) -> state id
+        self.edges = edges                  # float64 (n_rules, 2)
+        self.outcome_ids = outcome_ids      # int32 (n_rules, n_states, 3)
+        self.outcomes = outcomes            # outcome id -> (route, detail, reason code)
+        self.blacklists = blacklists        # rule -> (codes, casefolded names)
+        self._build_lookup_indexes()
+
+    # --- Serialization ---
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in [k for k in state if k.startswith("_ix")]:
+            del state[key]
+        state["format_version"] = COMPILED_FORMAT_VERSION
+        return state
+
+    def __setstate__(self, state):
+        if state.pop("format_version", None) != COMPILED_FORMAT_VERSION:
+            raise ValueError("Compiled rules were built by an incompatible version; recompile the blueprints")
+        self.__dict__.update(state)
+        self._build_lookup_indexes()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            compiled = pickle.load(f)
+        if not isinstance(compiled, CompiledRules):
+            raise ValueError(f"{path} does not contain compiled rules")
+        return compiled
+
+    # --- Lookups ---
+
+    def _build_lookup_indexes(self):
+        """Integer indexes used by decide_batch (derived data, rebuilt on load)"""
+        scope_keys = list(self.scope)
+        self._ix_l4 = pd.Index(sorted({l4 for l4, _ in scope_keys if l4 is not None}))
+        self._ix_market = pd.Index(sorted({m for _, m in scope_keys if m is not None}))
+        n_markets = len(self._ix_market) + 1  # last slot = wildcard
+        n_l4 = len(self._ix_l4) + 1
+        self._ix_scope_width = n_markets
+        scope_table = np.full(n_l4 * n_markets, -1, dtype=np.int32)
+        for (l4, market), rule in self.scope.items():
+            l4_code = n_l4 - 1 if l4 is None else self._ix_l4.get_loc(l4)
+            m_code = n_markets - 1 if market is None else self._ix_market.get_loc(market)
+            scope_table[l4_code * n_markets + m_code] = rule
+        self._ix_scope = scope_table
+
+        # Vendor code maps as Series keyed by rule * (n + 1) + code index (n = unknown code)
+        self._ix_vendor = pd.Index(sorted({code for states in (self.vendor_states, self.channel_states)
+                                           for _, code in states}))
+        for attr in ("vendor_states", "channel_states"):
+            states = getattr(self, attr)
+            rules = np.fromiter((rule for rule, _ in states), dtype=np.int64, count=len(states))
+            setattr(self, f"_ix_{attr}", pd.Series(
+                np.fromiter(states.values(), dtype=np.int32, count=len(states)),
+                index=rules * (len(self._ix_vendor) + 1) + self._ix_vendor.get_indexer([code for _, code in states]),
+            ))
+
+        # Blacklists as integer keys rule * (n + 1) + item index, for vectorized membership tests
+        for attr, position in (("codes", 0), ("names", 1)):
+            pairs = [(r, item) for r, entry in enumerate(self.blacklists) for item in entry[position]]
+            items = pd.Index(sorted({item for _, item in pairs}))
+            rules = np.array([r for r, _ in pairs], dtype=np.int64)
+            keys = rules * (len(items) + 1) + items.get_indexer([item for _, item in pairs])
+            setattr(self, f"_ix_blacklist_{attr}", items)
+            setattr(self, f"_ix_blacklist_{attr}_keys", np.unique(keys))
+
+    def find_rule(self, l4, market):
+        for key in ((l4, market), (l4, None), (None, market), (None, None)):
+            rule = self.scope.get(key)
+            if rule is not None:
+                return rule
+        return None
+
+    def decide(self, l4, end_market, vendor_code, amount, item_code=None, item_name=None, supplier_name=None):
+        """Route one requisition line; returns ``(route, detail, reason)``"""
+        rule = self.find_rule(str(l4).strip(), str(end_market).strip())
+        if rule is None:
+            return ROUTE_REJECT, "", REASONS[0]
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            amount = float("nan")
+        if amount != amount:
+            return ROUTE_REJECT, "", REASONS[1]
+
+        vendor_code = str(vendor_code).strip()
+        state = self.vendor_states.get((rule, vendor_code))
+        if state is None and supplier_name:
+            state = self.name_states.get((rule, str(supplier_name).strip().casefold()))
+        if state is None:
+            state = self.channel_states.get((rule, vendor_code))
+        if state is None:
+            codes, names = self.blacklists[rule]
+            blacklisted = (item_code is not None and str(item_code).strip() in codes) or (
+                item_name is not None and str(item_name).strip().casefold() in names)
+            state = UNKNOWN_BLACKLISTED if blacklisted else UNKNOWN
+
+        amount_bin = bisect.bisect_right(self.edges[rule], amount)
+        route, detail, reason = self.outcomes[self.outcome_ids[rule, state, amount_bin]]
+        return route, detail, REASONS[reason]
+
+    def decide_batch(self, requisitions):
+        """Vectorized decide over a requisition DataFrame (same columns as route_requisitions)"""
+        req = normalize_requisitions(requisitions)
+        n_rows = len(req)
+        if not self.rules:
+            return requisitions.assign(
+                route=pd.Categorical.from_codes(np.full(n_rows, ROUTES.index(ROUTE_REJECT), dtype=np.int8), categories=ROUTES),
+                route_detail=np.full(n_rows, "", dtype=object),
+                route_reason=pd.Categorical.from_codes(np.zeros(n_rows, dtype=np.int8), categories=REASONS),
+            )
+
+        def clean(col):
+            return req[col].where(req[col].notna(), "").astype(str).str.strip()
+
+        l4, market, vendor = clean("l4"), clean("end_market"), clean("vendor_code")
+        amount = pd.to_numeric(req["amount"], errors="coerce").to_numpy(dtype=float)
+
+        # Scope: exact, then L4 wildcard market, market wildcard L4, full wildcard
+        width = self._ix_scope_width
+        l4_codes = self._ix_l4.get_indexer(l4)
+        m_codes = self._ix_market.get_indexer(market)
+        wild_l4, wild_m = len(self._ix_l4), width - 1
+        rule = np.full(n_rows, -1, dtype=np.int64)
+        for use_l4, use_m in ((True, True), (True, False), (False, True), (False, False)):
+            lc = l4_codes if use_l4 else np.full(n_rows, wild_l4)
+            mc = m_codes if use_m else np.full(n_rows, wild_m)
+            ok = (rule < 0) & (lc >= 0) & (mc >= 0)
+            rule[ok] = self._ix_scope[lc[ok] * width + mc[ok]]
+
+        in_scope = rule >= 0
+        valid = in_scope & ~np.isnan(amount)
+        safe_rule = np.where(in_scope, rule, 0)
+
+        # Supplier state: pool by vendor code, pool by supplier name, then the Buying Channels table
+        vendor_codes = self._ix_vendor.get_indexer(vendor)
+        state_keys = safe_rule * (len(self._ix_vendor) + 1) + np.where(vendor_codes >= 0, vendor_codes, len(self._ix_vendor))
+        state = self._ix_vendor_states.reindex(state_keys).to_numpy(dtype=float, copy=True)  # writable under copy-on-write
+        if self.name_states and "supplier_name" in req.columns:
+            names = clean("supplier_name").str.casefold().to_numpy(dtype=object)
+            missing = np.flatnonzero(np.isnan(state))
+            state[missing] = [self.name_states.get((r, n), np.nan) for r, n in zip(safe_rule[missing], names[missing])]
+        if self.channel_states:
+            missing = np.flatnonzero(np.isnan(state))
+            state[missing] = self._ix_channel_states.reindex(state_keys[missing]).to_numpy(dtype=float)
+        unknown = np.isnan(state)
+        state = np.where(unknown, UNKNOWN, state).astype(np.int64)
+
+        blacklisted = np.zeros(n_rows, dtype=bool)
+        for attr, col in (("codes", "item_code"), ("names", "item_name")):
+            items, keys = getattr(self, f"_ix_blacklist_{attr}"), getattr(self, f"_ix_blacklist_{attr}_keys")
+            if len(keys) and col in req.columns:
+                values = clean(col)
+                if attr == "names":
+                    values = values.str.casefold()
+                item_codes = items.get_indexer(values)
+                blacklisted |= (item_codes >= 0) & np.isin(safe_rule * (len(items) + 1) + item_codes, keys)
+        state[unknown & blacklisted] = UNKNOWN_BLACKLISTED
+
+        edges = self.edges[safe_rule]
+        amount_bin = (amount >= edges[:, 0]).astype(np.int64) + (amount >= edges[:, 1])
+        outcome = self.outcome_ids[safe_rule, state, amount_bin]
+
+        routes = np.array([ROUTES.index(route) for route, _, _ in self.outcomes], dtype=np.int8)[outcome]
+        details = np.array([detail for _, detail, _ in self.outcomes], dtype=object)[outcome]
+        reasons = np.array([reason for _, _, reason in self.outcomes], dtype=np.int8)[outcome]
+        routes[~valid] = ROUTES.index(ROUTE_REJECT)
+        details[~valid] = ""
+        reasons[~in_scope] = 0
+        reasons[in_scope & ~valid] = 1
+
+        return requisitions.assign(
+            route=pd.Categorical.from_codes(routes, categories=ROUTES),
+            route_detail=details,
+            route_reason=pd.Categorical.from_codes(reasons, categories=REASONS),
+        )
+
+
+def compile_blueprints(blueprints):
+    """Compile one blueprint dict, or an iterable of them, into CompiledRules"""
+    if isinstance(blueprints, dict):
+        blueprints = [blueprints]
+
+    rules, scope = [], {}
+    states = [(UNKNOWN, ""), (UNKNOWN_BLACKLISTED, "")]
+    state_ids = {s: i for i, s in enumerate(states)}
+    vendor_states, name_states, channel_states = {}, {}, {}
+    for blueprint in blueprints:
+        r = len(rules)
+        rule = blueprint if isinstance(blueprint, BlueprintRules) else BlueprintRules.from_blueprint(blueprint)
+        rules.append(rule)
+        for l4 in rule.l4 or (None,):
+            for market in rule.end_markets or (None,):
+                scope.setdefault((l4, market), r)
+        by_code, by_name, by_channel = supplier_states(rule)
+        for target, mapping in ((vendor_states, by_code), (name_states, by_name), (channel_states, by_channel)):
+            for key, s in mapping.items():
+                if s not in state_ids:
+                    state_ids[s] = len(states)
+                    states.append(s)
+                target[(r, key)] = state_ids[s]
+
+    edges = np.array([amount_edges(rule) for rule in rules], dtype=float).reshape(len(rules), 2)
+    outcome_index, outcomes = {}, []
+    outcome_ids = np.zeros((len(rules), len(states), 3), dtype=np.int32)
+    for r, rule in enumerate(rules):
+        for s, (kind, detail) in enumerate(states):
+            for b, amount in enumerate(bin_representatives(edges[r])):
+                outcome = evaluate(rule, kind, detail, amount)
+                if outcome not in outcome_index:
+                    outcome_index[outcome] = len(outcomes)
+                    outcomes.append(outcome)
+                outcome_ids[r, s, b] = outcome_index[outcome]
+
+    blacklists = [(rule.blacklist_codes, rule.blacklist_names) for rule in rules]
+    return CompiledRules(rules, scope, states, vendor_states, name_states, channel_states, edges, outcome_ids, outcomes,
+                         blacklists)
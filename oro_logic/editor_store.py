@@ -0,0 +1,202 @@
+"""Paged, delta-tracked backing store for the app's large data-editor tables.
+
+The editor only ever sees one page (``page_frame``), which stays the same
+object until the page changes, so ``st.data_editor`` keeps accumulating its
+edit delta against it. ``apply`` brings the store in line with that delta,
+touching only the rows it names, and records their ids in a dirty set.
+Instead of copying the whole table on every rerun, consumers ask for:
+
+- ``records()``: the table's JSON records, rebuilt only for dirty rows
+- ``digest(columns)``: a content hash over some columns, from per-row hashes
+  refreshed only for dirty rows, so a stage that doesn't read a column
+  (the diagram and Comments) isn't invalidated by edits to it
+
+Deleted rows stay hidden until the page is left; added rows are inserted
+after the page's last row. ``compact_columns`` are held as categoricals
+(see oro_logic.compact); the page handed to the editor is plain text.
+"""
+
+import hashlib
+import math
+
+import pandas as pd
+
+from oro_logic.compact import add_categories, compact_frame, memory_report, records_bytes
+
+PAGE_SIZE = 100
+
+
+def _cell(value):
+    return "" if value is None or (isinstance(value, float) and math.isnan(value)) else str(value)
+
+
+class EditorStore:
+    """One editable table: committed rows plus the open page's pending editor delta"""
+
+    def __init__(self, frame, columns, key_columns, page_size=PAGE_SIZE, compact_columns=()):
+        self.columns = list(columns)
+        self.key_columns = list(key_columns)
+        self.compact_columns = [column for column in compact_columns if column in self.columns]
+        self.page_size = page_size
+        self.generation = 0  # changes whenever the editor must start from a fresh page (part of its key)
+        self.version = 0     # changes whenever the visible content does
+        self.load(frame)
+
+    # -- loading and paging ---------------------------------------------------
+
+    def load(self, frame):
+        """Replace the whole table (file import, blueprint load)"""
+        rows = pd.DataFrame(frame).reindex(columns=self.columns)
+        rows = rows.where(rows.notna(), "").astype(str).reset_index(drop=True)
+        self.rows = compact_frame(rows, columns=self.compact_columns) if self.compact_columns else rows
+        self._next_id = len(self.rows)
+        self._records = {}
+        self._hashes = {}
+        self._digests = {}  # columns -> (version, digest)
+        self._stale = {"records": set(self.rows.index)}
+        self.page = 0
+        self._open_page()
+        self.version += 1
+
+    def __len__(self):
+        return len(self.rows) - len(self._hidden)
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(len(self.rows) / self.page_size))
+
+    def set_page(self, page):
+        """Commit the open page's deletions and show another page"""
+        if self._hidden:
+            self.rows = self.rows.drop(index=list(self._hidden))
+            self._forget(self._hidden)
+        self.page = min(max(int(page), 0), self.page_count - 1)
+        self._open_page()
+
+    def _open_page(self):
+        start = self.page * self.page_size
+        self._page_ids = list(self.rows.index[start:start + self.page_size])
+        self.page_frame = self.rows.loc[self._page_ids].reset_index(drop=True).astype(str)
+        self._edited = {}
+        self._added_ids = []
+        self._hidden = set()
+        self.generation += 1
+
+    # -- editor deltas --------------------------------------------------------
+
+    def _set_row(self, row_id, values, changed):
+        current = self.rows.loc[row_id, self.columns].tolist()
+        if current != values:
+            for column, value in zip(self.columns, values):
+                add_categories(self.rows, column, [value])
+            self.rows.loc[row_id, self.columns] = values
+            changed.add(row_id)
+
+    def _insert_rows(self, count):
+        """Append ``count`` blank rows after the page's last row (and any rows added before)"""
+        new_ids = list(range(self._next_id, self._next_id + count))
+        self._next_id += count
+        anchor = (self._added_ids or self._page_ids or [None])[-1]
+        cut = self.rows.index.get_loc(anchor) + 1 if anchor is not None else len(self.rows)
+        blank = self.rows.iloc[:0].reindex(new_ids).fillna("")  # same dtypes, so categoricals stay compact
+        self.rows = pd.concat([self.rows.iloc[:cut], blank, self.rows.iloc[cut:]])
+        self._added_ids.extend(new_ids)
+        return new_ids
+
+    def apply(self, delta):
+        """Apply the editor's cumulative delta for the open page; returns the ids of changed rows.
+
+        ``delta`` is the data editor's state: ``edited_rows`` {position:
+        {column: value}}, ``added_rows`` [{column: value}] and
+        ``deleted_rows`` [position], all relative to ``page_frame``.
+        """
+        delta = delta or {}
+        changed = set()
+
+        edited = {int(pos): dict(cells) for pos, cells in (delta.get("edited_rows") or {}).items()}
+        for pos in set(self._edited) | set(edited):
+            if pos >= len(self._page_ids):
+                continue
+            values = self.page_frame.loc[pos].to_dict()
+            values.update((column, _cell(value)) for column, value in edited.get(pos, {}).items() if column in values)
+            self._set_row(self._page_ids[pos], [values[column] for column in self.columns], changed)
+        self._edited = edited
+
+        added = delta.get("added_rows") or []
+        if len(added) > len(self._added_ids):
+            changed.update(self._insert_rows(len(added) - len(self._added_ids)))
+        elif len(added) < len(self._added_ids):
+            removed = self._added_ids[len(added):]
+            del self._added_ids[len(added):]
+            self.rows = self.rows.drop(index=removed)
+            self._forget(removed)
+            changed.update(removed)
+        for row_id, cells in zip(self._added_ids, added):
+            self._set_row(row_id, [_cell(cells.get(column)) for column in self.columns], changed)
+
+        hidden = {self._page_ids[pos] for pos in delta.get("deleted_rows") or [] if pos < len(self._page_ids)}
+        changed |= hidden ^ self._hidden
+        self._hidden = hidden
+
+        if changed:
+            self.version += 1
+            for ids in self._stale.values():
+                ids.update(row_id for row_id in changed if row_id in self.rows.index)
+        return changed
+
+    def _forget(self, row_ids):
+        for row_id in row_ids:
+            self._records.pop(row_id, None)
+        for ids in self._stale.values():
+            ids.difference_update(row_ids)
+        for hashes in self._hashes.values():
+            for row_id in row_ids:
+                hashes.pop(row_id, None)
+
+    # -- derived views --------------------------------------------------------
+
+    def _take_stale(self, consumer):
+        if consumer not in self._stale:
+            self._stale[consumer] = set()
+            return list(self.rows.index)
+        stale, self._stale[consumer] = self._stale[consumer], set()
+        return [row_id for row_id in stale if row_id in self.rows.index]
+
+    def _visible_index(self):
+        return self.rows.index.difference(list(self._hidden), sort=False) if self._hidden else self.rows.index
+
+    def frame(self):
+        """The table as the user sees it (one copy, for consumers that need a DataFrame)"""
+        return self.rows.drop(index=list(self._hidden)) if self._hidden else self.rows.copy()
+
+    def _values(self, row_ids, columns):
+        return zip(row_ids, self.rows.loc[row_ids, list(columns)].to_numpy().tolist())
+
+    def records(self):
+        """JSON records (stripped) of the visible rows that have a key column filled in"""
+        for row_id, values in self._values(self._take_stale("records"), self.columns):
+            record = dict(zip(self.columns, (value.strip() for value in values)))
+            if any(record[column] for column in self.key_columns):
+                self._records[row_id] = record
+            else:
+                self._records.pop(row_id, None)
+        return [self._records[row_id] for row_id in self._visible_index() if row_id in self._records]
+
+    def digest(self, columns=None):
+        """Content hash of the visible rows' ``columns`` (default: all), in table order"""
+        columns = tuple(columns or self.columns)
+        version, digest = self._digests.get(columns, (None, None))
+        if version == self.version:
+            return digest
+        hashes = self._hashes.setdefault(columns, {})
+        for row_id, values in self._values(self._take_stale(("digest", columns)), columns):
+            hashes[row_id] = hashlib.sha1("\x1f".join(values).encode("utf-8")).digest()
+        digest = hashlib.sha1(b"".join(hashes[row_id] for row_id in self._visible_index())).hexdigest()
+        self._digests[columns] = (self.version, digest)
+        return digest
+
+    def memory_report(self):
+        """Session memory of the table: rows (compact vs. plain text) and the cached records"""
+        report = memory_report(self.rows)
+        report["records_bytes"] = records_bytes(list(self._records.values()))
+        return report
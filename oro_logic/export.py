@@ -0,0 +1,160 @@
+"""Blueprint exports: the JSON document, its in-app preview and the 5-sheet Excel workbook.
+
+Exports are built on demand and memoized by blueprint hash
+(``export_artifact``), so reruns that don't change the blueprint, or never
+download anything, don't rebuild them. The hash leaves out the metadata, so
+memoized artifacts are built without it and stamped on delivery.
+"""
+
+import io
+import json
+import threading
+
+from oro_logic.blueprint import BLUEPRINT_TABLES
+
+_MEMORY_LIMIT = 16
+_artifacts = {}  # (blueprint hash, kind) -> artifact (oldest dropped past _MEMORY_LIMIT)
+_artifacts_lock = threading.Lock()  # download callables run outside the script thread
+
+PREVIEW_ROWS = 20  # rows of each record table shown in the in-app preview
+PREVIEW_CHARS = 20_000
+
+
+def export_artifact(blueprint_key, kind, build):
+    """``build()`` once per (blueprint hash, kind); later calls return the stored artifact"""
+    key = (blueprint_key, kind)
+    with _artifacts_lock:
+        if key in _artifacts:
+            return _artifacts[key]
+    artifact = build()
+    with _artifacts_lock:
+        if len(_artifacts) >= _MEMORY_LIMIT:
+            _artifacts.pop(next(iter(_artifacts)))
+        _artifacts[key] = artifact
+    return artifact
+
+
+def blueprint_json(output_data):
+    """Pretty-printed JSON blueprint (what the app downloads)"""
+    return json.dumps(output_data, indent=2, ensure_ascii=False)
+
+
+def stamped_json(body, metadata):
+    """``body`` (``blueprint_json`` of a blueprint without metadata) with ``metadata`` added as its last key.
+
+    Gives the same text as ``blueprint_json({**blueprint, "metadata": metadata})``,
+    so the memoized body can be reused while ``created_at`` stays current.
+    """
+    tail = json.dumps({"metadata": metadata}, indent=2, ensure_ascii=False)[1:]
+    return "{" + tail if body == "{}" else body[:-2] + "," + tail
+
+
+def blueprint_preview(output_data, max_rows=PREVIEW_ROWS, max_chars=PREVIEW_CHARS):
+    """(text, truncated): the JSON blueprint with each record table cut to ``max_rows``, capped at ``max_chars``.
+
+    Only the rows kept are serialized, so the preview costs the same for a
+    50k supplier pool as for a small one.
+    """
+    preview = {key: dict(value) if isinstance(value, dict) else value for key, value in output_data.items()}
+    truncated = False
+    for part, field in BLUEPRINT_TABLES:
+        records = (preview.get(part) or {}).get(field)
+        if isinstance(records, list) and len(records) > max_rows:
+            preview[part][field] = [*records[:max_rows], f"… {len(records) - max_rows:,} more rows"]
+            truncated = True
+    text = json.dumps(preview, indent=2, ensure_ascii=False)
+    if len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars)
+        text = text[:cut if cut > 0 else max_chars] + f"\n… ({len(text) - max_chars:,} more characters)"
+        truncated = True
+    return text, truncated
+
+
+def _joined(values):
+    return ", ".join(values) if values else "N/A"
+
+
+def build_excel(output_data):
+    """Excel workbook bytes: Logic Matrix, Suppliers, Buying Channels, Marketplace Blacklist, Summary.
+
+    Written in openpyxl's write-only mode, so rows are streamed out as they
+    are appended and memory stays flat for large supplier pools.
+    Requires openpyxl (ImportError otherwise).
+    """
+    from openpyxl import Workbook
+
+    scope = output_data["scope"]
+    category = output_data["category"]
+    pool = output_data["supplier_pool"]
+    channels = output_data["buying_channels"]
+    stream2 = output_data["stream2"]
+
+    wb = Workbook(write_only=True)
+
+    # Sheet 1: Logic Matrix
+    ws1 = wb.create_sheet("Logic Matrix")
+    for row in (
+        ["Field", "Value"],
+        ["Region", scope["region"]],
+        ["Cluster/DRBU", scope["cluster"]],
+        ["End Markets", _joined(scope["end_markets"])],
+        ["Business User Markets", _joined(scope["business_user_markets"])],
+        ["Company Code", scope["company_code"]],
+        ["Category L1", _joined(category["l1"])],
+        ["Category L2", _joined(category["l2"])],
+        ["Category L3", _joined(category["l3"])],
+        ["Category L4", _joined(category["l4"])],
+        ["Category Full Path", category["full_path"]],
+        ["Supplier Pool Enabled", pool["enabled"]],
+        ["Supplier Type Filter", pool["supplier_type_filter"]],
+        ["Buying Channels Enabled", channels["enabled"]],
+        ["Allow Marketplace", channels["allow_marketplace"]],
+        ["Marketplace Limit", channels["marketplace_limit"]],
+        ["Marketplace Blacklist Items", len(channels["marketplace_blacklist"])],
+        ["Stream 2 Enabled", stream2["enabled"]],
+        ["Tactical Threshold", stream2["tactical_threshold"]],
+        ["Tactical Enabled", stream2["tactical"]["enabled"]],
+        ["Tactical Action", stream2["tactical"]["action"]],
+        ["Tactical Manager", stream2["tactical"]["manager"]],
+        ["Tactical Comments", stream2["tactical"]["comments"]],
+        ["Strategic Enabled", stream2["strategic"]["enabled"]],
+        ["Strategic Owner", stream2["strategic"]["owner"]],
+        ["Strategic Manager", stream2["strategic"]["manager"]],
+        ["Strategic Comments", stream2["strategic"]["comments"]],
+        ["SDC / Desk Instructions", stream2["instructions"]],
+    ):
+        ws1.append(row)
+
+    # Sheets 2-4: one row per record, or a placeholder line
+    for title, records, columns, empty_text in (
+        ("Suppliers", pool["suppliers"],
+         [(key, key) for key in ("Supplier Name", "Vendor Code", "Supplier Type", "Logic Type",
+                                 "Buying Channel", "Tender Required", "Comments")],
+         "No suppliers defined"),
+        ("Buying Channels", channels["channels"],
+         [(key, key) for key in ("Channel Type", "Supplier", "Vendor Code", "Link", "Comments")],
+         "No buying channels defined"),
+        ("Marketplace Blacklist", channels["marketplace_blacklist"],
+         [("Item Name", "item_name"), ("Item Code/SKU", "item_code"), ("Category", "category"), ("Reason", "reason")],
+         "No blacklist items defined"),
+    ):
+        ws = wb.create_sheet(title)
+        if records:
+            ws.append([header for header, _ in columns])
+            for record in records:
+                ws.append([record.get(key, "") for _, key in columns])
+        else:
+            ws.append([empty_text])
+
+    # Sheet 5: Summary
+    ws5 = wb.create_sheet("Summary")
+    ws5.append(["Item", "Count"])
+    ws5.append(["End Markets", len(scope["end_markets"])])
+    ws5.append(["Business User Markets", len(scope["business_user_markets"])])
+    ws5.append(["Suppliers", len(pool["suppliers"])])
+    ws5.append(["Buying Channels", len(channels["channels"])])
+    ws5.append(["Marketplace Blacklist Items", len(channels["marketplace_blacklist"])])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
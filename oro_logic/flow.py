@@ -0,0 +1,439 @@
+"""Logic flow graph: one typed model of a blueprint's decision flow.
+
+``build_flow_graph(blueprint)`` turns a blueprint (``output_data``) into nodes
+and edges in a single pass over its settings and suppliers. The Logic Flow
+diagram is rendered from the graph (``to_mermaid``), and ``validate`` checks
+both the graph itself (dangling edges, unreachable nodes, dead ends) and
+that every outcome the router (``oro_logic.routing``) can produce for the
+blueprint has a node to land on.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+
+from oro_logic.blueprint import blueprint_hash
+from oro_logic.routing import (
+    DEFAULT_LOGIC_TYPE, DEFAULT_SUPPLIER_TYPE, REASONS, ROUTE_BUYING_CHANNEL, ROUTE_MARKETPLACE, ROUTE_REJECT,
+    ROUTE_STRATEGIC, ROUTE_TACTICAL, BlueprintRules,
+)
+
+START = "Start"
+
+# Mermaid node syntax per shape
+SHAPES = {
+    "rect": '{id}["{label}"]',
+    "round": '{id}("{label}")',
+    "stadium": '{id}(["{label}"])',
+    "circle": '{id}(("{label}"))',
+    "diamond": '{id}{{"{label}"}}',
+}
+CLASS_DEFS = {
+    "green": "fill:#dcfce7,stroke:#16a34a,stroke-width:2px",
+    "red": "fill:#fee2e2,stroke:#ef4444,stroke-width:2px",
+    "blue": "fill:#dbeafe,stroke:#3b82f6,stroke-width:2px",
+    "yellow": "fill:#fef3c7,stroke:#f59e0b,stroke-width:2px",
+}
+TERMINAL_KINDS = ("outcome", "note")
+DETAIL_LIMIT = 50  # suppliers drawn one node each; larger pools are aggregated into groups
+# Supplier Pool columns the diagram and its routing checks read (Comments isn't one)
+FLOW_SUPPLIER_COLUMNS = ["Supplier Name", "Vendor Code", "Supplier Type", "Logic Type", "Buying Channel", "Tender Required"]
+# Sourcing Logic notes the diagram doesn't draw
+FLOW_IGNORED_NOTES = [("tactical", "comments"), ("strategic", "comments"), (None, "instructions")]
+
+# Router reason code (index into REASONS) -> diagram node(s) it ends on
+REASON_NODES = {
+    0: ("Reject",),
+    1: ("Reject",),
+    2: ("BuyChannel",),
+    3: ("BuyChannel",),
+    4: ("GoMKP",),
+    5: ("RejectSourcing", "RejectAll"),
+    6: ("Strategic",),
+    7: ("RejectStrategic",),
+    8: ("Tactical",),
+    9: ("RejectTactical",),
+}
+
+# Characters that break Mermaid labels in free text (supplier names, managers, ...)
+_FREE_TEXT = str.maketrans({":": "-", "<": None, ">": None, '"': "'"})
+
+
+def clean_label(text):
+    return str(text).translate(_FREE_TEXT)
+
+
+@dataclass(frozen=True)
+class Node:
+    id: str
+    label: str
+    shape: str = "rect"
+    kind: str = "step"        # start | decision | step | pool | supplier | outcome | note
+    style: str = None         # CLASS_DEFS key
+    group: str = None         # subgraph id
+    route: str = None         # routing.ROUTES value for outcome nodes
+
+
+@dataclass(frozen=True)
+class Edge:
+    source: str
+    target: str
+    label: str = ""
+    dashed: bool = False
+
+
+class FlowGraph:
+    """Ordered nodes and edges; node ids are unique (re-adding an id keeps the first node)"""
+
+    def __init__(self, groups=None):
+        self.nodes = {}
+        self.edges = []
+        self.groups = dict(groups or {})  # subgraph id -> title
+
+    def add_node(self, node_id, label, **attrs):
+        if node_id not in self.nodes:
+            self.nodes[node_id] = Node(node_id, label, **attrs)
+        return node_id
+
+    def add_edge(self, source, target, label="", dashed=False):
+        self.edges.append(Edge(source, target, label, dashed))
+
+    def successors(self):
+        out = {node_id: [] for node_id in self.nodes}
+        for edge in self.edges:
+            out.setdefault(edge.source, []).append(edge.target)
+        return out
+
+    def reachable(self, root=START):
+        succ = self.successors()
+        seen = {root} if root in self.nodes else set()
+        queue = deque(seen)
+        while queue:
+            for target in succ.get(queue.popleft(), ()):
+                if target not in seen and target in self.nodes:
+                    seen.add(target)
+                    queue.append(target)
+        return seen
+
+    def outcomes(self):
+        """{route: [outcome node ids]}"""
+        routes = {}
+        for node in self.nodes.values():
+            if node.route:
+                routes.setdefault(node.route, []).append(node.id)
+        return routes
+
+    def validate(self, rules=None):
+        """Human-readable issues; empty when the graph is consistent.
+
+        With ``rules`` (BlueprintRules), also checks that every routing
+        reason the rules can produce ends on a node of this graph.
+        """
+        issues = []
+        for edge in self.edges:
+            for end in (edge.source, edge.target):
+                if end not in self.nodes:
+                    issues.append(f"Edge {edge.source} -> {edge.target} references undeclared node {end}")
+        reachable = self.reachable()
+        succ = self.successors()
+        for node in self.nodes.values():
+            if node.id not in reachable:
+                issues.append(f"Node {node.id} ({node.label}) is unreachable from {START}")
+            elif node.kind not in TERMINAL_KINDS and not succ.get(node.id):
+                issues.append(f"Node {node.id} ({node.label}) is a dead end")
+        if rules is not None:
+            for code in possible_reasons(rules):
+                if not any(node_id in reachable for node_id in REASON_NODES[code]):
+                    issues.append(f"Routing outcome '{REASONS[code]}' has no node in the diagram")
+        return issues
+
+    def to_mermaid(self):
+        lines = ["graph TD"]
+        grouped = {}
+        for node in self.nodes.values():
+            if node.group:
+                grouped.setdefault(node.group, []).append(node)
+            else:
+                lines.append("    " + _declare(node))
+        for group, nodes in grouped.items():
+            lines.append(f"    subgraph {group} [{self.groups.get(group, group)}]")
+            lines.append("        direction TB")
+            lines.extend("        " + _declare(node) for node in nodes)
+            lines.append("    end")
+        for edge in self.edges:
+            arrow = "-.->" if edge.dashed else "-->"
+            label = f"|{clean_label(edge.label)}|" if edge.label else ""
+            lines.append(f"    {edge.source} {arrow}{label} {edge.target}")
+
+        lines.append("")
+        lines.extend(f"    classDef {name} {css}" for name, css in CLASS_DEFS.items())
+        styled = {}
+        for node in self.nodes.values():
+            if node.style:
+                styled.setdefault(node.style, []).append(node.id)
+        lines.extend(f"    class {','.join(ids)} {style}" for style, ids in styled.items())
+        return "\n".join(lines)
+
+
+def _declare(node):
+    return SHAPES[node.shape].format(id=node.id, label=node.label.replace('"', "'"))
+
+
+def possible_reasons(rules):
+    """Reason codes the router can return for these rules (see routing.REASONS)"""
+    codes = [0, 1]
+    if rules.pool_enabled and rules.buying_channels_enabled and (
+            DEFAULT_LOGIC_TYPE in rules.supplier_logic.values() or DEFAULT_LOGIC_TYPE in rules.supplier_logic_by_name.values()):
+        codes.append(2)
+    if rules.buying_channels_enabled and rules.channel_by_vendor:
+        codes.append(3)
+    if rules.buying_channels_enabled and rules.allow_marketplace:
+        codes.append(4)
+    if not rules.sourcing_enabled:
+        codes.append(5)
+    else:
+        codes.append(6 if rules.strategic_enabled else 7)
+        codes.append(8 if rules.tactical_enabled else 9)
+    return codes
+
+
+def _pool_suppliers(pool):
+    """(node id, name, pool, logic type, buying channel, tender) for named suppliers matching the type filter"""
+    type_filter = pool.get("supplier_type_filter", "All") or "All"
+    suppliers = []
+    for i, supp in enumerate(pool.get("suppliers", []) or []):
+        name = str(supp.get("Supplier Name") or "").strip()
+        if not name:
+            continue
+        supp_type = str(supp.get("Supplier Type") or "").strip() or DEFAULT_SUPPLIER_TYPE
+        if type_filter != "All" and supp_type != type_filter:
+            continue
+        logic = str(supp.get("Logic Type") or "").strip() or DEFAULT_LOGIC_TYPE
+        channel = str(supp.get("Buying Channel") or "").strip()
+        tender = str(supp.get("Tender Required") or "").strip() or "No"
+        suppliers.append((f"Supp{i}", name, "Local" if supp_type == "Local" else "Global", logic, channel, tender))
+    return suppliers
+
+
+def _supplier_label(supplier):
+    """Node label for one supplier; only built for the suppliers actually drawn"""
+    _, name, _, _, channel, tender = supplier
+    label = f"{clean_label(name)}\\n{clean_label(channel)}"
+    if tender != "No":
+        label += f"\\n⚠️ Tender: {tender}"
+    return label
+
+
+def _group_suppliers(suppliers, limit):
+    """{(pool, logic type, buying channel): [suppliers]}, first-seen order.
+
+    At most ``limit`` groups keep their own buying channel; the smallest
+    ones beyond that are merged per pool and logic type (channel None).
+    """
+    groups = {}
+    for supp in suppliers:
+        groups.setdefault(supp[2:5], []).append(supp)
+    if len(groups) <= limit:
+        return groups
+    keep = set(sorted(groups, key=lambda key: -len(groups[key]))[:limit])
+    merged = {}
+    for key, members in groups.items():
+        merged.setdefault(key if key in keep else (key[0], key[1], None), []).extend(members)
+    return merged
+
+
+def group_label(key):
+    pool, logic, channel = key
+    return f"{pool} · {logic} · {channel if channel is not None else 'other channels'}"
+
+
+def supplier_groups(blueprint, detail_limit=DETAIL_LIMIT):
+    """[(group key, supplier count)] the diagram aggregates the pool into, or [] when it is drawn in full"""
+    suppliers = _pool_suppliers(blueprint.get("supplier_pool", {}))
+    if len(suppliers) <= detail_limit:
+        return []
+    return [(key, len(members)) for key, members in _group_suppliers(suppliers, detail_limit).items()]
+
+
+def build_flow_graph(blueprint, detail_limit=None, expand=None):
+    """Flow graph for a blueprint, in routing order:
+
+    taxonomy -> Supplier Pool -> Buying Channels table -> Marketplace -> Sourcing
+
+    Every supplier gets its own node unless the pool has more than
+    ``detail_limit`` of them; then suppliers are drawn as one node per
+    (pool, logic type, buying channel) group with a count, and only the
+    group ``expand`` (a key from ``supplier_groups``) lists its members, up
+    to ``detail_limit`` of them.
+    """
+    scope_category = blueprint.get("category", {})
+    pool = blueprint.get("supplier_pool", {})
+    channels = blueprint.get("buying_channels", {})
+    stream2 = blueprint.get("stream2", {})
+    pool_on = bool(pool.get("enabled", True))
+    channels_on = bool(channels.get("enabled", True))
+    sourcing_on = bool(stream2.get("enabled", True))
+    type_filter = pool.get("supplier_type_filter", "All") or "All"
+
+    g = FlowGraph(groups={"SourcingBox": "Sourcing Logic"})
+    g.add_node(START, "User Request", shape="stadium", kind="start")
+    g.add_node("CheckTaxonomy", "Taxonomy Match?", shape="diamond", kind="decision", style="blue")
+    g.add_edge(START, "CheckTaxonomy")
+    g.add_node("Reject", "Reject Request", kind="outcome", style="red", route=ROUTE_REJECT)
+    g.add_edge("CheckTaxonomy", "Reject", "No")
+    cat_path = str(scope_category.get("full_path") or "N/A").replace("\n", " ")
+    g.add_node("CheckTaxonomyYes", f"Category: {cat_path}")
+    g.add_edge("CheckTaxonomy", "CheckTaxonomyYes", "Yes")
+
+    # Where a request goes once a stage doesn't apply, built back to front
+    if sourcing_on:
+        sourcing = g.add_node("Sourcing", "Start Sourcing", shape="round", group="SourcingBox")
+    elif pool_on or channels_on:
+        sourcing = g.add_node("RejectSourcing", "Reject - Sourcing Disabled", kind="outcome", style="red",
+                              route=ROUTE_REJECT)
+    else:
+        sourcing = g.add_node("RejectAll", "Reject - All Logic Disabled", kind="outcome", style="red",
+                              route=ROUTE_REJECT)
+
+    after_channels = sourcing
+    if channels_on and channels.get("allow_marketplace"):
+        after_channels = g.add_node("CheckMKP", "Marketplace?", shape="diamond", kind="decision")
+        g.add_node("MKPLimit", f"< £{channels.get('marketplace_limit', 0)}?", shape="diamond", kind="decision")
+        g.add_node("GoMKP", "Buy on Marketplace", kind="outcome", style="green", route=ROUTE_MARKETPLACE)
+        g.add_edge("CheckMKP", "MKPLimit", "Yes")
+        g.add_edge("CheckMKP", sourcing, "No")
+        if channels.get("marketplace_blacklist"):
+            g.add_node("CheckBlacklist", "Blacklisted item?", shape="diamond", kind="decision")
+            g.add_edge("MKPLimit", "CheckBlacklist", "Yes")
+            g.add_edge("CheckBlacklist", "GoMKP", "No")
+            g.add_edge("CheckBlacklist", sourcing, "Yes")
+        else:
+            g.add_edge("MKPLimit", "GoMKP", "Yes")
+        g.add_edge("MKPLimit", sourcing, "No")
+
+    def buy_channel():
+        if "BuyChannel" not in g.nodes:
+            g.add_node("BuyChannel", "Use Buying Channel", kind="outcome", style="green", route=ROUTE_BUYING_CHANNEL)
+            if sourcing_on:
+                g.add_edge("BuyChannel", sourcing, "Failover", dashed=True)
+        return "BuyChannel"
+
+    after_pool = after_channels
+    if channels_on and channels.get("channels"):
+        after_pool = g.add_node("CheckChannel", "Buying Channel for vendor?", shape="diamond", kind="decision")
+        g.add_edge("CheckChannel", buy_channel(), "Yes")
+        g.add_edge("CheckChannel", after_channels, "No")
+
+    if not pool_on:
+        g.add_edge("CheckTaxonomyYes", after_pool)
+    else:
+        suppliers = _pool_suppliers(pool)
+        if not suppliers:
+            g.add_node("CheckSupp", "Suppliers?", shape="diamond", kind="decision")
+            g.add_edge("CheckTaxonomyYes", "CheckSupp")
+            g.add_edge("CheckSupp", after_pool, "No")
+        else:
+            g.add_node("CheckSupp", "Supplier in Pool?", shape="diamond", kind="decision")
+            g.add_edge("CheckTaxonomyYes", "CheckSupp")
+            g.add_edge("CheckSupp", after_pool, "No")
+            exits = []  # (supplier or group node, where its requests go)
+
+            def target(logic):
+                return buy_channel() if channels_on and logic == DEFAULT_LOGIC_TYPE else sourcing
+
+            by_type = {"Local": [], "Global": []}
+            if detail_limit is None or len(suppliers) <= detail_limit:
+                for supp in suppliers:
+                    node_id, _, supp_pool, logic, _, _ = supp
+                    by_type[supp_pool].append(node_id)
+                    g.add_node(node_id, _supplier_label(supp), kind="supplier", style="green")
+                    exits.append((node_id, target(logic)))
+            else:
+                for k, (key, members) in enumerate(_group_suppliers(suppliers, detail_limit).items()):
+                    supp_pool, logic, channel = key
+                    node_id = f"SuppGroup{k}"
+                    label = f"{len(members):,} suppliers\\n{clean_label(logic)}"
+                    label += f"\\n{clean_label(channel) if channel is not None else 'Other channels'}"
+                    tenders = sum(member[5] != "No" for member in members)
+                    if tenders:
+                        label += f"\\n⚠️ Tender: {tenders:,}"
+                    g.add_node(node_id, label, kind="supplier", style="green")
+                    by_type[supp_pool].append(node_id)
+                    if key != expand:
+                        exits.append((node_id, target(logic)))
+                        continue
+                    # Drill-down: the group's members (bounded) chained below it
+                    previous = node_id
+                    for member in members[:detail_limit]:
+                        member_id = member[0]
+                        g.add_node(member_id, _supplier_label(member), kind="supplier", style="green")
+                        g.add_edge(previous, member_id)
+                        exits.append((member_id, target(logic)))
+                        previous = member_id
+                    if len(members) > detail_limit:
+                        g.add_node(f"{node_id}More", f"... {len(members) - detail_limit:,} more", shape="round",
+                                   kind="note")
+                        g.add_edge(previous, f"{node_id}More")
+            if type_filter == "All":
+                g.add_node("CheckSuppType", "Local or Global Supplier?", shape="diamond", kind="decision", style="blue")
+                g.add_edge("CheckSupp", "CheckSuppType", "Yes")
+            for supp_type, ids in by_type.items():
+                pool_id = f"{supp_type}Pool"
+                if type_filter == "All" and not ids:
+                    continue
+                if type_filter not in ("All", supp_type):
+                    continue
+                g.add_node(pool_id, f"{supp_type} Pool", shape="circle", kind="pool")
+                g.add_edge("CheckSuppType" if type_filter == "All" else "CheckSupp", pool_id,
+                           supp_type if type_filter == "All" else "Yes")
+                # Suppliers hang off the pool as a chain, which keeps the diagram vertical
+                previous = pool_id
+                for node_id in ids:
+                    g.add_edge(previous, node_id)
+                    previous = node_id
+            for node_id, next_id in exits:
+                g.add_edge(node_id, next_id)
+
+    if sourcing_on:
+        g.add_node("CheckThresh", f"> £{stream2.get('tactical_threshold', 0)}?", shape="diamond", kind="decision",
+                   group="SourcingBox")
+        g.add_edge("Sourcing", "CheckThresh")
+        tactical, strategic = stream2.get("tactical", {}), stream2.get("strategic", {})
+        if tactical.get("enabled"):
+            label = f"Tactical: {tactical.get('action', 'N/A')}"
+            if tactical.get("manager"):
+                label += f"\\nManager: {clean_label(tactical['manager'])}"
+            g.add_node("Tactical", label, kind="outcome", style="red", group="SourcingBox", route=ROUTE_TACTICAL)
+        else:
+            g.add_node("RejectTactical", "Reject - Tactical Disabled", kind="outcome", style="red",
+                       group="SourcingBox", route=ROUTE_REJECT)
+        g.add_edge("CheckThresh", "Tactical" if tactical.get("enabled") else "RejectTactical", "No")
+        if strategic.get("enabled"):
+            label = f"Strategic: {strategic.get('owner', 'N/A')}"
+            if strategic.get("manager"):
+                label += f"\\nManager: {clean_label(strategic['manager'])}"
+            g.add_node("Strategic", label, kind="outcome", style="red", group="SourcingBox", route=ROUTE_STRATEGIC)
+        else:
+            g.add_node("RejectStrategic", "Reject - Strategic Disabled", kind="outcome", style="red",
+                       group="SourcingBox", route=ROUTE_REJECT)
+        g.add_edge("CheckThresh", "Strategic" if strategic.get("enabled") else "RejectStrategic", "Yes")
+    return g
+
+
+def flow_issues(blueprint, graph=None):
+    """Validation issues for the blueprint's graph, including the routing cross-check"""
+    graph = graph or build_flow_graph(blueprint)
+    return graph.validate(BlueprintRules.from_blueprint(blueprint))
+
+
+def flow_hash(blueprint, suppliers_digest=None):
+    """``blueprint_hash`` over what the diagram reads: the notes in FLOW_IGNORED_NOTES are left out.
+
+    ``suppliers_digest`` should cover FLOW_SUPPLIER_COLUMNS only.
+    """
+    stream2 = dict(blueprint.get("stream2", {}))
+    for section, field in FLOW_IGNORED_NOTES:
+        if section is None:
+            stream2.pop(field, None)
+        elif isinstance(stream2.get(section), dict):
+            stream2[section] = {key: value for key, value in stream2[section].items() if key != field}
+    return blueprint_hash(dict(blueprint, stream2=stream2), suppliers_digest=suppliers_digest)
@@ -0,0 +1,178 @@
+"""Hierarchy builders for the geography and category taxonomies.
+
+Both builders dedupe with ``drop_duplicates`` and then assemble the nested
+dicts in a single pass over the unique rows, so the cost is linear in the
+number of rows instead of quadratic per branch.
+"""
+
+import hashlib
+import threading
+from types import MappingProxyType
+
+import pandas as pd
+
+GEO_LEVELS = ["Region", "DRBU", "End Market"]
+CAT_LEVELS = ["L1", "L2", "L3", "L4"]
+
+
+def find_cluster_column(df):
+    """Return the cluster column name ('DRBU', 'Cluster' or a close match), or None"""
+    if 'DRBU' in df.columns:
+        return 'DRBU'
+    if 'Cluster' in df.columns:
+        return 'Cluster'
+    possible_cols = [col for col in df.columns if 'cluster' in col.lower() or 'drbu' in col.lower()]
+    return possible_cols[0] if possible_cols else None
+
+
+def _clean_text(df, col):
+    """Column as stripped strings; missing column / NaN become ''"""
+    if col is None or col not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    series = df[col]
+    return series.where(series.notna(), '').astype(str).str.strip()
+
+
+def build_geo_hierarchy(df, cluster_col=None):
+    """Build {Region: {DRBU: [End Market, ...]}} from a geography DataFrame.
+
+    Same shape and ordering as the original row-by-row loader: keys and
+    markets keep their first-appearance order, rows where every level is
+    blank are skipped and partially blank levels become 'Unknown'.
+    """
+    hierarchy = {}
+    if df is None or df.empty:
+        return hierarchy
+    if cluster_col is None:
+        cluster_col = find_cluster_column(df)
+
+    levels = pd.DataFrame({
+        'Region': _clean_text(df, 'Region'),
+        'DRBU': _clean_text(df, cluster_col),
+        'End Market': _clean_text(df, 'End Market'),
+    })
+    levels = levels[(levels != '').any(axis=1)]
+    levels = levels.replace('', 'Unknown').drop_duplicates()
+
+    for region, drbu, end_market in zip(levels['Region'], levels['DRBU'], levels['End Market']):
+        hierarchy.setdefault(region, {}).setdefault(drbu, []).append(end_market)
+    return hierarchy
+
+
+def build_cat_hierarchy(df):
+    """Build {L1: {L2: {L3: [L4, ...]}}} from a category DataFrame.
+
+    Rows missing any of L1-L4 (absent column, NaN or empty string) are skipped;
+    values are used as-is, in first-appearance order.
+    """
+    hierarchy = {}
+    if df is None or df.empty or not set(CAT_LEVELS).issubset(df.columns):
+        return hierarchy
+
+    levels = df[CAT_LEVELS]
+    complete = (levels.notna() & levels.ne('')).all(axis=1)
+    levels = levels[complete].drop_duplicates()
+
+    for l1, l2, l3, l4 in zip(levels['L1'], levels['L2'], levels['L3'], levels['L4']):
+        hierarchy.setdefault(l1, {}).setdefault(l2, {}).setdefault(l3, []).append(l4)
+    return hierarchy
+
+
+def frame_fingerprint(df):
+    """Stable content hash of a DataFrame (columns + values), used as a taxonomy version"""
+    digest = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+_OPTION_CACHE_SIZE = 256  # per index, so an index (and its cache) goes away with its taxonomy version
+
+
+class HierarchyIndex:
+    """Immutable parent -> sorted children index over an ordered list of levels.
+
+    Built once per taxonomy version so the sidebar cascades can compute each
+    dropdown's options with dict lookups and set unions instead of filtering
+    the DataFrame on every rerun. Nodes are addressed by their path tuple,
+    e.g. ``("Marketing", "Marketing Prof Svc")``; the root is ``()``.
+    Blank / NaN values are never offered as children.
+    """
+
+    def __init__(self, df, levels, branches=None):
+        self.levels = tuple(levels)
+        children = {}
+        members = {}
+        if branches is not None:  # a prebuilt index (see branches())
+            for parent, values in branches:
+                children[tuple(parent)] = tuple(values)
+                members[tuple(parent)] = frozenset(values)
+        elif df is not None and not df.empty:
+            frame = df[list(self.levels)]
+            present = frame.notna() & (frame.astype(str).apply(lambda col: col.str.strip()) != '')
+            for depth, level in enumerate(self.levels):
+                # Each depth only needs its own column to be non-blank
+                rows = frame.loc[present[level], list(self.levels[:depth + 1])].drop_duplicates()
+                branch = {}
+                for row in rows.itertuples(index=False, name=None):
+                    branch.setdefault(row[:-1], set()).add(row[-1])
+                for parent, values in branch.items():
+                    children[parent] = tuple(sorted(values))
+                    members[parent] = frozenset(values)
+        self._children = MappingProxyType(children)
+        self._members = MappingProxyType(members)
+        self._option_cache = {}  # selections key -> options (oldest dropped past _OPTION_CACHE_SIZE)
+        self._option_lock = threading.Lock()  # the index is shared by every session's script thread
+
+    def __len__(self):
+        return len(self._children)
+
+    def branches(self):
+        """[(parent path, sorted children)] - JSON-safe, and what ``branches=`` rebuilds the index from"""
+        return [(list(parent), list(values)) for parent, values in self._children.items()]
+
+    def paths(self, depth=None):
+        """Every path ``depth`` levels deep (all levels by default), in sorted order"""
+        paths = [()]
+        for _ in range(len(self.levels) if depth is None else depth):
+            paths = [path + (child,) for path in paths for child in self.children(path)]
+        return paths
+
+    def children(self, path=()):
+        """Sorted children of a single node (empty tuple if unknown)"""
+        return self._children.get(tuple(path), ())
+
+    def options(self, selections=()):
+        """Sorted options for the level below ``selections``.
+
+        ``selections`` holds one entry per already-chosen level; each entry is a
+        single value or an iterable of selected values (multiselect). The
+        result is the union of the children of every valid selected path.
+        """
+        key = tuple(
+            frozenset([sel]) if isinstance(sel, str) or not hasattr(sel, "__iter__") else frozenset(sel)
+            for sel in selections
+        )
+        with self._option_lock:
+            if key in self._option_cache:
+                return self._option_cache[key]
+        options = self._options(key)
+        with self._option_lock:
+            if len(self._option_cache) >= _OPTION_CACHE_SIZE:
+                self._option_cache.pop(next(iter(self._option_cache)))
+            self._option_cache[key] = options
+        return options
+
+    def _options(self, selections):
+        paths = [()]
+        for selected in selections:
+            paths = [path + (child,) for path in paths for child in selected
+                     if child in self._members.get(path, ())]
+            if not paths:
+                return ()
+        if len(paths) == 1:
+            return self.children(paths[0])
+        merged = set()
+        for path in paths:
+            merged.update(self.children(path))
+        return tuple(sorted(merged))
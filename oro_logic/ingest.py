@@ -0,0 +1,230 @@
+"""Taxonomy file ingestion with a columnar on-disk cache.
+
+The shipped ``Geographies & Categories.csv`` is really an XLSX workbook (a
+zip), so the format is detected from the file's magic bytes rather than its
+extension. Workbooks are read with openpyxl in read-only (streaming) mode,
+CSV files in chunks. The raw columns are normalized into two tables:
+
+    geo: Region, DRBU, End Market, Company Code
+    cat: L1, L2, L3, L4
+
+After the first parse both tables are written to a Parquet cache (pickle if
+pyarrow is not installed) keyed by the source file's mtime and SHA-256, so
+later starts skip the workbook entirely.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+GEO_COLUMNS = ['Region', 'DRBU', 'End Market', 'Company Code']
+CAT_COLUMNS = ['L1', 'L2', 'L3', 'L4']
+
+# Source header (lower-cased, stripped) -> normalized column.
+# The group extract names the app's L1 "Category" and shifts Taxonomy L1-L3 down one level.
+COLUMN_ALIASES = {
+    'region': 'Region',
+    'drbu': 'DRBU',
+    'cluster': 'DRBU',
+    'cluster / drbu': 'DRBU',
+    'end market': 'End Market',
+    'market': 'End Market',
+    'company code': 'Company Code',
+    'category': 'L1',
+    'taxonomy l1': 'L2',
+    'taxonomy l2': 'L3',
+    'taxonomy l3': 'L4',
+    'l1': 'L1',
+    'l2': 'L2',
+    'l3': 'L3',
+    'l4': 'L4',
+}
+
+CSV_CHUNK_ROWS = 50_000
+HEADER_SCAN_ROWS = 50
+CACHE_FORMAT_VERSION = 1
+
+try:
+    import pyarrow  # noqa: F401  # type: ignore
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+def detect_format(path):
+    """Return 'xlsx' or 'csv' based on the file's magic bytes, not its extension"""
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head == b'PK\x03\x04':
+        return 'xlsx'
+    return 'csv'
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _normalize_header(row):
+    """Map a raw header row to normalized names (None for unknown columns)"""
+    return [COLUMN_ALIASES.get(str(cell).strip().lower()) if cell is not None else None for cell in row]
+
+
+def _is_header(row):
+    return sum(name is not None for name in _normalize_header(row)) >= 2
+
+
+def _split_tables(frame):
+    """Split a normalized frame into deduplicated geo and category tables"""
+    frame = frame.apply(lambda col: col.where(col.notna(), '').astype(str).str.strip())
+
+    geo = pd.DataFrame(columns=GEO_COLUMNS)
+    if {'Region', 'DRBU', 'End Market'}.issubset(frame.columns):
+        geo = frame.reindex(columns=GEO_COLUMNS, fill_value='')
+        geo = geo[(geo[['Region', 'DRBU', 'End Market']] != '').any(axis=1)].drop_duplicates()
+
+    cat = pd.DataFrame(columns=CAT_COLUMNS)
+    if set(CAT_COLUMNS).issubset(frame.columns):
+        cat = frame[CAT_COLUMNS]
+        cat = cat[(cat != '').all(axis=1)].drop_duplicates()
+
+    return geo.reset_index(drop=True), cat.reset_index(drop=True)
+
+
+def _frame_from_rows(header, rows):
+    names = _normalize_header(header)
+    keep = [i for i, name in enumerate(names) if name is not None]
+    columns = [names[i] for i in keep]
+    data = [[row[i] if i < len(row) else None for i in keep] for row in rows]
+    frame = pd.DataFrame(data, columns=columns, dtype=object)
+    # Duplicate aliases (e.g. both "Cluster" and "DRBU") keep the first column
+    return frame.loc[:, ~frame.columns.duplicated()]
+
+
+def read_xlsx(path):
+    """Stream every sheet of a workbook; return the rows under the first recognised header"""
+    from openpyxl import load_workbook
+
+    frames = []
+    with open(path, 'rb') as f:
+        wb = load_workbook(f, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                rows = ws.iter_rows(values_only=True)
+                header = None
+                for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+                    if _is_header(row):
+                        header = row
+                        break
+                if header is None:
+                    continue
+                frames.append(_frame_from_rows(header, (row for row in rows if any(cell is not None for cell in row))))
+        finally:
+            wb.close()
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_csv_chunked(path, chunk_rows=CSV_CHUNK_ROWS):
+    """Read a CSV in chunks, keeping only recognised columns and deduplicating as it goes"""
+    chunks = []
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+        names = _normalize_header(chunk.columns)
+        chunk = chunk.loc[:, [name is not None for name in names]]
+        chunk.columns = [name for name in names if name is not None]
+        chunks.append(chunk.loc[:, ~chunk.columns.duplicated()].drop_duplicates())
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def parse_taxonomy_file(path):
+    """Parse a taxonomy source file into (geo_df, cat_df) without using the cache"""
+    if detect_format(path) == 'xlsx':
+        frame = read_xlsx(path)
+    else:
+        frame = read_csv_chunked(path)
+    return _split_tables(frame)
+
+
+def _cache_paths(path, cache_dir):
+    stem = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    ext = 'parquet' if PARQUET_AVAILABLE else 'pkl'
+    return (
+        os.path.join(cache_dir, f"{stem}.meta.json"),
+        os.path.join(cache_dir, f"{stem}.geo.{ext}"),
+        os.path.join(cache_dir, f"{stem}.cat.{ext}"),
+    )
+
+
+def _write_table(df, path):
+    if PARQUET_AVAILABLE:
+        df.to_parquet(path, index=False)
+    else:
+        df.to_pickle(path)
+
+
+def _read_table(path):
+    if PARQUET_AVAILABLE:
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def default_cache_dir():
+    return os.environ.get("ORO_TAXONOMY_CACHE") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'taxonomy')
+
+
+def load_taxonomy_file(path, cache_dir=None):
+    """Load (geo_df, cat_df, sha256) from a taxonomy file, using the columnar cache.
+
+    The cache is trusted when the file's mtime and size match; if only the
+    mtime changed the file is re-hashed and the cache reused when the content
+    is identical. Otherwise the file is parsed and the cache rewritten.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    meta_path, geo_path, cat_path = _cache_paths(path, cache_dir)
+    stat = os.stat(path)
+
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(geo_path) and os.path.exists(cat_path):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+    if meta is not None and meta.get('format_version') != CACHE_FORMAT_VERSION:
+        meta = None
+
+    if meta is not None and meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return _read_table(geo_path), _read_table(cat_path), meta['sha256']
+
+    sha256 = file_sha256(path)
+    if meta is not None and meta.get('sha256') == sha256:
+        geo_df, cat_df = _read_table(geo_path), _read_table(cat_path)
+    else:
+        geo_df, cat_df = parse_taxonomy_file(path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _write_table(geo_df, geo_path)
+            _write_table(cat_df, cat_path)
+        except OSError:
+            return geo_df, cat_df, sha256  # read-only checkout: just skip the cache
+
+    try:
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format_version': CACHE_FORMAT_VERSION,
+                'source': os.path.abspath(path),
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': sha256,
+            }, f)
+    except OSError:
+        pass
+    return geo_df, cat_df, sha256
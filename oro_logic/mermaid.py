@@ -0,0 +1,261 @@
+"""Offline Mermaid rendering with SVG caching.
+
+    python -m oro_logic.mermaid fetch              # download the pinned bundle into static/
+    python -m oro_logic.mermaid install mermaid-11.4.1.tgz   # air-gapped: from `npm pack mermaid@11.4.1`
+    python -m oro_logic.mermaid check              # exit 1 when neither the bundle nor mmdc is available
+    python -m oro_logic.mermaid render flow.mmd    # print the (cached) server-side SVG
+
+Diagrams are rendered in one of two ways:
+
+- Server side, when mermaid-cli (``mmdc``) is on the PATH: the SVG is cached
+  on disk under ``.cache/mermaid/<hash>.svg`` and the page gets plain SVG with
+  no script at all.
+- In the browser otherwise: the bundle is loaded from Streamlit's static
+  serving (``static/mermaid.min.js``, falling back to the CDN when the file is
+  missing or fails to load) and the rendered SVG is kept in localStorage under
+  the diagram hash, so an unchanged diagram is painted on rerun without
+  loading or running Mermaid again.
+
+The bundle isn't committed. Hosts without internet access install it from a
+file copied over (``install`` takes the ``npm pack`` tarball or a bare
+``mermaid.min.js``); the app warns while neither it nor mmdc is available,
+since the CDN fallback can't load there.
+
+The hash covers the diagram text and the bundle version.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import urllib.request
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MERMAID_VERSION = "11.4.1"
+CDN_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+STATIC_DIR = os.path.join(_ROOT, "static")
+BUNDLE_FILE = "mermaid.min.js"
+STATIC_URL = f"app/static/{BUNDLE_FILE}"  # relative to the app page (Streamlit static serving)
+SVG_CACHE_DIR = os.path.join(_ROOT, ".cache", "mermaid")
+TARBALL_MEMBER = f"package/dist/{BUNDLE_FILE}"  # in `npm pack mermaid@<version>` tarballs
+INSTALL_HINT = f"python -m oro_logic.mermaid install mermaid-{MERMAID_VERSION}.tgz"
+
+_MEMORY_LIMIT = 64
+_svg_memory = {}   # hash -> svg, for this process (oldest dropped past _MEMORY_LIMIT)
+_svg_failed = set()  # hashes mmdc could not render; not retried on every rerun
+_MMDC_MAX_FAILURES = 3  # consecutive failures before mmdc is treated as broken (e.g. no Chromium)
+_mmdc_failures = 0
+
+
+def _remember(key, svg):
+    if len(_svg_memory) >= _MEMORY_LIMIT:
+        _svg_memory.pop(next(iter(_svg_memory)))
+    _svg_memory[key] = svg
+    return svg
+
+
+def diagram_hash(code):
+    return hashlib.sha1(f"{MERMAID_VERSION}\x00{code}".encode("utf-8")).hexdigest()
+
+
+def local_bundle_available(static_dir=None):
+    return os.path.isfile(os.path.join(static_dir or STATIC_DIR, BUNDLE_FILE))
+
+
+def fetch_bundle(static_dir=None, url=CDN_URL, timeout=60):
+    """Download the Mermaid bundle into the static directory; returns its path"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return _write_bundle(response.read(), static_dir)
+
+
+def install_bundle(source, static_dir=None):
+    """Install the bundle from a local file: an ``npm pack`` tarball or ``mermaid.min.js``; returns its path.
+
+    Raises ValueError when the file isn't a Mermaid bundle.
+    """
+    if tarfile.is_tarfile(source):
+        with tarfile.open(source) as tar:
+            try:
+                data = tar.extractfile(TARBALL_MEMBER).read()
+            except (KeyError, AttributeError) as e:
+                raise ValueError(f"{source} has no {TARBALL_MEMBER}") from e
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    if b"mermaid" not in data[:65536] and b"mermaid" not in data[-65536:]:
+        raise ValueError(f"{source} doesn't look like a Mermaid bundle")
+    return _write_bundle(data, static_dir)
+
+
+def _write_bundle(data, static_dir=None):
+    static_dir = static_dir or STATIC_DIR
+    os.makedirs(static_dir, exist_ok=True)
+    path = os.path.join(static_dir, BUNDLE_FILE)
+    fd, tmp_path = tempfile.mkstemp(dir=static_dir, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_svg(code, cache_dir=None, mmdc=None, timeout=30):
+    """Server-side SVG for the diagram, or None when mermaid-cli is unavailable or fails.
+
+    Looks in memory, then the disk cache, and only then runs ``mmdc``.
+    """
+    global _mmdc_failures
+    key = diagram_hash(code)
+    if key in _svg_memory:
+        return _svg_memory[key]
+    cache_dir = cache_dir or SVG_CACHE_DIR
+    path = os.path.join(cache_dir, f"{key}.svg")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return _remember(key, f.read())
+
+    mmdc = mmdc or shutil.which("mmdc")
+    if not mmdc or key in _svg_failed or _mmdc_failures >= _MMDC_MAX_FAILURES:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "diagram.mmd"), os.path.join(tmp, "diagram.svg")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(code)
+        try:
+            subprocess.run([mmdc, "-i", source, "-o", target, "-b", "transparent"],
+                           check=True, capture_output=True, timeout=timeout)
+            with open(target, encoding="utf-8") as f:
+                svg = f.read()
+        except (OSError, subprocess.SubprocessError):
+            _svg_failed.add(key)
+            _mmdc_failures += 1
+            return None
+    _mmdc_failures = 0
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(svg)
+    os.replace(tmp_path, path)
+    return _remember(key, svg)
+
+
+_CLIENT_TEMPLATE = """
+<div id="oro-diagram" style="text-align:center; width:100%; padding:20px;"></div>
+<div id="oro-paint" style="font:11px sans-serif; color:#9ca3af; text-align:right;"></div>
+<script>
+(function () {
+    var start = performance.now();
+    var key = "oro-mermaid:" + __HASH__;
+    var code = __CODE__;
+    var target = document.getElementById("oro-diagram");
+
+    function show(svg, source) {
+        target.innerHTML = svg;
+        requestAnimationFrame(function () {
+            var ms = performance.now() - start;
+            window.oroPaint = {source: source, ms: ms};
+            document.getElementById("oro-paint").textContent = "painted in " + ms.toFixed(0) + " ms (" + source + ")";
+        });
+    }
+
+    function remember(svg) {
+        try {
+            localStorage.setItem(key, svg);
+        } catch (e) {  // quota: drop older diagrams and retry once
+            try {
+                Object.keys(localStorage).forEach(function (k) {
+                    if (k.indexOf("oro-mermaid:") === 0) localStorage.removeItem(k);
+                });
+                localStorage.setItem(key, svg);
+            } catch (ignored) {}
+        }
+    }
+
+    var cached = null;
+    try { cached = localStorage.getItem(key); } catch (e) {}
+    if (cached) { show(cached, "cached SVG"); return; }
+
+    function render(source) {
+        mermaid.initialize({startOnLoad: false, theme: "default"});
+        mermaid.render("oro-mermaid-svg", code).then(function (result) {
+            remember(result.svg);
+            show(result.svg, source);
+        }, function (err) {
+            target.textContent = "Mermaid error: " + err;
+        });
+    }
+
+    function load(urls) {
+        var script = document.createElement("script");
+        script.src = urls[0].url;
+        script.onload = function () { render(urls[0].source); };
+        script.onerror = function () {
+            if (urls.length > 1) load(urls.slice(1));
+            else target.textContent = "Mermaid could not be loaded. Install the bundle on the server: __HINT__";
+        };
+        document.head.appendChild(script);
+    }
+    load(__URLS__);
+})();
+</script>
+"""
+
+
+def diagram_html(code, svg=None, local_bundle=None):
+    """HTML for ``st.iframe``: the server-side SVG if given, else the cached client-side renderer"""
+    if svg is not None:
+        return f'<div style="text-align:center; width:100%; padding:20px;">{svg}</div>'
+    if local_bundle is None:
+        local_bundle = local_bundle_available()
+    urls = ([{"url": STATIC_URL, "source": "local bundle"}] if local_bundle else []) + [{"url": CDN_URL, "source": "CDN"}]
+    # json.dumps plus "</" escaping keeps the diagram text inert inside the <script> block;
+    # the code goes in last so placeholder-like text in a label is never substituted
+    return (_CLIENT_TEMPLATE
+            .replace("__HASH__", json.dumps(diagram_hash(code)))
+            .replace("__URLS__", json.dumps(urls))
+            .replace("__HINT__", INSTALL_HINT)
+            .replace("__CODE__", json.dumps(code).replace("</", "<\\/")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mermaid bundle and SVG cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help=f"Download mermaid {MERMAID_VERSION} into {STATIC_DIR}")
+    fetch.add_argument("--url", default=CDN_URL)
+    install = commands.add_parser("install", help="Install the bundle from a local npm tarball or mermaid.min.js")
+    install.add_argument("file")
+    commands.add_parser("check", help="Report how diagrams will render; exit 1 if only the CDN is left")
+    render = commands.add_parser("render", help="Render a .mmd file to SVG with mermaid-cli (cached)")
+    render.add_argument("file")
+    args = parser.parse_args(argv)
+
+    if args.command in ("fetch", "install"):
+        try:
+            path = fetch_bundle(url=args.url) if args.command == "fetch" else install_bundle(args.file)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Could not {args.command} the bundle: {e}")
+        print(f"Saved {os.path.getsize(path) / 1024:,.0f} KiB to {path}")
+        return
+    if args.command == "check":
+        mmdc = shutil.which("mmdc")
+        bundle = os.path.join(STATIC_DIR, BUNDLE_FILE)
+        print(f"local bundle: {bundle if local_bundle_available() else 'missing'}")
+        print(f"mermaid-cli:  {mmdc or 'missing'}")
+        if not (mmdc or local_bundle_available()):
+            sys.exit(f"Diagrams would load Mermaid from the CDN only. Offline: {INSTALL_HINT}")
+        return
+    with open(args.file, encoding="utf-8") as f:
+        svg = render_svg(f.read())
+    if svg is None:
+        sys.exit("mermaid-cli (mmdc) is not available or failed to render the diagram")
+    sys.stdout.write(svg)
+
+
+if __name__ == "__main__":
+    main()
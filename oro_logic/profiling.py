@@ -0,0 +1,195 @@
+"""Opt-in per-section profiling of app reruns: wall time and allocations.
+
+    ORO_PROFILE=1 streamlit run app.py                  # wall time + allocations (tracemalloc)
+    ORO_PROFILE=time streamlit run app.py               # wall time only (no tracing overhead)
+    python -m oro_logic.profiling .cache/profile/reruns.jsonl   # per-section percentiles over all sessions
+
+Every rerun (the full page, or a single fragment) gets a ``RunProfile``; the
+app wraps its major sections in ``profile.section(name)``. Finished runs are
+written one JSON object per line to ``ORO_PROFILE_LOG`` (default
+``.cache/profile/reruns.jsonl``) through the ``oro_logic.profiling`` logger,
+so they can be shipped and aggregated like any other log.
+
+Allocations come from tracemalloc, which traces the whole process: with
+several sessions rerunning at once their allocations overlap, so read them
+per section across many runs rather than as exact per-session figures.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_MODE = os.environ.get("ORO_PROFILE", "").strip().lower()
+ENABLED = PROFILE_MODE not in ("", "0", "off", "false")
+TRACE_ALLOCATIONS = ENABLED and PROFILE_MODE != "time"
+DEFAULT_LOG_PATH = os.environ.get(
+    "ORO_PROFILE_LOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "profile", "reruns.jsonl"),
+)
+
+logger = logging.getLogger("oro_logic.profiling")
+_log_lock = threading.Lock()
+_log_ready = False
+
+
+class _Frame:
+    __slots__ = ("name", "depth", "start", "alloc_start", "peak")
+
+    def __init__(self, name, depth, alloc_start):
+        self.name = name
+        self.depth = depth
+        self.start = time.perf_counter()
+        self.alloc_start = alloc_start
+        self.peak = alloc_start
+
+
+class RunProfile:
+    """Sections timed during one rerun; ``finish()`` turns it into a log record.
+
+    Sections may nest (``depth`` records how deep). With allocation tracing,
+    ``alloc_kib`` is what a section left allocated and ``peak_kib`` the most
+    it had allocated at once, both relative to its start.
+    """
+
+    def __init__(self, kind, session="", trace_allocations=None):
+        self.kind = kind
+        self.session = session
+        self.trace = TRACE_ALLOCATIONS if trace_allocations is None else trace_allocations
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started_at = time.time()
+        self.sections = []  # records, in the order sections finish
+        self._stack = []
+        self._run = _Frame(None, -1, self._traced())
+        self._stack.append(self._run)
+
+    def _traced(self, closing=None):
+        """Currently traced bytes; credits the peak so far to every open frame (and ``closing``)"""
+        if not self.trace:
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in (*self._stack, closing) if closing is not None else self._stack:
+            frame.peak = max(frame.peak, peak)
+        tracemalloc.reset_peak()  # so a nested section's peak is its own
+        return current
+
+    @contextmanager
+    def section(self, name):
+        frame = _Frame(name, len(self._stack) - 1, self._traced())
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.sections.append(self._close(frame))
+
+    def _close(self, frame):
+        wall_ms = (time.perf_counter() - frame.start) * 1e3
+        record = {"name": frame.name, "depth": frame.depth, "wall_ms": round(wall_ms, 3),
+                  "alloc_kib": None, "peak_kib": None}
+        if self.trace:
+            current = self._traced(closing=frame)
+            record["alloc_kib"] = round((current - frame.alloc_start) / 1024, 1)
+            record["peak_kib"] = round((frame.peak - frame.alloc_start) / 1024, 1)
+        return record
+
+    def finish(self, interrupted=False):
+        """The run's log record: totals, the time outside any section, and every section"""
+        del self._stack[:]
+        total = self._close(self._run)
+        sectioned = sum(section["wall_ms"] for section in self.sections if section["depth"] == 0)
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(self.started_at)),
+            "session": self.session,
+            "kind": self.kind,
+            "interrupted": interrupted,
+            "wall_ms": total["wall_ms"],
+            "other_ms": round(max(total["wall_ms"] - sectioned, 0.0), 3),
+            "alloc_kib": total["alloc_kib"],
+            "peak_kib": total["peak_kib"],
+            "sections": self.sections,
+        }
+
+
+def log_run(record):
+    """Write a finished run as one JSON line through the logger (to ORO_PROFILE_LOG unless that can't be opened)"""
+    global _log_ready
+    if not _log_ready:
+        with _log_lock:
+            if not _log_ready:
+                try:
+                    os.makedirs(os.path.dirname(DEFAULT_LOG_PATH) or ".", exist_ok=True)
+                    handler = logging.FileHandler(DEFAULT_LOG_PATH, encoding="utf-8")
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    logger.addHandler(handler)
+                except OSError:
+                    pass  # read-only checkout: only the logger's other handlers get the records
+                logger.setLevel(logging.INFO)
+                _log_ready = True
+    logger.info(json.dumps(record, separators=(",", ":")))
+
+
+def read_log(path):
+    """Run records from a JSONL log (lines that aren't run records are skipped)"""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "sections" in record:
+                records.append(record)
+    return records
+
+
+def summarize(records):
+    """Per (run kind, section): runs, wall-time p50/p90/p99 and median allocations, slowest p90 first"""
+    import pandas as pd
+
+    rows = [
+        {"kind": record["kind"], "section": section["name"], "wall_ms": section["wall_ms"],
+         "alloc_kib": section["alloc_kib"], "peak_kib": section["peak_kib"]}
+        for record in records
+        for section in [*record["sections"], {"name": "(whole run)", "wall_ms": record["wall_ms"],
+                                              "alloc_kib": record["alloc_kib"], "peak_kib": record["peak_kib"]}]
+    ]
+    columns = ["kind", "section", "runs", "p50_ms", "p90_ms", "p99_ms", "alloc_kib", "peak_kib"]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame(rows)
+    grouped = frame.groupby(["kind", "section"], sort=False)
+    summary = grouped["wall_ms"].agg(
+        runs="count",
+        p50_ms=lambda s: s.quantile(0.5),
+        p90_ms=lambda s: s.quantile(0.9),
+        p99_ms=lambda s: s.quantile(0.99),
+    )
+    summary["alloc_kib"] = grouped["alloc_kib"].median()
+    summary["peak_kib"] = grouped["peak_kib"].median()
+    return summary.reset_index().sort_values(["kind", "p90_ms"], ascending=[True, False])[columns]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate per-section rerun profiles from JSONL logs")
+    parser.add_argument("logs", nargs="*", default=[DEFAULT_LOG_PATH], help="JSONL run logs (default: ORO_PROFILE_LOG)")
+    parser.add_argument("--kind", help="Only runs of this kind (page, fragment, download)")
+    args = parser.parse_args(argv)
+
+    records = [record for path in args.logs for record in read_log(path)]
+    if args.kind:
+        records = [record for record in records if record["kind"] == args.kind]
+    sessions = len({record["session"] for record in records})
+    print(f"{len(records):,} runs from {sessions:,} session(s)")
+    summary = summarize(records)
+    if not summary.empty:
+        print(summary.to_string(index=False, float_format=lambda value: f"{value:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
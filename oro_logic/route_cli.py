@@ -0,0 +1,120 @@
+"""Streaming requisition routing for shell pipelines.
+
+    python -m oro_logic.route_cli --blueprint oro_logic.json < requisitions.jsonl > routed.jsonl
+    zcat extract.csv.gz | python -m oro_logic.route_cli --rules blueprints/ --format csv | jq ...
+
+Reads JSONL or CSV (auto-detected from the first character) from a file or
+stdin and writes one JSON object per input line to stdout: the input record
+plus ``route``, ``route_detail`` and ``route_reason``. Every stage is a
+generator, so memory stays constant however large the input is. Lines/sec
+is reported on stderr when the input is exhausted.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from oro_logic.batch import load_rules
+from oro_logic.routing import REQUISITION_ALIASES
+
+
+def read_records(stream, fmt="auto"):
+    """Yield (record, parse error) from a JSONL or CSV text stream; the error is None for a parsed record.
+
+    Errors travel beside the record, so no field an input record carries can
+    be mistaken for one.
+    """
+    if fmt == "auto":
+        first = ""
+        lines = iter(stream)
+        buffered = []
+        for line in lines:
+            buffered.append(line)
+            if line.strip():
+                first = line.lstrip()[:1]
+                break
+        fmt = "jsonl" if first in ("{", "[") else "csv"
+        stream = itertools.chain(buffered, lines)
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line), None
+                except ValueError as e:
+                    yield {}, f"line {line_no}: invalid JSON ({e})"
+    else:
+        for row in csv.DictReader(stream):
+            yield row, None
+
+
+def normalize(records):
+    """Yield (record, routing fields, parse error) with the router's field names"""
+    for record, error in records:
+        fields = {}
+        if isinstance(record, dict):
+            for key, value in record.items():
+                target = REQUISITION_ALIASES.get(str(key).strip().lower())
+                if target and target not in fields:
+                    fields[target] = value
+        yield record, fields, error
+
+
+def decide(triples, compiled):
+    """Yield output dicts (input record + decision); unparsable lines are rejected with the parse error"""
+    for record, fields, error in triples:
+        out = dict(record) if isinstance(record, dict) else {"input": record}
+        if error:
+            out.update(route="Reject", route_detail="", route_reason=error)
+        else:
+            route, detail, reason = compiled.decide(
+                fields.get("l4", ""), fields.get("end_market", ""), fields.get("vendor_code", ""), fields.get("amount"),
+                item_code=fields.get("item_code"), item_name=fields.get("item_name"),
+                supplier_name=fields.get("supplier_name"),
+            )
+            out.update(route=route, route_detail=detail, route_reason=reason)
+        yield out
+
+
+def write_lines(results, stream):
+    """Write one JSON object per line; returns the number written"""
+    count = 0
+    dumps = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    for count, result in enumerate(results, 1):
+        stream.write(dumps(result))
+        stream.write("\n")
+    stream.flush()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route JSONL/CSV requisitions line by line")
+    parser.add_argument("input", nargs="?", default="-", help="Input file (default: stdin)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--blueprint", help="Blueprint file (JSON or .oro container)")
+    source.add_argument("--rules", help="Rule-set directory (default: blueprints/)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "csv"], default="auto")
+    args = parser.parse_args(argv)
+
+    compiled = load_rules(args.rules, args.blueprint)
+    stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    start = time.perf_counter()
+    try:
+        count = write_lines(decide(normalize(read_records(stream, args.format)), compiled), sys.stdout)
+    except BrokenPipeError:  # e.g. piped into `head`
+        # Point stdout at devnull so the interpreter's final flush doesn't raise again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    print(f"Routed {count:,} lines in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} lines/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Batch requisition routing against a captured blueprint (``output_data`` v2.0).
+
+Each requisition line (category L4, end market, vendor code, amount) gets one
+of the routes shown in the Logic Flow diagram, evaluated in the same order:
+
+    1. Taxonomy / scope match        -> otherwise Reject
+    2. Supplier Pool (by vendor code) -> Buying Channel, or Sourcing for
+                                        "Sourcing" suppliers
+    3. Buying Channels table          -> Buying Channel
+    4. Marketplace (< limit, not blacklisted) -> Marketplace
+    5. Sourcing: > threshold          -> Strategic, otherwise Tactical
+                                        (Reject when the stream / path is disabled)
+
+Everything is evaluated column-wise with pandas/NumPy, so routing a million
+lines is a handful of vectorized passes instead of a Python loop.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ROUTE_BUYING_CHANNEL = "Buying Channel"
+ROUTE_MARKETPLACE = "Marketplace"
+ROUTE_TACTICAL = "Tactical"
+ROUTE_STRATEGIC = "Strategic"
+ROUTE_REJECT = "Reject"
+ROUTES = [ROUTE_BUYING_CHANNEL, ROUTE_MARKETPLACE, ROUTE_TACTICAL, ROUTE_STRATEGIC, ROUTE_REJECT]
+
+# Reason codes, in decision order (index = code)
+REASONS = [
+    "Out of scope (taxonomy / end market)",
+    "Invalid amount",
+    "Supplier Pool buying channel",
+    "Buying Channels table",
+    "Marketplace below limit",
+    "Sourcing disabled",
+    "Above threshold",
+    "Strategic disabled",
+    "Below threshold",
+    "Tactical disabled",
+]
+
+# Accepted input headers (lower-cased) -> normalized requisition column
+REQUISITION_ALIASES = {
+    'l4': 'l4', 'category l4': 'l4', 'category': 'l4', 'cat_l4': 'l4',
+    'end_market': 'end_market', 'end market': 'end_market', 'market': 'end_market',
+    'vendor_code': 'vendor_code', 'vendor code': 'vendor_code', 'vendor': 'vendor_code', 'supplier code': 'vendor_code',
+    'supplier_name': 'supplier_name', 'supplier name': 'supplier_name', 'supplier': 'supplier_name',
+    'amount': 'amount', 'value': 'amount', 'net value': 'amount',
+    'item_code': 'item_code', 'item code': 'item_code', 'item code/sku': 'item_code', 'sku': 'item_code',
+    'item_name': 'item_name', 'item name': 'item_name',
+}
+REQUIRED_COLUMNS = ['l4', 'end_market', 'vendor_code', 'amount']
+OPTIONAL_COLUMNS = ['supplier_name', 'item_code', 'item_name']
+
+DEFAULT_SUPPLIER_TYPE = "Local"
+DEFAULT_LOGIC_TYPE = "Buying Channel"
+
+
+def text_value(value):
+    """A blueprint or requisition value as stripped text ("" for None / NaN)"""
+    return "" if value is None or (isinstance(value, float) and np.isnan(value)) else str(value).strip()
+
+
+@dataclass(frozen=True)
+class BlueprintRules:
+    """The parts of a blueprint the router needs, parsed once.
+
+    Empty ``l4`` / ``end_markets`` mean the blueprint is not restricted on
+    that dimension.
+    """
+
+    l4: frozenset
+    end_markets: frozenset
+    pool_enabled: bool
+    supplier_logic: dict      # vendor code -> Logic Type
+    supplier_channel: dict    # vendor code -> Buying Channel
+    supplier_logic_by_name: dict
+    supplier_channel_by_name: dict
+    buying_channels_enabled: bool
+    channel_by_vendor: dict   # vendor code -> Channel Type (Buying Channels table)
+    allow_marketplace: bool
+    marketplace_limit: float
+    blacklist_codes: frozenset
+    blacklist_names: frozenset
+    sourcing_enabled: bool
+    threshold: float
+    tactical_enabled: bool
+    tactical_action: str
+    strategic_enabled: bool
+    strategic_owner: str
+
+    @classmethod
+    def from_blueprint(cls, blueprint):
+        scope = blueprint.get("scope", {})
+        category = blueprint.get("category", {})
+        pool = blueprint.get("supplier_pool", {})
+        channels = blueprint.get("buying_channels", {})
+        stream2 = blueprint.get("stream2", {})
+
+        type_filter = pool.get("supplier_type_filter", "All") or "All"
+        supplier_logic, supplier_channel = {}, {}
+        logic_by_name, channel_by_name = {}, {}
+        for supp in pool.get("suppliers", []) or []:
+            name = text_value(supp.get("Supplier Name"))
+            if not name:
+                continue
+            supp_type = text_value(supp.get("Supplier Type")) or DEFAULT_SUPPLIER_TYPE
+            if type_filter != "All" and supp_type != type_filter:
+                continue
+            logic = text_value(supp.get("Logic Type")) or DEFAULT_LOGIC_TYPE
+            channel = text_value(supp.get("Buying Channel"))
+            code = text_value(supp.get("Vendor Code"))
+            # Several rows per supplier (one per channel): the first row decides
+            if code:
+                supplier_logic.setdefault(code, logic)
+                supplier_channel.setdefault(code, channel)
+            logic_by_name.setdefault(name.casefold(), logic)
+            channel_by_name.setdefault(name.casefold(), channel)
+
+        channel_by_vendor = {}
+        for ch in channels.get("channels", []) or []:
+            code, channel_type = text_value(ch.get("Vendor Code")), text_value(ch.get("Channel Type"))
+            if code and channel_type:
+                channel_by_vendor.setdefault(code, channel_type)
+
+        blacklist = channels.get("marketplace_blacklist", []) or []
+        tactical = stream2.get("tactical", {})
+        strategic = stream2.get("strategic", {})
+        return cls(
+            l4=frozenset(text_value(v) for v in category.get("l4", []) or []),
+            end_markets=frozenset(text_value(v) for v in scope.get("end_markets", []) or []),
+            pool_enabled=bool(pool.get("enabled", True)),
+            supplier_logic=supplier_logic,
+            supplier_channel=supplier_channel,
+            supplier_logic_by_name=logic_by_name,
+            supplier_channel_by_name=channel_by_name,
+            buying_channels_enabled=bool(channels.get("enabled", True)),
+            channel_by_vendor=channel_by_vendor,
+            allow_marketplace=bool(channels.get("allow_marketplace", False)),
+            marketplace_limit=float(channels.get("marketplace_limit", 0) or 0),
+            blacklist_codes=frozenset(text_value(i.get("item_code")) for i in blacklist if text_value(i.get("item_code"))),
+            blacklist_names=frozenset(text_value(i.get("item_name")).casefold() for i in blacklist if text_value(i.get("item_name"))),
+            sourcing_enabled=bool(stream2.get("enabled", True)),
+            threshold=float(stream2.get("tactical_threshold", 0) or 0),
+            tactical_enabled=bool(tactical.get("enabled", False)),
+            tactical_action=text_value(tactical.get("action")) or "N/A",
+            strategic_enabled=bool(strategic.get("enabled", False)),
+            strategic_owner=text_value(strategic.get("owner")) or "N/A",
+        )
+
+
+def normalize_requisitions(df):
+    """Rename known headers to the router's column names and check the required ones"""
+    renamed = {}
+    for col in df.columns:
+        target = REQUISITION_ALIASES.get(str(col).strip().lower())
+        if target and target not in renamed.values():
+            renamed[col] = target
+    out = df.rename(columns=renamed)
+    missing = [col for col in REQUIRED_COLUMNS if col not in out.columns]
+    if missing:
+        raise ValueError(f"Requisitions are missing required column(s): {', '.join(missing)}")
+    return out
+
+
+def _clean(series):
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+
+def route_requisitions(blueprint, requisitions):
+    """Route every requisition line; returns a copy with route, route_detail and route_reason.
+
+    ``blueprint`` is an ``output_data`` dict (or already parsed BlueprintRules).
+    ``route`` / ``route_reason`` are categoricals over ROUTES / REASONS.
+    """
+    rules = blueprint if isinstance(blueprint, BlueprintRules) else BlueprintRules.from_blueprint(blueprint)
+    req = normalize_requisitions(requisitions)
+    n_rows = len(req)
+
+    l4 = _clean(req['l4'])
+    market = _clean(req['end_market'])
+    vendor = _clean(req['vendor_code'])
+    amount = pd.to_numeric(req['amount'], errors='coerce').to_numpy(dtype=float)
+
+    in_scope = np.ones(n_rows, dtype=bool)
+    if rules.l4:
+        in_scope &= l4.isin(rules.l4).to_numpy()
+    if rules.end_markets:
+        in_scope &= market.isin(rules.end_markets).to_numpy()
+    valid_amount = ~np.isnan(amount)
+
+    # 2. Supplier Pool: vendor code first, then supplier name if the extract has one
+    pool_logic = pd.Series(np.nan, index=req.index, dtype=object)
+    pool_channel = pd.Series("", index=req.index, dtype=object)
+    if rules.pool_enabled:
+        pool_logic = vendor.map(rules.supplier_logic)
+        pool_channel = vendor.map(rules.supplier_channel)
+        if 'supplier_name' in req.columns and rules.supplier_logic_by_name:
+            names = _clean(req['supplier_name']).str.casefold()
+            pool_logic = pool_logic.fillna(names.map(rules.supplier_logic_by_name))
+            pool_channel = pool_channel.fillna(names.map(rules.supplier_channel_by_name))
+    in_pool = pool_logic.notna().to_numpy()
+    pool_buying = in_pool & (pool_logic == DEFAULT_LOGIC_TYPE).to_numpy() & rules.buying_channels_enabled
+
+    # 3. Buying Channels table (vendors not covered by the pool)
+    table_channel = pd.Series(np.nan, index=req.index, dtype=object)
+    if rules.buying_channels_enabled and rules.channel_by_vendor:
+        table_channel = vendor.map(rules.channel_by_vendor)
+    table_buying = ~in_pool & table_channel.notna().to_numpy()
+
+    # 4. Marketplace
+    marketplace = np.zeros(n_rows, dtype=bool)
+    if rules.buying_channels_enabled and rules.allow_marketplace:
+        blacklisted = np.zeros(n_rows, dtype=bool)
+        if rules.blacklist_codes and 'item_code' in req.columns:
+            blacklisted |= _clean(req['item_code']).isin(rules.blacklist_codes).to_numpy()
+        if rules.blacklist_names and 'item_name' in req.columns:
+            blacklisted |= _clean(req['item_name']).str.casefold().isin(rules.blacklist_names).to_numpy()
+        marketplace = ~in_pool & ~table_buying & (amount < rules.marketplace_limit) & ~blacklisted
+
+    # 5. Sourcing
+    above = amount > rules.threshold
+    conditions = [
+        ~in_scope,
+        ~valid_amount,
+        pool_buying,
+        table_buying,
+        marketplace,
+        np.full(n_rows, not rules.sourcing_enabled),
+        above & rules.strategic_enabled,
+        above,
+        np.full(n_rows, rules.tactical_enabled),
+    ]
+    reason_codes = np.select(conditions, np.arange(len(conditions)), default=len(conditions)).astype(np.int8)
+
+    reason_route = np.array([
+        ROUTES.index(ROUTE_REJECT),
+        ROUTES.index(ROUTE_REJECT),
+        ROUTES.index(ROUTE_BUYING_CHANNEL),
+        ROUTES.index(ROUTE_BUYING_CHANNEL),
+        ROUTES.index(ROUTE_MARKETPLACE),
+        ROUTES.index(ROUTE_REJECT),
+        ROUTES.index(ROUTE_STRATEGIC),
+        ROUTES.index(ROUTE_REJECT),
+        ROUTES.index(ROUTE_TACTICAL),
+        ROUTES.index(ROUTE_REJECT),
+    ], dtype=np.int8)
+    route_codes = reason_route[reason_codes]
+
+    reason_detail = np.array(
+        ["", "", "", "", f"< £{rules.marketplace_limit:g}", "", rules.strategic_owner, "", rules.tactical_action, ""],
+        dtype=object,
+    )
+    detail = reason_detail[reason_codes]
+    detail = np.where(reason_codes == 2, pool_channel.fillna("").to_numpy(dtype=object), detail)
+    detail = np.where(reason_codes == 3, table_channel.fillna("").to_numpy(dtype=object), detail)
+
+    return requisitions.assign(
+        route=pd.Categorical.from_codes(route_codes, categories=ROUTES),
+        route_detail=detail,
+        route_reason=pd.Categorical.from_codes(reason_codes, categories=REASONS),
+    )
@@ -0,0 +1,128 @@
+"""Rule sets: directories of saved blueprints and their compiled form.
+
+The app saves each captured blueprint (``output_data``) as a JSON file in a
+rule-set directory (``blueprints/`` by default, or ``$ORO_RULESET_DIR``).
+Consumers such as the routing service compile the whole directory into one
+decision table and keep it next to the blueprints, so a restart only has to
+unpickle it. The compiled table is rebuilt whenever the directory's
+signature (file names, sizes and mtimes) changes.
+"""
+
+import json
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+from oro_logic.decision_table import CompiledRules, compile_blueprints
+
+DEFAULT_RULESET_DIR = os.environ.get(
+    "ORO_RULESET_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blueprints"),
+)
+COMPILED_FILE = ".compiled.pkl"
+BLUEPRINT_SUFFIX = ".json"
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-")[:40] or "NA"
+
+
+def blueprint_file_name(blueprint):
+    """File name derived from the blueprint's scope and creation time"""
+    scope = blueprint.get("scope", {})
+    markets = scope.get("end_markets") or []
+    l4 = blueprint.get("category", {}).get("l4") or []
+    created = blueprint.get("metadata", {}).get("created_at") or pd.Timestamp.now().isoformat()
+    stamp = pd.Timestamp(created).strftime("%Y%m%d_%H%M%S_%f")
+    parts = [scope.get("region", "NA"), markets[0] if len(markets) == 1 else f"{len(markets)}mkts",
+             l4[0] if len(l4) == 1 else f"{len(l4)}l4", stamp]
+    return "_".join(_slug(part) for part in parts) + BLUEPRINT_SUFFIX
+
+
+def _atomic_write(path, text):
+    """Write via a temp file + rename so readers never see a half-written blueprint"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def save_blueprint(blueprint, directory=None):
+    """Write a blueprint into the rule-set directory (atomically); returns its path"""
+    directory = directory or DEFAULT_RULESET_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, blueprint_file_name(blueprint))
+    _atomic_write(path, json.dumps(blueprint, indent=2, ensure_ascii=False, default=str))
+    return path
+
+
+def blueprint_paths(directory=None):
+    directory = directory or DEFAULT_RULESET_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        entry.path for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(BLUEPRINT_SUFFIX) and not entry.name.startswith(".")
+    )
+
+
+def ruleset_signature(directory=None):
+    """Cheap change detector: (name, size, mtime) of every blueprint file"""
+    signature = []
+    for path in blueprint_paths(directory):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_blueprints(directory=None):
+    """All blueprints in the directory, in file-name order (invalid files are skipped)"""
+    blueprints = []
+    for path in blueprint_paths(directory):
+        try:
+            with open(path, encoding="utf-8") as f:
+                blueprints.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return blueprints
+
+
+def load_compiled_ruleset(directory=None):
+    """Compiled rules for the directory plus its signature.
+
+    Reuses the pickled table stored alongside the blueprints when its
+    signature matches, otherwise recompiles and refreshes it. Newer
+    blueprints take precedence where scopes overlap.
+    """
+    directory = directory or DEFAULT_RULESET_DIR
+    signature = ruleset_signature(directory)
+    compiled_path = os.path.join(directory, COMPILED_FILE)
+    if os.path.exists(compiled_path):
+        try:
+            compiled = CompiledRules.load(compiled_path)
+            if getattr(compiled, "signature", None) == signature:
+                return compiled, signature
+        except Exception:  # stale / incompatible artifact: rebuild below
+            pass
+
+    newest_first = sorted(load_blueprints(directory),
+                          key=lambda bp: str(bp.get("metadata", {}).get("created_at", "")), reverse=True)
+    compiled = compile_blueprints(newest_first)
+    compiled.signature = signature
+    if os.path.isdir(directory):
+        try:
+            compiled.save(compiled_path)
+        except OSError:
+            pass
+    return compiled, signature
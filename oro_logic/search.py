@@ -0,0 +1,136 @@
+"""Typeahead search over taxonomy paths (L1 > L2 > L3 > L4, Region > Cluster > End Market).
+
+``PathSearchIndex`` is built once per taxonomy version and shared by every
+session. Labels are split into lowercase word tokens; the distinct tokens
+are kept sorted (prefix matches are a bisect) and indexed by their trigrams
+(substring matches intersect a few small sets), and every token holds the
+array of paths it occurs in. A query only touches the tokens it can match
+and scores their paths with array operations.
+"""
+
+import bisect
+import re
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+_TOKEN = re.compile(r"[^\W_]+")
+GRAM = 3
+
+# Per query token: how it matched a label token, and the bonus when that label is the leaf
+EXACT, PREFIX, SUBSTRING = 3, 2, 1
+LEAF_BONUS = 1
+PHRASE_BONUS = 4  # the whole query appears in the leaf label (half that in another label)
+
+_NO_PATHS = np.zeros(0, dtype=np.intp)
+
+
+def tokenize(text):
+    """Lowercase word tokens of ``text`` (punctuation and underscores split words)"""
+    return _TOKEN.findall(str(text).casefold())
+
+
+def _grams(token):
+    return {token[i:i + GRAM] for i in range(len(token) - GRAM + 1)}
+
+
+class PathSearchIndex:
+    """Immutable token / trigram index over taxonomy paths of equal length.
+
+    Every query token must match some label of a path (exactly, as a prefix
+    or, from three characters, anywhere inside a word). Matches in the leaf
+    label rank above matches in its ancestors, and a label containing the
+    whole query ranks higher still. Ties go to the shorter leaf label, then
+    to the path given first (``HierarchyIndex.paths()`` gives them sorted).
+    """
+
+    def __init__(self, paths):
+        self.paths = tuple(tuple(path) for path in paths)
+        self._codes = []   # per level: each path's label code
+        self._texts = []   # per level: each label's tokens joined by spaces (for whole-query matches)
+        postings = {}      # token -> ([leaf path id arrays], [ancestor path id arrays])
+        columns = list(zip(*self.paths))
+        for level, column in enumerate(columns):
+            codes, labels = pd.factorize(np.asarray(column, dtype=object))
+            slot = 0 if level == len(columns) - 1 else 1
+            by_label = np.split(np.argsort(codes, kind="stable"), np.cumsum(np.bincount(codes))[:-1])
+            texts = []
+            for label, path_ids in zip(labels, by_label):
+                tokens = tokenize(label)
+                texts.append(" ".join(tokens))
+                for token in dict.fromkeys(tokens):
+                    postings.setdefault(token, ([], []))[slot].append(path_ids)
+            self._codes.append(codes)
+            self._texts.append(texts)
+        grams = {}
+        for token in postings:
+            for gram in _grams(token):
+                grams.setdefault(gram, set()).add(token)
+        self._vocab = tuple(sorted(postings))
+        self._postings = MappingProxyType({
+            token: tuple(np.concatenate(arrays) if arrays else _NO_PATHS for arrays in lists)
+            for token, lists in postings.items()
+        })
+        self._grams = MappingProxyType({gram: frozenset(tokens) for gram, tokens in grams.items()})
+        self._leaf_lengths = (np.array([len(text) for text in self._texts[-1]])[self._codes[-1]]
+                              if columns else _NO_PATHS)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _matching_tokens(self, query_token):
+        """{vocabulary token: match kind} for one query token"""
+        start = bisect.bisect_left(self._vocab, query_token)
+        end = bisect.bisect_left(self._vocab, query_token + "\uffff")
+        matches = {token: PREFIX for token in self._vocab[start:end]}
+        if query_token in self._postings:
+            matches[query_token] = EXACT
+        if len(query_token) >= GRAM:
+            candidates = None
+            for gram in _grams(query_token):
+                tokens = self._grams.get(gram, frozenset())
+                candidates = tokens if candidates is None else candidates & tokens
+                if not candidates:
+                    break
+            for token in candidates or ():
+                if token not in matches and query_token in token:
+                    matches[token] = SUBSTRING
+        return matches
+
+    def _phrase_bonus(self, phrase, hits):
+        """Bonus of each hit path for labels containing the whole (multi-word) query"""
+        bonus = np.zeros(len(hits), dtype=np.int16)
+        for level, (codes, texts) in enumerate(zip(self._codes, self._texts)):
+            hit_codes = codes[hits]
+            matched = [code for code in np.unique(hit_codes) if phrase in texts[code]]
+            if matched:
+                value = PHRASE_BONUS if level == len(self._codes) - 1 else PHRASE_BONUS // 2
+                bonus = np.maximum(bonus, np.where(np.isin(hit_codes, matched), value, 0))
+        return bonus
+
+    def search(self, query, limit=10):
+        """Best ``limit`` paths for ``query``, best first, as [(score, path)]"""
+        query_tokens = tokenize(query)
+        if not query_tokens or not self.paths:
+            return []
+        scores = None
+        for query_token in sorted(set(query_tokens), key=len, reverse=True):
+            best = np.zeros(len(self.paths), dtype=np.int16)
+            for token, kind in self._matching_tokens(query_token).items():
+                leaf_ids, other_ids = self._postings[token]
+                best[other_ids] = np.maximum(best[other_ids], kind)
+                best[leaf_ids] = np.maximum(best[leaf_ids], kind + LEAF_BONUS)
+            scores = best if scores is None else np.where((scores > 0) & (best > 0), scores + best, 0)
+            if not scores.any():
+                return []
+        hits = np.flatnonzero(scores)
+        hit_scores = scores[hits]
+        if len(query_tokens) > 1:
+            hit_scores = hit_scores + self._phrase_bonus(" ".join(query_tokens), hits)
+        if len(hits) > limit:  # only ties with the limit-th best score can still make the cut
+            cutoff = np.partition(hit_scores, len(hits) - limit)[len(hits) - limit]
+            keep = hit_scores >= cutoff
+            hits, hit_scores = hits[keep], hit_scores[keep]
+        order = np.lexsort((hits, self._leaf_lengths[hits], -hit_scores))[:limit]
+        return [(int(hit_scores[i]), self.paths[hits[i]]) for i in order]
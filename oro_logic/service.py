@@ -0,0 +1,267 @@
+"""Local HTTP routing service backed by compiled blueprints.
+
+    python -m oro_logic.service --port 8600 --rules blueprints/
+
+Endpoints (JSON in, JSON out; HTTP/1.1 keep-alive):
+
+    GET  /health        rule-set status
+    POST /route         {"l4", "end_market", "vendor_code", "amount", ["item_code", "item_name", "supplier_name"]}
+    POST /route/batch   {"requisitions": [...]} or a bare list of the same objects
+    POST /reload        force a rule-set reload
+
+The rule-set directory is compiled once at startup (or loaded from its
+pickled decision table) and polled for changes; when a blueprint is saved
+the new table is built off the event loop and swapped in atomically, so
+in-flight requests keep using the table they started with.
+
+Small requests are answered on the event loop. Bodies over
+``INLINE_BODY_BYTES`` (large batches) are parsed, routed and encoded on a
+small thread pool, so one big batch doesn't stall every other connection or
+the rule-set watcher. Parsing and dumping the JSON still hold the GIL for
+one call each; ``MAX_BATCH_ITEMS`` bounds those pauses (~90 ms each at 50k
+lines).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from oro_logic.rulesets import DEFAULT_RULESET_DIR, load_compiled_ruleset, ruleset_signature
+
+logger = logging.getLogger("oro_logic.service")
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_BATCH_ITEMS = 100_000
+INLINE_BODY_BYTES = 16 * 1024  # larger bodies are parsed and routed off the event loop
+ROUTE_WORKERS = 2
+BATCH_VECTORIZE_MIN = 20_000  # below this, per-line decide() beats the DataFrame set-up cost
+REQUEST_FIELDS = ("l4", "end_market", "vendor_code", "amount", "item_code", "item_name", "supplier_name")
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+class RoutingService:
+    """Holds the current compiled rule set and answers route queries"""
+
+    def __init__(self, directory=None, poll_interval=1.0, route_workers=ROUTE_WORKERS):
+        self.directory = directory or DEFAULT_RULESET_DIR
+        self.poll_interval = poll_interval
+        self.compiled, self.signature = load_compiled_ruleset(self.directory)
+        self.loaded_at = time.time()
+        self._reload_lock = asyncio.Lock()
+        self._route_pool = ThreadPoolExecutor(max_workers=route_workers, thread_name_prefix="oro-route")
+
+    def close(self):
+        self._route_pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Rule-set management ---
+
+    async def reload(self, force=False):
+        async with self._reload_lock:
+            signature = await asyncio.to_thread(ruleset_signature, self.directory)
+            if not force and signature == self.signature:
+                return False
+            compiled, signature = await asyncio.to_thread(load_compiled_ruleset, self.directory)
+            self.compiled, self.signature = compiled, signature  # atomic swap
+            self.loaded_at = time.time()
+            logger.info("Loaded rule set: %d blueprint(s)", len(compiled.rules))
+            return True
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Rule-set reload failed; keeping the previous rules")
+
+    def status(self):
+        return {
+            "status": "ok",
+            "blueprints": len(self.compiled.rules),
+            "scopes": len(self.compiled.scope),
+            "files": len(self.signature),
+            "loaded_at": pd.Timestamp(self.loaded_at, unit="s").isoformat(),
+        }
+
+    # --- Routing ---
+
+    def route_one(self, compiled, item):
+        if not isinstance(item, dict):
+            raise HTTPError(400, "Each requisition must be a JSON object")
+        missing = [field for field in REQUEST_FIELDS[:4] if field not in item]
+        if missing:
+            raise HTTPError(400, f"Missing field(s): {', '.join(missing)}")
+        route, detail, reason = compiled.decide(
+            item["l4"], item["end_market"], item["vendor_code"], item["amount"],
+            item_code=item.get("item_code"), item_name=item.get("item_name"), supplier_name=item.get("supplier_name"),
+        )
+        return {"route": route, "detail": detail, "reason": reason}
+
+    def route_batch(self, compiled, items):
+        if len(items) < BATCH_VECTORIZE_MIN:
+            return [self.route_one(compiled, item) for item in items]
+        if not all(isinstance(item, dict) for item in items):
+            raise HTTPError(400, "Each requisition must be a JSON object")
+        frame = pd.DataFrame.from_records(items, columns=[f for f in REQUEST_FIELDS if any(f in i for i in items)])
+        try:
+            routed = compiled.decide_batch(frame)
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from e
+        return [
+            {"route": route, "detail": detail, "reason": reason}
+            for route, detail, reason in zip(routed["route"].astype(str), routed["route_detail"], routed["route_reason"].astype(str))
+        ]
+
+    def handle(self, method, path, body):
+        compiled = self.compiled  # one rule set per request, even if a swap happens meanwhile
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            return self.status()
+        if path not in ("/route", "/route/batch"):
+            raise HTTPError(404, f"Unknown path {path}")
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}") from e
+        if path == "/route":
+            return self.route_one(compiled, payload)
+        items = payload.get("requisitions") if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            raise HTTPError(400, "Expected a list of requisitions")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise HTTPError(413, f"At most {MAX_BATCH_ITEMS:,} requisitions per batch")
+        return {"results": self.route_batch(compiled, items)}
+
+    def _handle_encoded(self, method, path, body):
+        """``handle`` plus the response encoding, for the thread pool (large results are slow to dump too)"""
+        return _encode(self.handle(method, path, body))
+
+    # --- HTTP plumbing ---
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                body = b""
+                try:
+                    length = int(headers.get("content-length", "0"))
+                    if method == "POST" and "content-length" not in headers:
+                        raise HTTPError(411, "Content-Length required")
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    path = target.split("?", 1)[0].rstrip("/") or "/"
+                    if path == "/reload":
+                        if method != "POST":
+                            raise HTTPError(405, "Use POST")
+                        await self.reload(force=True)
+                        result = self.status()
+                    elif len(body) > INLINE_BODY_BYTES:
+                        loop = asyncio.get_running_loop()
+                        result = await loop.run_in_executor(self._route_pool, self._handle_encoded, method, path, body)
+                    else:
+                        result = self.handle(method, path, body)
+                    status = 200
+                except HTTPError as e:
+                    status, result = e.status, {"error": str(e)}
+                    if status == 411 or (status == 413 and len(body) < length):
+                        keep_alive = False  # the unread body would corrupt the next request
+                except (ValueError, TypeError) as e:
+                    status, result = 400, {"error": str(e)}
+                except Exception as e:  # never take the server down for one request
+                    logger.exception("Request failed")
+                    status, result = 500, {"error": str(e)}
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = payload if isinstance(payload, bytes) else _encode(payload)
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8600, directory=None, poll_interval=1.0, ready=None):
+    """Run the service until cancelled; ``ready`` (an asyncio.Event) is set once listening"""
+    service = RoutingService(directory, poll_interval)
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    watcher = asyncio.create_task(service.watch())
+    logger.info("Routing service on http://%s:%d (%d blueprint(s) from %s)",
+                host, port, len(service.compiled.rules), service.directory)
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ORO routing service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--rules", default=DEFAULT_RULESET_DIR, help="Rule-set (blueprint) directory")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between rule-set change checks")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.rules, args.poll))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
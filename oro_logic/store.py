@@ -0,0 +1,293 @@
+"""SQLite blueprint store: versioned blueprints indexed by scope.
+
+    python -m oro_logic.store import blueprints/                      # load saved JSON blueprints
+    python -m oro_logic.store find --end-market Vietnam --l4 "Facilities Services"
+
+Every saved blueprint (``output_data``) becomes a row in ``blueprints``. Rows
+with the same scope (geography + category selection) are versions of one
+logic: saving again adds version n+1 and marks it latest, unless the content
+is unchanged. Each scope value (region, cluster, end market, business user
+market, company code, L1-L4) is also a row in ``blueprint_scope`` keyed
+``(dim, value, blueprint_id)``, so a lookup is a few index range scans no
+matter how many blueprints are stored. A blueprint that doesn't restrict a
+dimension (e.g. no L4 selected) is indexed under ``*`` and matches any value.
+
+The database lives at ``blueprints.sqlite`` next to the app (override with
+``ORO_STORE_PATH``) and runs in WAL mode, so the app's sessions and the CLI
+can read while another process saves.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+from oro_logic.blueprint import blueprint_hash
+from oro_logic.container import CONTAINER_SUFFIX, load_blueprint_file
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "ORO_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blueprints.sqlite"),
+)
+ANY_VALUE = "*"
+SCOPE_DIMS = ("region", "cluster", "end_market", "business_user_market", "company_code", "l1", "l2", "l3", "l4")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blueprints (
+    id INTEGER PRIMARY KEY,
+    scope_key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    is_latest INTEGER NOT NULL,
+    label TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL,
+    region TEXT NOT NULL DEFAULT '',
+    cluster TEXT NOT NULL DEFAULT '',
+    company_code TEXT NOT NULL DEFAULT '',
+    end_markets TEXT NOT NULL DEFAULT '',
+    full_path TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT '',
+    saved_at TEXT NOT NULL,
+    body TEXT NOT NULL,
+    UNIQUE (scope_key, version)
+);
+CREATE INDEX IF NOT EXISTS blueprints_latest ON blueprints (is_latest, saved_at);
+CREATE TABLE IF NOT EXISTS blueprint_scope (
+    dim TEXT NOT NULL,
+    value TEXT NOT NULL,
+    blueprint_id INTEGER NOT NULL REFERENCES blueprints (id) ON DELETE CASCADE,
+    PRIMARY KEY (dim, value, blueprint_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blueprint_scope_id ON blueprint_scope (blueprint_id);
+"""
+
+SUMMARY_COLUMNS = ["id", "version", "is_latest", "label", "region", "cluster", "company_code", "end_markets",
+                   "full_path", "created_at", "saved_at"]
+
+
+def _values(values):
+    """Distinct, stripped, non-empty strings in first-seen order"""
+    if isinstance(values, str):
+        values = [values]
+    cleaned = (str(value).strip() for value in values or [] if value is not None)
+    return list(dict.fromkeys(value for value in cleaned if value and value != "N/A"))
+
+
+def scope_values(blueprint):
+    """{dim: [values]} the blueprint is indexed under (``[ANY_VALUE]`` when unrestricted)"""
+    scope = blueprint.get("scope", {})
+    category = blueprint.get("category", {})
+    raw = {
+        "region": scope.get("region"),
+        "cluster": scope.get("cluster"),
+        "end_market": scope.get("end_markets"),
+        "business_user_market": scope.get("business_user_markets"),
+        "company_code": scope.get("company_code"),
+        "l1": category.get("l1"),
+        "l2": category.get("l2"),
+        "l3": category.get("l3"),
+        "l4": category.get("l4"),
+    }
+    return {dim: _values(raw[dim]) or [ANY_VALUE] for dim in SCOPE_DIMS}
+
+
+def scope_key(blueprint):
+    """Identity of the logic a blueprint captures: versions of it share this key"""
+    values = {dim: sorted(found) for dim, found in scope_values(blueprint).items()}
+    return hashlib.sha1(json.dumps(values, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class BlueprintStore:
+    """Versioned blueprints in one SQLite file; safe to share across threads (one connection per thread)"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_STORE_PATH
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save(self, blueprint, label=""):
+        """Store a blueprint as the next version of its scope; returns ``(id, version)``.
+
+        Saving content identical to the latest version returns that version.
+        """
+        key = scope_key(blueprint)
+        content_hash = blueprint_hash(blueprint)
+        scope = blueprint.get("scope", {})
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            latest = conn.execute(
+                "SELECT id, version, content_hash FROM blueprints WHERE scope_key = ? AND is_latest = 1", (key,)
+            ).fetchone()
+            if latest is not None and latest["content_hash"] == content_hash:
+                if label:
+                    conn.execute("UPDATE blueprints SET label = ? WHERE id = ?", (label, latest["id"]))
+                return latest["id"], latest["version"]
+            version = 1
+            if latest is not None:
+                conn.execute("UPDATE blueprints SET is_latest = 0 WHERE id = ?", (latest["id"],))
+                version = latest["version"] + 1
+            blueprint_id = conn.execute(
+                "INSERT INTO blueprints (scope_key, version, is_latest, label, content_hash, region, cluster, "
+                "company_code, end_markets, full_path, created_at, saved_at, body) "
+                "VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, version, label or "", content_hash, ", ".join(_values(scope.get("region"))),
+                 ", ".join(_values(scope.get("cluster"))), ", ".join(_values(scope.get("company_code"))),
+                 ", ".join(_values(scope.get("end_markets"))),
+                 str(blueprint.get("category", {}).get("full_path") or ""),
+                 str(blueprint.get("metadata", {}).get("created_at") or ""),
+                 pd.Timestamp.now().isoformat(timespec="seconds"),
+                 json.dumps(blueprint, ensure_ascii=False, default=str)),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO blueprint_scope (dim, value, blueprint_id) VALUES (?, ?, ?)",
+                [(dim, value, blueprint_id) for dim, values in scope_values(blueprint).items() for value in values],
+            )
+        return blueprint_id, version
+
+    def get(self, blueprint_id):
+        """The stored blueprint dict, or None"""
+        row = self._connection().execute("SELECT body FROM blueprints WHERE id = ?", (blueprint_id,)).fetchone()
+        return json.loads(row["body"]) if row is not None else None
+
+    def find(self, filters=None, latest_only=True, text=None, limit=200):
+        """Summaries (newest first) of blueprints matching every ``{dim: value}`` filter.
+
+        A filter matches blueprints indexed under that value or unrestricted
+        on the dimension. ``text`` is a case-insensitive substring of the
+        label or category path (``%`` and ``_`` in it match literally).
+        """
+        clauses, params = [], []
+        for dim, value in (filters or {}).items():
+            if dim not in SCOPE_DIMS:
+                raise ValueError(f"Unknown scope dimension: {dim}")
+            if value in (None, ""):
+                continue
+            clauses.append("id IN (SELECT blueprint_id FROM blueprint_scope WHERE dim = ? AND value IN (?, ?))")
+            params.extend([dim, str(value).strip(), ANY_VALUE])
+        if latest_only:
+            clauses.append("is_latest = 1")
+        if text:
+            clauses.append("(label LIKE ? ESCAPE '\\' OR full_path LIKE ? ESCAPE '\\')")
+            pattern = str(text).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.extend([f"%{pattern}%"] * 2)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM blueprints {where} ORDER BY saved_at DESC, id DESC LIMIT ?",
+            params + [int(limit)],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def versions(self, blueprint_id):
+        """Summaries of every version of the blueprint's scope, newest first"""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM blueprints "
+            "WHERE scope_key = (SELECT scope_key FROM blueprints WHERE id = ?) ORDER BY version DESC",
+            (blueprint_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def values(self, dim):
+        """Distinct indexed values of a scope dimension (for filter dropdowns)"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT value FROM blueprint_scope WHERE dim = ? AND value != ? ORDER BY value", (dim, ANY_VALUE)
+        ).fetchall()
+        return [row["value"] for row in rows]
+
+    def count(self, latest_only=True):
+        sql = "SELECT COUNT(*) FROM blueprints" + (" WHERE is_latest = 1" if latest_only else "")
+        return self._connection().execute(sql).fetchone()[0]
+
+    def iter_latest(self, batch_size=500):
+        """(id, blueprint) for the latest version of every scope, streamed in batches"""
+        last_id = 0
+        conn = self._connection()
+        while True:
+            rows = conn.execute("SELECT id, body FROM blueprints WHERE is_latest = 1 AND id > ? ORDER BY id LIMIT ?",
+                                (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["id"], json.loads(row["body"])
+            last_id = rows[-1]["id"]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=None):
+    """Process-wide BlueprintStore for the path (shared by all app sessions)"""
+    path = os.path.abspath(path or DEFAULT_STORE_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = BlueprintStore(path)
+        return _stores[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Versioned SQLite blueprint store")
+    parser.add_argument("--db", default=None, help=f"Store file (default: {DEFAULT_STORE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Save blueprint files (JSON or .oro containers, or directories of them) into the store")
+    load.add_argument("paths", nargs="+")
+    find = commands.add_parser("find", help="List the latest blueprints matching a scope")
+    for dim in SCOPE_DIMS:
+        find.add_argument(f"--{dim.replace('_', '-')}", dest=dim)
+    find.add_argument("--text", help="Substring of the label or category path")
+    find.add_argument("--all-versions", action="store_true")
+    find.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+    store = BlueprintStore(args.db)
+
+    if args.command == "import":
+        files = []
+        for path in args.paths:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.endswith((".json", CONTAINER_SUFFIX)) and not name.startswith("."))
+            else:
+                files.append(path)
+        skipped = 0
+        for path in files:
+            try:
+                blueprint = load_blueprint_file(path)
+                if not isinstance(blueprint, dict):
+                    raise ValueError(f"expected a blueprint object, found a JSON {type(blueprint).__name__}")
+                blueprint_id, version = store.save(blueprint)
+            except (OSError, ValueError) as e:
+                print(f"Skipped {path}: {e}", file=sys.stderr)
+                skipped += 1
+                continue
+            print(f"{os.path.basename(path)} -> #{blueprint_id} v{version}")
+        if skipped:
+            sys.exit(f"{skipped} of {len(files)} file(s) not imported")
+        return
+
+    filters = {dim: getattr(args, dim) for dim in SCOPE_DIMS if getattr(args, dim)}
+    rows = store.find(filters, latest_only=not args.all_versions, text=args.text, limit=args.limit)
+    if rows:
+        print(pd.DataFrame(rows).to_string(index=False))
+    print(f"{len(rows)} blueprint(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
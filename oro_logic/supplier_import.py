@@ -0,0 +1,153 @@
+"""Bulk import of Supplier Pool rows from CSV / XLSX files.
+
+    python -m oro_logic.supplier_import suppliers.xlsx --report errors.csv
+
+Headers are matched case-insensitively (``SUPPLIER_ALIASES``). Validation is
+column-wise: each option column is stripped, lower-cased and mapped onto its
+allowed values in one pass, so a 50k-row file is checked in well under a
+second. Rows are keyed on (Vendor Code, Buying Channel) - the pool holds one
+row per channel - and duplicates are found with a hashed ``duplicated()``
+over that key, both within the file and against the rows already in the pool.
+
+The report has one line per problem with the file's row number (header = 1).
+Rows with errors are left out of the import; warnings are imported.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from oro_logic.blueprint import SUPPLIER_COLUMNS, SUPPLIER_OPTIONS
+from oro_logic.ingest import detect_format
+
+REPORT_COLUMNS = ["row", "severity", "column", "value", "message"]
+
+# Source header (lower-cased, stripped) -> Supplier Pool column
+SUPPLIER_ALIASES = {
+    'supplier name': 'Supplier Name', 'supplier': 'Supplier Name', 'name': 'Supplier Name', 'vendor name': 'Supplier Name',
+    'vendor code': 'Vendor Code', 'supplier code': 'Vendor Code', 'vendor_code': 'Vendor Code',
+    'supplier type': 'Supplier Type', 'type': 'Supplier Type',
+    'logic type': 'Logic Type', 'logic': 'Logic Type',
+    'buying channel': 'Buying Channel', 'channel': 'Buying Channel',
+    'tender required': 'Tender Required', 'tender': 'Tender Required',
+    'comments': 'Comments', 'comment': 'Comments', 'logic explanation': 'Comments',
+}
+_EXACT_HEADERS = {column.lower(): column for column in SUPPLIER_COLUMNS}
+
+
+def read_supplier_file(source, name=None):
+    """Raw supplier table (all cells as text) from a path or an uploaded file object"""
+    name = (name or getattr(source, "name", None) or str(source)).lower()
+    if hasattr(source, "read"):
+        head = source.read(4)
+        source.seek(0)
+        is_xlsx = head == b'PK\x03\x04'
+    else:
+        is_xlsx = detect_format(source) == 'xlsx'
+    if is_xlsx or name.endswith((".xlsx", ".xlsm")):
+        return pd.read_excel(source, dtype=str, engine="openpyxl")
+    return pd.read_csv(source, dtype=str, keep_default_na=False, sep=None, engine="python")
+
+
+def normalize_suppliers(df):
+    """Rename known headers to the pool's columns; unknown columns are dropped, missing ones blank.
+
+    A header naming a pool column outright wins over an alias of it (a file
+    with both "Supplier" and "Supplier Name" keeps "Supplier Name"), and of
+    several aliases of one column the leftmost is used.
+    """
+    headers = [str(col).strip().lower() for col in df.columns]
+    picked = {}  # pool column -> position of the source column
+    for position, header in enumerate(headers):
+        target = _EXACT_HEADERS.get(header)
+        if target and target not in picked:
+            picked[target] = position
+    for position, header in enumerate(headers):
+        target = SUPPLIER_ALIASES.get(header)
+        if target and target not in picked:
+            picked[target] = position
+    out = df.iloc[:, list(picked.values())].set_axis(list(picked), axis=1).reindex(columns=SUPPLIER_COLUMNS)
+    return out.where(out.notna(), "").astype(str).apply(lambda col: col.str.strip())
+
+
+def _dedupe_key(df):
+    return df["Vendor Code"].str.casefold() + "\x1f" + df["Buying Channel"]
+
+
+def validate_suppliers(df, existing=None):
+    """(rows to import, report DataFrame) for a raw supplier table.
+
+    ``existing`` is the current Supplier Pool; rows repeating one of its
+    (Vendor Code, Buying Channel) keys are reported and skipped.
+    """
+    frame = normalize_suppliers(df)
+    rows = pd.Series(range(2, len(frame) + 2), index=frame.index)
+    problems = []
+
+    def report(mask, severity, column, message, values=None):
+        if mask.any():
+            problems.append(pd.DataFrame({
+                "row": rows[mask],
+                "severity": severity,
+                "column": column,
+                "value": (frame[column] if values is None else values)[mask],
+                "message": message,
+            }))
+
+    blank = (frame[["Supplier Name", "Vendor Code"]] == "").all(axis=1)
+    frame, rows = frame[~blank].copy(), rows[~blank]
+
+    errors = pd.Series(False, index=frame.index)
+    for column, options in SUPPLIER_OPTIONS.items():
+        raw = frame[column]
+        canonical = raw.str.lower().map({option.lower(): option for option in options})
+        invalid = canonical.isna()
+        report(invalid, "error", column, f"Not one of: {', '.join(o for o in options if o)}", raw)
+        frame[column] = canonical.fillna(raw)
+        errors |= invalid
+
+    no_name = frame["Supplier Name"] == ""
+    report(no_name, "error", "Supplier Name", "Supplier Name is required (routing matches on it)")
+    errors |= no_name
+
+    coded = frame["Vendor Code"] != ""
+    key = _dedupe_key(frame)
+    repeated = coded & key.duplicated()
+    report(repeated, "error", "Vendor Code", "Duplicate Vendor Code / Buying Channel in the file")
+    errors |= repeated
+    if existing is not None and not existing.empty:
+        current = normalize_suppliers(existing)
+        current = current[current["Vendor Code"] != ""]
+        in_pool = coded & ~repeated & key.isin(set(_dedupe_key(current)))
+        report(in_pool, "error", "Vendor Code", "Already in the Supplier Pool with this Buying Channel")
+        errors |= in_pool
+
+    # Several rows per vendor are fine, but the first one decides its routing
+    valid = frame[~errors & coded]
+    first_logic = valid.groupby(valid["Vendor Code"].str.casefold(), sort=False)["Logic Type"].transform("first")
+    mixed = (valid["Logic Type"] != first_logic).reindex(frame.index, fill_value=False)
+    report(mixed, "warning", "Logic Type", "Vendor has rows with another Logic Type; the first row decides routing")
+
+    report_df = (pd.concat(problems, ignore_index=True).sort_values("row", kind="stable", ignore_index=True)
+                 if problems else pd.DataFrame(columns=REPORT_COLUMNS))
+    return frame[~errors].reset_index(drop=True), report_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a supplier file for the Supplier Pool")
+    parser.add_argument("file", help="CSV or XLSX file with Supplier Pool columns")
+    parser.add_argument("--report", help="Write the row report as CSV (default: print it)")
+    args = parser.parse_args(argv)
+
+    clean, report_df = validate_suppliers(read_supplier_file(args.file))
+    if args.report:
+        report_df.to_csv(args.report, index=False)
+    elif not report_df.empty:
+        print(report_df.to_string(index=False))
+    n_errors = int((report_df["severity"] == "error").sum())
+    print(f"{len(clean):,} row(s) valid, {n_errors:,} error(s), {len(report_df) - n_errors:,} warning(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
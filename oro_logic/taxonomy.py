@@ -0,0 +1,520 @@
+"""Process-wide, read-only taxonomy shared by every Streamlit session.
+
+Each session used to rebuild ``geo_df`` / ``cat_df`` from the default
+hierarchies and keep its own copy in ``st.session_state``. The taxonomy is
+now built once per process, keyed by a content hash of its source data, and
+every session holds only the version string. A new version is built only
+when the source data changes.
+
+A cold process doesn't build the default taxonomy either: the built-in
+defaults and the shipped taxonomy files come prebuilt in ``oro_logic/data/``
+(compact Parquet tables plus their cascade indexes), keyed by the content
+hash of their sources. Rebuild them after changing either::
+
+    python -m oro_logic.taxonomy
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from oro_logic.compact import compact_frame, frame_bytes, text_frame_bytes
+from oro_logic.hierarchy import (
+    HierarchyIndex, build_cat_hierarchy, build_geo_hierarchy, find_cluster_column, frame_fingerprint,
+)
+from oro_logic.search import PathSearchIndex
+
+# Default hierarchies (fallback)
+DEFAULT_GEO_HIERARCHY = {
+  "AME": {
+    "WESTERN EUROPE": [
+      "Belgium", 
+      "Denmark", 
+      "France", 
+      "Greece", 
+      "Ireland", 
+      "Malta", 
+      "Norway", 
+      "Spain", 
+      "Sweden", 
+      "UNITED KINGDOM", 
+      "Netherlands", 
+      "Finland", 
+      "Luxembourg", 
+      "Portugal", 
+      "Cyprus"
+    ]
+  },
+  "APMEA": {
+    "APMEA SOUTH": [
+      "Australia", 
+      "Indonesia", 
+      "Malaysia", 
+      "Papua New Guinea", 
+      "Samoa", 
+      "Singapore", 
+      "Solomon Islands", 
+      "Vietnam", 
+      "Fiji", 
+      "New Zealand", 
+      "Cambodia", 
+      "Philippines", 
+      "China"
+    ]
+  },
+  "USA": {
+    "USA": ["USA"]
+  }
+}
+
+DEFAULT_CAT_HIERARCHY = {
+    "Marketing": {
+        "Marketing Prof Svc": {
+            "Advertising Services": ["Media services"],
+            "Creative agency fees": ["Creative agency fees"],
+            "Market research": ["Market research-customised", "Market research-syndicated"],
+            "Marketing & Trade Event": ["1-2-1 Activation, Brand Ambassadors & Hostesses", "Marketing Event Management", "Sponsorship"],
+            "PR Services": ["Partnership", "Printing Cylinders", "PR Agency"],
+            "Trade Marketing Services": ["D2C-Social Selling", "Loyalty & Incentive Programmes", "Other Trade Marketing Services"]
+        },
+        "Marketing POSM": {
+            "POSM Services": ["Cigarette Vending Machines Purchase & Lease/Services", "Marketing Print", "Merchandising Services", "Permanent POSM", "POSM Leasing Services", "Promotional merchandise", "Semi-Permanent POSM"]
+        }
+    },
+    "Operations": {
+        "Production": {
+            "Production Services": ["Manufacturing support services", "Production"],
+            "Spare Parts": ["Spare Parts"],
+            "After Sales": ["After Sales"]
+        },
+        "OSS": {
+            "Material Handling/Storage Machinery": ["General Machinery", "Material Handling Equipment FLTS", "Warehouse Material (pallets or other consumables)", "Workshop supplies & consumables"],
+            "Packaging Materials and Supply": ["Leaf Packaging materials & supplies", "Tobacco Case C48", "Warehouse Packaging Materials"],
+            "Quality Control": ["Factory Quality Control and Service", "Quality Control"]
+        },
+        "Agricultural Inputs": {
+            "Agrochemicals (Herbicides, Insecticides, etc.)": ["Agrochemicals (Herbicides, Insecticides, etc.)"],
+            "Fertilizers (NPK, Soluble, etc.)": ["Fertilizers (NPK, Soluble, etc.)"],
+            "Other Agricultural Inputs (Supplies, Services)": ["Other Agricultural Inputs (Supplies, Services)"]
+        }
+    },
+    "Corporate": {
+        "Facilities": {
+            "Facilities Services": ["Archiving", "Catering Services and Supplies", "Food & Beverages", "Industrial Cleaning Services", "Integrated Facilities Management", "Landscaping, Roads and Grounds, Snow removal", "Office Cleaning Equipment and Supplies", "Other Facilities", "Plants & Flowers", "Staff Transportation", "Statutory Compliance & Inspections", "Vending Purchase/Lease/Maintenance"],
+            "Building": ["Building-Consultancy & Project management", "Building Construction", "Building equipment and installation", "Building Maintenance and Repair"],
+            "Corporate Real Estate": ["Property Lease", "Property Purchase or Sale"],
+            "Pest control": ["Pest control products & services"],
+            "Security Services": ["Security Services and Supplies", "Security Technology & Services"],
+            "Uniform": ["Uniform Services and Management"],
+            "Utilities": ["Electricity", "Fuels", "Gas", "Utilities other", "Water"],
+            "Waste": ["Waste Management Services"]
+        },
+        "Prof Svc": {
+            "Consultancy": ["Consultancy"],
+            "Finance Services": ["Banking and investment", "Group Company Auditors"],
+            "Legal Services": ["Legal Services", "Legal Services Other", "Litigation", "Patents or Trade Mark"],
+            "Other Audits (local), Recovery Audits, Accounting": ["Other Audits (local), Recovery Audits, Accounting"],
+            "Translation, Information, Testing, Inspection etc": ["Translation, Information, Testing, Inspection etc"]
+        },
+        "HR Svc": {
+            "HR Professional services": ["HR Consultancy", "Outplacement", "Recruitment", "Training & education"],
+            "Reward": ["Benefits & Employee Assistance", "External Payroll Services", "Health & Life Insurance", "Healthcare Services", "HR Compensation and Benefits Surveys", "Pension investments"],
+            "Relocation": ["Expats-Schools, House", "Relocation Services"],
+            "Talent": ["Temporary Labour and outsourcing", "Temporary Labour IT"]
+        },
+        "Office Services and supplies": {
+            "Office Services and supplies": ["Books-Journals & subcriptions", "Office Equipment", "Office Furniture", "Office supplies", "Printing and Reproduction Services"]
+        },
+        "Travel Management": {
+            "Travel Management": ["Air travel", "Other Travel Expense (Visa, Rail, Sea)", "Taxi-Bus-Car hire"],
+            "Hotel-Restaurant & Meeting": ["Hotel", "Restaurant-Bar Expenses", "Seminars-Conference-Meetings"]
+        },
+        "Vehicle Hire & Purchase": {
+            "Vehicle Hire & Purchase": ["Vehicle Lease (long term)", "Vehicle Purchase", "Vehicle rental (short term)"],
+            "Other Vehicle Costs": ["Fuel", "Telematics", "Vehicle maintenance/Fleet management", "Vehicle Other Insurance/Tax/Parking"]
+        },
+        "Insurance": {
+            "Insurance": ["Building & Content Insurance", "Insurance Others"]
+        },
+        "Politics & Civic Affairs": {
+            "Politics & Civic Affairs": ["Charities", "Membership fees or Tobacco chambers or unions", "Politics & Civic Affairs"]
+        },
+        "Other Agency costs": {
+            "Other Agency costs": ["Other Agency costs"]
+        },
+        "Other Travel Expense": {
+            "Other Travel Expense": ["Other Travel Expense"]
+        }
+    },
+    "IDT": {
+        "IT Infrastructure": {
+            "IT Infrastructure": ["Hosting, Public Cloud, Datacentres Infrastructure"],
+            "Hardware": ["Computing/Desktop/Laptops/Handheld", "IT Equipment and accessories", "IT Hardware Maintenance", "Servers and Server Equipment"],
+            "Networks Hardware": ["Audio and Video Hardware", "IT Networks Infrastructure"],
+            "Networks Services": ["WAN & LAN Services"]
+        },
+        "IT Services": {
+            "IT Services": ["IT Services-End User Computing", "IT Services-End User Printing"],
+            "IT Consultancy": ["IT Consultancy"],
+            "Managed Professional Services": ["Managed Professional Services"]
+        },
+        "Software & Application": {
+            "Software & Application": ["Soft & App Develop Corporate Functions", "Soft & App Develop Econnected Devices", "Soft & App Develop Enterprise Platforms", "Soft & App Develop Marketing D2C", "Soft & App Develop Marketing Trade", "Soft & App Develop Operations", "Soft & App Develop Testing Q&A", "Software License", "Software Support"]
+        },
+        "Digital Services": {
+            "Digital Services": ["CRM Services (Non-DBS)", "Info/Careline/Live Chat/Call Centre", "Other Digital Services", "Search Engine Optimisation (SEO)", "Social Media Management"]
+        },
+        "Cyber Security": {
+            "Cyber Security": ["Cyber Security"]
+        },
+        "Voice, Communication & Mobile Services": {
+            "Voice, Communication & Mobile Services": ["Voice & Mobile Communication Services"]
+        }
+    },
+    "R&D": {
+        "Laboratory Supply": {
+            "Laboratory Supply": ["Laboratory Consumables", "Laboratory Equipment & Supplies"]
+        },
+        "Scientific Services": {
+            "Scientific Services": ["Analytical", "Clinical Studies", "R&D Consultancy", "Research Services"]
+        },
+        "EH&S Equipment and Services": {
+            "EH&S Equipment and Services": ["Agricultural PPEs (Farmers Protection)", "Safety Equipment & PPEs (Shoes, Gloves, etc.)"]
+        },
+        "ESG": {
+            "ESG": ["ESG Afforestation", "ESG Carbon offsets", "ESG IREC GoO/ESG Renewable energy certificates", "ESG Solar panels"]
+        },
+        "Equipment": {
+            "Equipment": ["Production Machinery"]
+        }
+    }
+}
+
+
+def geo_frame_from_hierarchy(hierarchy):
+    """Flatten {Region: {DRBU: [End Market]}} into the geography table"""
+    rows = [
+        (region, cluster, market, '')  # Company Code is empty by default
+        for region, clusters in hierarchy.items()
+        for cluster, markets in clusters.items()
+        for market in markets
+    ]
+    return pd.DataFrame(rows, columns=['Region', 'DRBU', 'End Market', 'Company Code'])
+
+
+def cat_frame_from_hierarchy(hierarchy):
+    """Flatten {L1: {L2: {L3: [L4]}}} into the category table"""
+    rows = [
+        (l1, l2, l3, l4)
+        for l1, l2_dict in hierarchy.items()
+        for l2, l3_dict in l2_dict.items()
+        for l3, l4_list in l3_dict.items()
+        for l4 in l4_list
+    ]
+    return pd.DataFrame(rows, columns=['L1', 'L2', 'L3', 'L4'])
+
+
+def _freeze(df):
+    """Mark the frame's numpy buffers read-only so a session cannot mutate the shared copy in place"""
+    for col in df.columns:
+        values = df[col].to_numpy(copy=False)
+        if hasattr(values, "flags"):
+            try:
+                values.flags.writeable = False
+            except ValueError:
+                pass
+    return df
+
+
+class Taxonomy:
+    """Read-only geography + category taxonomy with its cascade indexes.
+
+    Never mutate the frames; derive new ones instead (pandas copy-on-write
+    keeps derived frames from touching the shared buffers).
+    """
+
+    def __init__(self, version, geo_df, cat_df, sources=None, indexes=None):
+        self.version = version
+        self.sources = sources or {"geo": "defaults", "cat": "defaults"}
+        # Repetitive levels (Region, DRBU, L1-L3) are held as categoricals
+        self.geo_df = _freeze(compact_frame(geo_df))
+        self.cat_df = _freeze(compact_frame(cat_df))
+        self.cluster_col = find_cluster_column(self.geo_df) or 'DRBU'
+        geo_levels = ('Region', self.cluster_col, 'End Market')
+        if 'Company Code' in self.geo_df.columns:
+            geo_levels += ('Company Code',)
+        indexes = indexes or {}  # {"geo": branches, "cat": branches} of a prebuilt taxonomy
+        self.geo_index = HierarchyIndex(self.geo_df, geo_levels, branches=indexes.get("geo"))
+        self.cat_index = HierarchyIndex(self.cat_df, ('L1', 'L2', 'L3', 'L4'), branches=indexes.get("cat"))
+        self._geo_hierarchy = None
+        self._cat_hierarchy = None
+        self._cat_search = None
+        self._market_search = None
+        self._text_bytes = None
+
+    @property
+    def geo_hierarchy(self):
+        if self._geo_hierarchy is None:
+            self._geo_hierarchy = build_geo_hierarchy(self.geo_df, self.cluster_col)
+        return self._geo_hierarchy
+
+    @property
+    def cat_hierarchy(self):
+        if self._cat_hierarchy is None:
+            self._cat_hierarchy = build_cat_hierarchy(self.cat_df)
+        return self._cat_hierarchy
+
+    @property
+    def cat_search(self):
+        """Search index over the full L1 > L2 > L3 > L4 paths"""
+        if self._cat_search is None:
+            self._cat_search = PathSearchIndex(self.cat_index.paths())
+        return self._cat_search
+
+    @property
+    def market_search(self):
+        """Search index over the Region > Cluster > End Market paths"""
+        if self._market_search is None:
+            self._market_search = PathSearchIndex(self.geo_index.paths(3))
+        return self._market_search
+
+    def memory_report(self, sessions=1):
+        """Bytes a session would hold with private copies vs. what sharing costs.
+
+        ``per_session_saved`` is the deep size of the frames each session no
+        longer copies; with N sessions the process saves (N - 1) times that.
+        ``compact_saved`` is what the categorical levels save over plain text.
+        """
+        frames = frame_bytes(self.geo_df) + frame_bytes(self.cat_df)
+        if self._text_bytes is None:  # the frames never change, and measuring this copies them
+            self._text_bytes = text_frame_bytes(self.geo_df) + text_frame_bytes(self.cat_df)
+        text = self._text_bytes
+        return {
+            "version": self.version,
+            "sources": dict(self.sources),
+            "geo_rows": len(self.geo_df),
+            "cat_rows": len(self.cat_df),
+            "shared_bytes": frames,
+            "text_bytes": text,
+            "compact_saved": text - frames,
+            "per_session_saved": frames,
+            "total_saved": frames * max(sessions - 1, 0),
+        }
+
+
+def source_hash(*sources):
+    """Content hash of taxonomy sources (hierarchy dicts, DataFrames or raw bytes)"""
+    digest = hashlib.sha1()
+    for source in sources:
+        if isinstance(source, pd.DataFrame):
+            digest.update(frame_fingerprint(source).encode("ascii"))
+        elif isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        else:
+            digest.update(json.dumps(source, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+_MAX_VERSIONS = 2  # current + previous, so sessions mid-rerun keep a valid reference
+
+
+def _new_taxonomy(geo_source, cat_source, version=None, sources=None):
+    geo_source = DEFAULT_GEO_HIERARCHY if geo_source is None else geo_source
+    cat_source = DEFAULT_CAT_HIERARCHY if cat_source is None else cat_source
+    version = version or source_hash(geo_source, cat_source)
+    geo_df = geo_source if isinstance(geo_source, pd.DataFrame) else geo_frame_from_hierarchy(geo_source)
+    cat_df = cat_source if isinstance(cat_source, pd.DataFrame) else cat_frame_from_hierarchy(cat_source)
+    return Taxonomy(version, geo_df.copy(), cat_df.copy(), sources)
+
+
+def _remember(taxonomy):
+    """Cache ``taxonomy`` unless its version already is; returns the cached one. Call with _CACHE_LOCK held."""
+    if taxonomy.version not in _CACHE:
+        _CACHE[taxonomy.version] = taxonomy
+        while len(_CACHE) > _MAX_VERSIONS:
+            _CACHE.pop(next(iter(_CACHE)))
+    return _CACHE[taxonomy.version]
+
+
+def get_shared_taxonomy(geo_source=None, cat_source=None, version=None, sources=None):
+    """Return the process-wide Taxonomy for the given sources (defaults if None).
+
+    Sources are hierarchy dicts or DataFrames. The result is cached by a
+    content hash, so repeated calls from any session return the same object
+    and a rebuild only happens when the source data changes. Pass ``version``
+    when the caller already knows the content hash (e.g. of the source file)
+    to skip hashing the sources.
+    """
+    defaults = geo_source is None and cat_source is None
+    geo_source = DEFAULT_GEO_HIERARCHY if geo_source is None else geo_source
+    cat_source = DEFAULT_CAT_HIERARCHY if cat_source is None else cat_source
+    version = version or source_hash(geo_source, cat_source)
+    taxonomy = _CACHE.get(version)
+    if taxonomy is not None:
+        return taxonomy
+    with _CACHE_LOCK:
+        taxonomy = _CACHE.get(version)
+        if taxonomy is None:
+            taxonomy = read_prebuilt("defaults", version) if defaults else None
+            taxonomy = _remember(taxonomy or _new_taxonomy(geo_source, cat_source, version, sources))
+    return taxonomy
+
+
+def get_taxonomy_version(version):
+    """Look up a cached Taxonomy by version (None if it has been evicted)"""
+    return _CACHE.get(version)
+
+
+# Taxonomy files looked up next to app.py, in priority order
+DATA_FILES = ("Geographies & Categories.csv", "geo_master.csv")
+
+_FILE_VERSIONS = {}
+
+
+def _read_files(paths, cache_dir=None):
+    """(geo_df, cat_df, version, sources, errors) from the first of ``paths`` providing each table.
+
+    A table no file provides is None (the defaults), as is the version when
+    both are.
+    """
+    from oro_logic.ingest import load_taxonomy_file
+
+    geo_df = cat_df = None
+    sources = {"geo": "defaults", "cat": "defaults"}
+    hashes = []
+    errors = []
+    for path in paths:
+        if geo_df is not None and cat_df is not None:
+            break
+        try:
+            file_geo, file_cat, sha256 = load_taxonomy_file(path, cache_dir=cache_dir)
+        except Exception as e:  # corrupt / unsupported file: keep the defaults
+            errors.append(f"{os.path.basename(path)}: {e}")
+            continue
+        if geo_df is None and not file_geo.empty:
+            geo_df, sources["geo"] = file_geo, os.path.basename(path)
+            hashes.append(f"geo:{sha256}")
+        if cat_df is None and not file_cat.empty:
+            cat_df, sources["cat"] = file_cat, os.path.basename(path)
+            hashes.append(f"cat:{sha256}")
+
+    version = None
+    if hashes:
+        version = source_hash(
+            hashes,
+            DEFAULT_GEO_HIERARCHY if geo_df is None else None,
+            DEFAULT_CAT_HIERARCHY if cat_df is None else None,
+        )
+    return geo_df, cat_df, version, sources, errors
+
+
+def _files_key(paths):
+    """Content hash of the taxonomy files (names and bytes, in priority order) a prebuilt taxonomy came from"""
+    from oro_logic.ingest import file_sha256
+
+    return source_hash([[os.path.basename(path), file_sha256(path)] for path in paths])
+
+
+def get_file_taxonomy(paths, cache_dir=None):
+    """Shared Taxonomy loaded from taxonomy files, falling back to the defaults.
+
+    The geography and category tables each come from the first file that
+    provides them; missing files are skipped. Files are only re-read (from
+    the prebuilt taxonomy when they are the shipped ones, else from the
+    columnar cache, see oro_logic.ingest) when their mtime or size changes,
+    so steady-state calls cost one ``os.stat`` per file.
+    Returns ``(taxonomy, errors)`` where errors lists unreadable files.
+    """
+    existing = [path for path in paths if os.path.exists(path)]
+    stat_key = tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in existing)
+    known = _FILE_VERSIONS.get(stat_key)
+    if known is not None and known in _CACHE:
+        return _CACHE[known], []
+
+    prebuilt = read_prebuilt("files", _files_key(existing)) if existing else None
+    if prebuilt is not None:
+        with _CACHE_LOCK:
+            taxonomy = _remember(prebuilt)
+        _FILE_VERSIONS[stat_key] = taxonomy.version
+        return taxonomy, []
+
+    geo_df, cat_df, version, sources, errors = _read_files(existing, cache_dir)
+    taxonomy = get_shared_taxonomy(geo_df, cat_df, version=version, sources=sources)
+    if not errors:
+        _FILE_VERSIONS[stat_key] = taxonomy.version
+    return taxonomy, errors
+
+
+# Prebuilt taxonomies (see the module docstring)
+PREBUILT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+PREBUILT_FORMAT_VERSION = 1  # bump when the Taxonomy frames or HierarchyIndex layout change
+
+
+def _prebuilt_paths(name, directory=None):
+    stem = os.path.join(directory or PREBUILT_DIR, f"taxonomy_{name}")
+    return f"{stem}.json", f"{stem}.geo.parquet", f"{stem}.cat.parquet"
+
+
+def write_prebuilt(taxonomy, name, key, directory=None):
+    """Save ``taxonomy`` (compact frames + cascade indexes) as prebuilt ``name`` for sources hashing to ``key``"""
+    meta_path, geo_path, cat_path = _prebuilt_paths(name, directory)
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    taxonomy.geo_df.to_parquet(geo_path, index=False)
+    taxonomy.cat_df.to_parquet(cat_path, index=False)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": PREBUILT_FORMAT_VERSION,
+            "key": key,
+            "version": taxonomy.version,
+            "sources": taxonomy.sources,
+            "indexes": {"geo": taxonomy.geo_index.branches(), "cat": taxonomy.cat_index.branches()},
+        }, f, ensure_ascii=False, separators=(",", ":"))
+    return [meta_path, geo_path, cat_path]
+
+
+def read_prebuilt(name, key, directory=None):
+    """Prebuilt Taxonomy ``name`` if it was built from sources hashing to ``key``, else None"""
+    meta_path, geo_path, cat_path = _prebuilt_paths(name, directory)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != PREBUILT_FORMAT_VERSION or meta.get("key") != key:
+            return None
+        geo_df, cat_df = pd.read_parquet(geo_path), pd.read_parquet(cat_path)
+    except (OSError, ValueError, ImportError):  # missing or unreadable, or no Parquet engine
+        return None
+    return Taxonomy(meta["version"], geo_df, cat_df, meta["sources"], indexes=meta["indexes"])
+
+
+def build_prebuilt(data_dir, directory=None):
+    """Rebuild the prebuilt taxonomies: the defaults, and ``data_dir``'s taxonomy files if any. Returns the paths written."""
+    defaults = _new_taxonomy(None, None)
+    written = write_prebuilt(defaults, "defaults", defaults.version, directory)
+    existing = [path for path in (os.path.join(data_dir, name) for name in DATA_FILES) if os.path.exists(path)]
+    if existing:
+        geo_df, cat_df, version, sources, errors = _read_files(existing)
+        if errors:
+            raise ValueError("; ".join(errors))
+        written += write_prebuilt(_new_taxonomy(geo_df, cat_df, version, sources), "files", _files_key(existing),
+                                  directory)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the prebuilt taxonomies in oro_logic/data/")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Directory holding the taxonomy files (default: next to app.py)")
+    args = parser.parse_args(argv)
+    for path in build_prebuilt(args.data_dir):
+        print(f"Saved {os.path.getsize(path) / 1024:,.1f} KiB to {path}")
+
+
+if __name__ == "__main__":
+    main()